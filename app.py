@@ -6,10 +6,13 @@ from datetime import datetime
 import numpy as np
 import sys
 import os
+import zlib
 from pathlib import Path
 
 sys.path.append('scripts')
 
+from price_store import load, load_bars, load_wide, portfolio_assets
+
 # ========== CONFIGURATION & THEME ==========
 st.set_page_config(
     page_title="CryptoVision Pro",
@@ -310,6 +313,16 @@ if 'theme' not in st.session_state:
 def toggle_theme():
     st.session_state.theme = 'dark' if st.session_state.theme == 'light' else 'light'
 
+# ========== COULEURS DES ACTIFS ==========
+# Nombre max de cartes de prix affichées (l'univers peut contenir des centaines de cryptos)
+MAX_PRICE_CARDS = 8
+
+FALLBACK_PALETTE = ['#6366F1', '#8B5CF6', '#EC4899', '#F97316', '#14B8A6', '#0EA5E9', '#84CC16', '#EAB308']
+
+def fallback_color(symbol):
+    """Couleur stable pour un symbole sans couleur dédiée"""
+    return FALLBACK_PALETTE[zlib.crc32(symbol.encode('utf-8')) % len(FALLBACK_PALETTE)]
+
 # Header principal avec gradient
 st.markdown("""
 <div class="main-header">
@@ -327,19 +340,61 @@ with tab1:
         buy_and_hold_strategy,
         moving_average_crossover_strategy,
         simple_momentum_strategy,
-        calculate_metrics
+        sweep_ma_crossover,
+        backtest_trades,
+        trade_statistics
     )
+    from live_strategies import read_live_state
+    from strategy_dsl import load_user_strategies, rule_strategy
+    from metrics_engine import STRATEGY_METRICS, compute_metrics
     
-    @st.cache_data(ttl=300)
-    def load_bitcoin_data():
+    # cache_resource : les colonnes (vues mémoire-mappées) sont partagées sans
+    # la copie par session de cache_data, mais en lecture seule
+    @st.cache_resource(ttl=300)
+    def load_bitcoin_columns(resolution=None):
         try:
-            df = pd.read_csv('data/bitcoin_prices.csv')
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            return df
+            if resolution is None:
+                df = load('BTC')
+            else:
+                # Barres pré-agrégées : le prix de clôture sert de prix
+                df = load_bars('BTC', resolution).rename(columns={'close': 'price'})
+            if len(df) == 0:
+                return None
+            columns = {}
+            for col in df.columns:
+                values = df[col].to_numpy()
+                values.flags.writeable = False
+                columns[col] = values
+            return columns
         except Exception as e:
             return None
     
-    df_btc = load_bitcoin_data()
+    # Chaque session reçoit son propre DataFrame (sans copie des colonnes)
+    def load_bitcoin_data(resolution=None):
+        columns = load_bitcoin_columns(resolution)
+        return pd.DataFrame(columns, copy=False) if columns is not None else None
+    
+    BITCOIN_RESOLUTIONS = {
+        "Ticks bruts": None,
+        "5 minutes": '5m',
+        "1 heure": '1h',
+        "1 jour": '1d'
+    }
+    
+    with st.sidebar:
+        resolution_choice = st.selectbox(
+            "🕒 Résolution des prix Bitcoin",
+            list(BITCOIN_RESOLUTIONS.keys()),
+            help="Barres OHLC pré-calculées à l'ingestion (graphiques et backtests)"
+        )
+    
+    # Grille complète des fenêtres MA : ne dépend ni des sliders ni de la stratégie
+    @st.cache_data(ttl=300)
+    def load_ma_sweep(resolution, initial_capital):
+        df = load_bitcoin_data(resolution)
+        return sweep_ma_crossover(df['price'], initial_capital=initial_capital)
+    
+    df_btc = load_bitcoin_data(BITCOIN_RESOLUTIONS[resolution_choice])
     
     if df_btc is None:
         st.error("⚠️ **Données indisponibles** - Veuillez exécuter : `python scripts/fetch_data.py`")
@@ -389,9 +444,13 @@ with tab1:
             # Sélection de stratégie
             st.markdown("#### 📊 Stratégie de Trading")
             
+            # Stratégies intégrées, stratégies à règles (data/user_strategies.json), règles libres
+            user_strategies = load_user_strategies()
+            CUSTOM_RULES = "✏️ Règles personnalisées"
+            
             strategy_choice = st.selectbox(
                 "Sélectionner une stratégie",
-                ["Buy and Hold", "MA Crossover", "Simple Momentum"],
+                ["Buy and Hold", "MA Crossover", "Simple Momentum"] + list(user_strategies) + [CUSTOM_RULES],
                 help="Choisissez votre stratégie d'investissement"
             )
             
@@ -416,24 +475,61 @@ with tab1:
             elif strategy_choice == "Simple Momentum":
                 st.markdown("#### ⚙️ Paramètres Momentum")
                 momentum_window = st.slider("📊 Fenêtre de Momentum", 5, 50, 14)
+            
+            elif strategy_choice in user_strategies or strategy_choice == CUSTOM_RULES:
+                st.markdown("#### ⚙️ Règles de la stratégie")
+                strategy_rules = st.text_area(
+                    "📐 Règles (une par ligne)",
+                    value=user_strategies.get(
+                        strategy_choice, "enter when close > sma(14)\nexit when close < sma(14)"
+                    ),
+                    key=f"rules_{strategy_choice}",
+                    help="enter when ... / exit when ... - Indicateurs : sma, ema, std, rsi, highest, "
+                         "lowest, lag, change - Opérateurs : > < >= <= and or not, crosses above / below"
+                )
+            
+            # P&L live : état tenu à jour tick par tick par le daemon d'ingestion
+            live_state = read_live_state('BTC')
+            if live_state:
+                st.markdown("#### ⚡ Stratégies Live")
+                for label, state in live_state.items():
+                    st.metric(
+                        label,
+                        f"${state['value']:,.0f}",
+                        f"{(state['value'] / state['initial_capital'] - 1) * 100:.2f}%",
+                        help=f"{'Position longue' if state['position'] == 1 else 'Hors marché'} - "
+                             f"dernier tick {state['last_timestamp']}"
+                    )
         
         # ========== CALCUL DE LA STRATÉGIE ==========
         with st.spinner("⏳ Calcul de la stratégie en cours..."):
             if strategy_choice == "Buy and Hold":
                 portfolio_values = buy_and_hold_strategy(prices, initial_capital_a)
                 strategy_name = "Buy and Hold"
+                strategy_key, strategy_params = 'buy_and_hold', {}
             elif strategy_choice == "MA Crossover":
                 portfolio_values = moving_average_crossover_strategy(
                     prices, short_window, long_window, initial_capital_a
                 )
                 strategy_name = f"MA Crossover ({short_window}/{long_window})"
-            else:
+                strategy_key, strategy_params = 'ma_crossover', {'short_window': short_window, 'long_window': long_window}
+            elif strategy_choice == "Simple Momentum":
                 portfolio_values = simple_momentum_strategy(
                     prices, momentum_window, initial_capital_a
                 )
                 strategy_name = f"Simple Momentum ({momentum_window})"
+                strategy_key, strategy_params = 'momentum', {'window': momentum_window}
+            else:
+                # Règles compilées en calcul vectorisé (barres OHLC : open / high / low utilisables)
+                try:
+                    portfolio_values = rule_strategy(df_btc, strategy_rules, initial_capital_a)
+                except ValueError as e:
+                    st.error(f"⚠️ **Règles invalides** : {e}")
+                    st.stop()
+                strategy_name = "Règles personnalisées" if strategy_choice == CUSTOM_RULES else strategy_choice
+                strategy_key, strategy_params = 'rules', {'rules': strategy_rules}
             
-            metrics = calculate_metrics(portfolio_values, initial_capital_a)
+            metrics = compute_metrics(portfolio_values, initial_capital_a, STRATEGY_METRICS)
         
         # ========== MÉTRIQUES PRINCIPALES ==========
         st.markdown(f"""
@@ -582,6 +678,121 @@ with tab1:
                     {(metrics['annual_return'] / metrics['volatility'] if metrics['volatility'] > 0 else 0):.2f}</p>
             </div>
             """, unsafe_allow_html=True)
+        
+        # ========== BALAYAGE DES FENÊTRES MA ==========
+        if strategy_choice == "MA Crossover":
+            st.markdown("""
+            <div class="section-header">
+                <h3>🗺️ Balayage des Fenêtres MA Crossover</h3>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            sweep_labels = {
+                "Ratio de Sharpe": 'sharpe_ratio',
+                "Rendement Total (%)": 'total_return',
+                "Drawdown Max (%)": 'max_drawdown'
+            }
+            sweep_metric = st.radio(
+                "Métrique affichée",
+                list(sweep_labels.keys()),
+                horizontal=True,
+                key="sweep_metric"
+            )
+            
+            with st.spinner("⏳ Balayage des fenêtres en cours..."):
+                sweep = load_ma_sweep(BITCOIN_RESOLUTIONS[resolution_choice], initial_capital_a)
+            grid = sweep[sweep_labels[sweep_metric]]
+            
+            fig_sweep = go.Figure(go.Heatmap(
+                z=grid.values,
+                x=grid.columns,
+                y=grid.index,
+                colorscale='RdYlGn',
+                colorbar=dict(title=sweep_metric),
+                hovertemplate="MM courte %{y} / MM longue %{x}<br>%{z:.2f}<extra></extra>"
+            ))
+            
+            # Combinaison sélectionnée dans la sidebar
+            fig_sweep.add_trace(go.Scatter(
+                x=[long_window],
+                y=[short_window],
+                mode='markers',
+                marker=dict(symbol='x', size=14, color='#1E293B'),
+                name="Sélection",
+                showlegend=False
+            ))
+            
+            fig_sweep.update_layout(
+                xaxis=dict(title="MM Longue"),
+                yaxis=dict(title="MM Courte"),
+                height=450,
+                plot_bgcolor='white',
+                paper_bgcolor='white',
+                font=dict(family='Inter')
+            )
+            
+            st.plotly_chart(fig_sweep, use_container_width=True)
+            
+            # Le drawdown est négatif : le meilleur est aussi le maximum
+            ranked = grid.stack()
+            if len(ranked) > 0:
+                best = ranked.idxmax()
+                st.info(f"💡 **Meilleure combinaison ({sweep_metric})** : MM courte {best[0]} / "
+                        f"MM longue {best[1]} → {ranked[best]:.2f}")
+        
+        # ========== JOURNAL DES TRADES ==========
+        st.markdown("""
+        <div class="section-header">
+            <h3>🧾 Journal des Trades</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Trades déduits des changements de position (vectorisé, pas de boucle)
+        trades = backtest_trades(
+            df_btc if strategy_key == 'rules' else prices, strategy_key, initial_capital_a,
+            timestamps=df_btc['timestamp'], **strategy_params
+        )
+        trade_stats = trade_statistics(trades)
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("🔁 Trades", f"{trade_stats['trades']:,}",
+                      help=f"dont {trade_stats['open_trades']} encore ouvert(s)")
+        with col2:
+            st.metric("🎯 Trades Gagnants", f"{trade_stats['win_rate']:.1f}%",
+                      help="Part des trades clôturés en gain (le Win Rate ci-dessus compte les barres)")
+        with col3:
+            st.metric("💵 Profit Factor", f"{trade_stats['profit_factor']:.2f}",
+                      help="Gains / pertes en dollars, sur l'ensemble des trades")
+        with col4:
+            st.metric("📐 Espérance / Trade", f"${trade_stats['expectancy']:,.2f}",
+                      help=f"Moyen gagnant {trade_stats['avg_win']:+.2f}% - moyen perdant {trade_stats['avg_loss']:+.2f}%")
+        with col5:
+            st.metric("📉 Pertes Consécutives", f"{trade_stats['max_consecutive_losses']}",
+                      help=f"Durée moyenne : {trade_stats['avg_bars']:.0f} barres")
+        
+        if len(trades) > 0:
+            # Plus récents en premier ; column_config plutôt que Styler : rendu rapide
+            # même avec des milliers de trades
+            st.dataframe(
+                trades.iloc[::-1].drop(columns=['shares']).assign(duration=lambda t: t['duration'].astype(str)),
+                use_container_width=True,
+                height=400,
+                hide_index=True,
+                column_config={
+                    'entry_time': st.column_config.DatetimeColumn("Entrée", format="DD/MM/YYYY HH:mm"),
+                    'exit_time': st.column_config.DatetimeColumn("Sortie", format="DD/MM/YYYY HH:mm"),
+                    'entry_price': st.column_config.NumberColumn("Prix d'entrée", format="$%.2f"),
+                    'exit_price': st.column_config.NumberColumn("Prix de sortie", format="$%.2f"),
+                    'pnl': st.column_config.NumberColumn("P&L", format="$%.2f"),
+                    'return_pct': st.column_config.NumberColumn("Rendement", format="%.2f%%"),
+                    'bars': st.column_config.NumberColumn("Barres"),
+                    'duration': st.column_config.TextColumn("Durée"),
+                    'open': st.column_config.CheckboxColumn("Ouvert")
+                }
+            )
+        else:
+            st.info("ℹ️ Aucun trade sur la période avec ces paramètres")
 """
 Intégration du module de prédiction dans Streamlit
 À ajouter dans votre fichier principal app.py
@@ -926,17 +1137,15 @@ else:
 with tab2:
     from portfolio_engine import (
         Portfolio,
-        calculate_portfolio_metrics,
-        calculate_asset_metrics,
         calculate_correlation_matrix
     )
+    from metrics_engine import ASSET_METRICS, PORTFOLIO_METRICS, compute_metrics
     
     @st.cache_data(ttl=300)
     def load_portfolio_data():
         try:
-            df = pd.read_csv('data/portfolio_prices.csv')
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            return df
+            df = load_wide(portfolio_assets())
+            return df if len(df) > 0 else None
         except Exception as e:
             return None
     
@@ -957,7 +1166,9 @@ with tab2:
         </div>
         """, unsafe_allow_html=True)
         
-        cols = st.columns(len(available_cryptos))
+        # Grand univers : cartes pour les premiers actifs seulement
+        card_cryptos = available_cryptos[:MAX_PRICE_CARDS]
+        cols = st.columns(len(card_cryptos))
         
         crypto_colors = {
             'BTC': '#F7931A',
@@ -967,7 +1178,7 @@ with tab2:
             'ADA': '#0033AD'
         }
         
-        for i, crypto in enumerate(available_cryptos):
+        for i, crypto in enumerate(card_cryptos):
             with cols[i]:
                 current_price = df_portfolio[f"{crypto}_price"].iloc[-1]
                 
@@ -977,7 +1188,7 @@ with tab2:
                 else:
                     change_24h = 0
                 
-                color = crypto_colors.get(crypto, '#6366F1')
+                color = crypto_colors.get(crypto, fallback_color(crypto))
                 
                 st.markdown(f"""
                 <div style="background: linear-gradient(135deg, {color}15 0%, {color}25 100%); 
@@ -1092,15 +1303,15 @@ with tab2:
                 )
                 
                 result_df = portfolio.run_backtest()
-                portfolio_metrics = calculate_portfolio_metrics(result_df, initial_capital_b)
-                
-                assets_metrics = []
-                for crypto in selected_cryptos:
-                    prices = result_df[f"{crypto}_price"]
-                    metrics = calculate_asset_metrics(prices, crypto)
-                    assets_metrics.append(metrics)
+                portfolio_metrics = compute_metrics(
+                    result_df['portfolio_value'], initial_capital_b, PORTFOLIO_METRICS
+                )
                 
-                assets_metrics_df = pd.DataFrame(assets_metrics)
+                # Tous les actifs en un appel (une courbe par colonne, base : premier prix)
+                asset_prices = result_df[[f"{crypto}_price" for crypto in selected_cryptos]].set_axis(
+                    selected_cryptos, axis=1
+                )
+                assets_metrics_df = compute_metrics(asset_prices, None, ASSET_METRICS).rename_axis('asset').reset_index()
                 corr_matrix = calculate_correlation_matrix(result_df, selected_cryptos)
                 
             except Exception as e:
@@ -0,0 +1,79 @@
+"""
+Alignement temporel des séries de prix sur une grille commune
+
+Chaque crypto a ses propres horodatages (à quelques secondes près d'une
+crypto à l'autre). Au lieu d'une fusion outer par crypto suivie d'un
+forward fill, on ramène tous les points sur une grille régulière (5 min par
+défaut) puis on fait une jointure as-of vectorisée (dernier prix connu,
+dans la limite d'une tolérance) pour construire le tableau large en une passe.
+
+Utilisé par la récupération historique et par les lectures larges du store
+(price_store.load_wide) : les ticks sont stockés bruts, alignés à la lecture.
+"""
+import numpy as np
+import pandas as pd
+
+# Pas de la grille commune
+DEFAULT_FREQ = '5min'
+
+# Ancienneté max d'un prix reporté sur la grille (au-delà : valeur manquante)
+DEFAULT_TOLERANCE = pd.Timedelta(hours=2)
+
+
+def align_series(series_by_symbol, freq=DEFAULT_FREQ, tolerance=DEFAULT_TOLERANCE):
+    """
+    Construit le tableau large [timestamp, <SYM>_price, ...] à partir de séries
+    series_by_symbol: dict {symbole: DataFrame avec colonnes timestamp, price}
+    freq: pas de la grille (None = horodatages bruts, sans arrondi)
+    tolerance: ancienneté max d'un prix reporté (None = illimitée)
+    """
+    symbols = list(series_by_symbol.keys())
+    if len(symbols) == 0:
+        return pd.DataFrame(columns=['timestamp'])
+
+    step = pd.Timedelta(freq).value if freq is not None else None
+    tol = pd.Timedelta(tolerance).value if tolerance is not None else None
+
+    # Horodatages (int64 ns) et prix de chaque série, ramenés sur la grille
+    snapped = {}
+    for symbol in symbols:
+        df = series_by_symbol[symbol]
+        df = df[df['price'].notna()]
+
+        ts = pd.to_datetime(df['timestamp']).values.astype('datetime64[ns]').astype(np.int64)
+        prices = df['price'].to_numpy(dtype=np.float64)
+
+        order = np.argsort(ts, kind='stable')
+        ts, prices = ts[order], prices[order]
+
+        if step is not None:
+            ts = ts - ts % step
+
+        # Plusieurs points dans la même case : on garde le dernier
+        if len(ts) > 0:
+            last_in_slot = np.append(ts[1:] != ts[:-1], True)
+            ts, prices = ts[last_in_slot], prices[last_in_slot]
+
+        snapped[symbol] = (ts, prices)
+
+    # Grille = union des cases occupées
+    grid = np.unique(np.concatenate([ts for ts, _ in snapped.values()]))
+
+    # Jointure as-of : dernier prix connu à chaque point de la grille
+    matrix = np.full((len(grid), len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        ts, prices = snapped[symbol]
+        if len(ts) == 0:
+            continue
+
+        idx = np.searchsorted(ts, grid, side='right') - 1
+        valid = idx >= 0
+        if tol is not None:
+            valid &= (grid - ts[np.maximum(idx, 0)]) <= tol
+
+        matrix[valid, j] = prices[idx[valid]]
+
+    aligned = pd.DataFrame(matrix, columns=[f'{symbol}_price' for symbol in symbols])
+    aligned.insert(0, 'timestamp', pd.to_datetime(grid))
+
+    return aligned
@@ -0,0 +1,105 @@
+"""
+Écritures atomiques et verrous consultatifs pour les fichiers de données
+
+    - atomic_write : fichier temporaire dans le même dossier, fsync, rename,
+      puis fsync du dossier. Un lecteur voit l'ancien ou le nouveau fichier,
+      jamais un fichier partiel, même après un crash.
+    - file_lock : verrou exclusif (flock) entre écrivains, réentrant dans un
+      même thread. Les lecteurs ne le prennent jamais : ils ne bloquent pas.
+"""
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows : coordination limitée au processus courant
+    FCNTL_AVAILABLE = False
+
+# Verrous tenus par le thread courant : {chemin: profondeur}
+_held = threading.local()
+
+# Repli sans fcntl : un verrou par chemin, local au processus
+_fallback_locks = {}
+_fallback_guard = threading.Lock()
+
+
+def fsync_dir(path):
+    """Rend durables les créations / renommages dans un dossier"""
+    if os.name != 'posix':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, write):
+    """
+    Remplace path de façon atomique et durable
+    write: fonction f -> None qui écrit le contenu dans le fichier binaire f
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    fsync_dir(path.parent)
+
+
+def atomic_write_text(path, text):
+    """atomic_write pour un contenu texte (UTF-8)"""
+    atomic_write(path, lambda f: f.write(text.encode('utf-8')))
+
+
+@contextmanager
+def file_lock(lock_path):
+    """
+    Verrou consultatif exclusif sur lock_path (créé si besoin)
+    Réentrant : un même thread peut l'imbriquer sans se bloquer lui-même
+    """
+    key = str(lock_path)
+    depth = _held.__dict__.setdefault('depth', {})
+
+    if depth.get(key, 0) > 0:
+        depth[key] += 1
+        try:
+            yield
+        finally:
+            depth[key] -= 1
+        return
+
+    Path(lock_path).parent.mkdir(parents=True, exist_ok=True)
+
+    with open(lock_path, 'a') as f:
+        if FCNTL_AVAILABLE:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            with _fallback_guard:
+                lock = _fallback_locks.setdefault(key, threading.Lock())
+            lock.acquire()
+
+        depth[key] = 1
+        try:
+            yield
+        finally:
+            depth[key] = 0
+            if FCNTL_AVAILABLE:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                lock.release()
@@ -0,0 +1,223 @@
+"""
+Backfill incrémental : ne récupère que les périodes manquantes
+
+Au lieu de retélécharger toute la fenêtre (et d'écraser les ticks collectés
+par les boucles continues), on cherche les trous dans l'historique existant
+et on ne demande que ces plages via /coins/<id>/market_chart/range.
+Après une coupure, un redémarrage coûte quelques petites requêtes.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+
+import http_client
+import price_store
+from price_store import utc_now
+from fetch_data import fetch_historical_bitcoin
+from fetch_portfolio_data import fetch_multiple_cryptos_historical_async
+from http_client import coingecko_get
+from universe import get_symbol, load_universe
+
+# Écart au-delà duquel on considère qu'il manque des données
+# (historique horaire + ticks toutes les 5 minutes)
+DEFAULT_MAX_GAP = timedelta(hours=2)
+
+# Au-delà de 90 jours par requête, l'API passe en données quotidiennes :
+# on découpe les grands trous pour garder une granularité horaire
+MAX_RANGE = timedelta(days=90)
+
+
+def find_gaps(timestamps, start, end, max_gap=DEFAULT_MAX_GAP):
+    """
+    Retourne la liste des trous [(début, fin), ...] de plus de max_gap
+    dans timestamps, en incluant le début et la fin de la fenêtre [start, end]
+    """
+    timestamps = pd.Series(pd.to_datetime(timestamps)).dropna().sort_values()
+    timestamps = timestamps[(timestamps >= start) & (timestamps <= end)]
+
+    if len(timestamps) == 0:
+        return [(start, end)]
+
+    # Bornes de la fenêtre ajoutées aux points existants
+    points = pd.concat([
+        pd.Series([pd.Timestamp(start)]),
+        timestamps,
+        pd.Series([pd.Timestamp(end)])
+    ], ignore_index=True)
+
+    deltas = points.diff()
+    gap_idx = deltas.index[deltas > max_gap]
+
+    return [(points[i - 1], points[i]) for i in gap_idx]
+
+
+def fetch_range(crypto_id, start, end):
+    """
+    Récupère les prix d'une crypto entre start et end (exclus)
+    via /coins/<id>/market_chart/range
+    """
+    params = {
+        'vs_currency': 'usd',
+        'from': int(pd.Timestamp(start).timestamp()),
+        'to': int(pd.Timestamp(end).timestamp())
+    }
+
+    response = coingecko_get(f'/coins/{crypto_id}/market_chart/range', params=params, endpoint='market_chart')
+
+    if response.status_code != 200:
+        print(f"      ❌ {crypto_id} : Erreur {response.status_code}")
+        return None
+
+    data = response.json()
+
+    if 'prices' not in data:
+        print(f"      ❌ {crypto_id} : Pas de données")
+        return None
+
+    df = pd.DataFrame(data['prices'], columns=['timestamp', 'price'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+
+    # Ne garder que l'intérieur du trou (les bornes existent déjà)
+    df = df[(df['timestamp'] > start) & (df['timestamp'] < end)]
+
+    return df
+
+
+def _fetch_gaps(crypto_id, gaps):
+    """Récupère tous les trous d'une crypto et les concatène"""
+    frames = []
+
+    for gap_start, gap_end in gaps:
+        print(f"   → {crypto_id} : {gap_start:%d/%m %H:%M} → {gap_end:%d/%m %H:%M}")
+
+        chunk_start = gap_start
+        while chunk_start < gap_end:
+            chunk_end = min(chunk_start + MAX_RANGE, gap_end)
+
+            df = fetch_range(crypto_id, chunk_start, chunk_end)
+            if df is not None and len(df) > 0:
+                frames.append(df)
+
+            chunk_start = chunk_end
+
+    if len(frames) == 0:
+        return None
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def backfill_bitcoin(days=30, max_gap=DEFAULT_MAX_GAP):
+    """
+    Complète l'historique BTC du store sur les X derniers jours
+    Retourne le DataFrame à jour sur la fenêtre (ou None en cas d'échec)
+    """
+    if 'BTC' not in price_store.list_assets():
+        print("ℹ️ Pas d'historique Bitcoin : récupération complète")
+        return fetch_historical_bitcoin(days=days)
+
+    end = utc_now()
+    start = end - timedelta(days=days)
+
+    # Seules les partitions de la fenêtre sont lues
+    df = price_store.load('BTC', start, end)
+    gaps = find_gaps(df['timestamp'], start, end, max_gap)
+
+    if len(gaps) == 0:
+        print("✅ Historique Bitcoin complet, rien à récupérer")
+        return df
+
+    print(f"📥 Backfill Bitcoin : {len(gaps)} période(s) manquante(s)")
+
+    new_rows = _fetch_gaps('bitcoin', gaps)
+    if new_rows is None:
+        print("⚠️ Aucune donnée récupérée pour les trous")
+        return df
+
+    new_rows['change_24h'] = 0.0
+
+    # Les points récupérés sont strictement à l'intérieur des trous :
+    # aucun tick existant n'est écrasé
+    price_store.append('BTC', new_rows)
+    df = price_store.load('BTC', start, end)
+
+    print(f"✅ {len(new_rows)} points ajoutés ({len(df)} sur la fenêtre)")
+    return df
+
+
+async def _fetch_all_gaps(gaps_by_id, max_concurrency):
+    """Récupère les trous de chaque crypto en parallèle, au plus max_concurrency à la fois"""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # Même schéma que fetch_multiple_cryptos_historical_async : un thread par requête en vol
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+
+        async def fetch_one(crypto_id, gaps):
+            async with semaphore:
+                return await loop.run_in_executor(executor, _fetch_gaps, crypto_id, gaps)
+
+        results = await asyncio.gather(*(fetch_one(crypto_id, gaps) for crypto_id, gaps in gaps_by_id.items()))
+
+    return dict(zip(gaps_by_id, results))
+
+
+def backfill_portfolio(crypto_ids, days=30, max_gap=DEFAULT_MAX_GAP, max_concurrency=8):
+    """
+    Complète l'historique de chaque crypto du portfolio sur les X derniers jours
+    Une crypto absente du store est récupérée sur toute la fenêtre
+    Les requêtes des différentes cryptos partent en parallèle (max_concurrency au plus)
+    Retourne le tableau large aligné sur la fenêtre
+    """
+    symbols = [get_symbol(crypto_id) for crypto_id in crypto_ids]
+
+    stored = set(price_store.list_assets())
+    if not any(symbol in stored for symbol in symbols):
+        print("ℹ️ Pas d'historique portfolio : récupération complète")
+        return fetch_multiple_cryptos_historical_async(crypto_ids, days=days, max_concurrency=max_concurrency)
+
+    end = utc_now()
+    start = end - timedelta(days=days)
+
+    # Trous de chaque crypto (lecture locale), puis récupération concurrente
+    gaps_by_id = {}
+    for crypto_id, symbol in zip(crypto_ids, symbols):
+        existing = price_store.load(symbol, start, end, columns=['price'])
+
+        gaps = find_gaps(existing['timestamp'], start, end, max_gap)
+        if len(gaps) > 0:
+            gaps_by_id[crypto_id] = gaps
+
+    fetched = {}
+    if gaps_by_id:
+        # Une connexion keep-alive par requête concurrente
+        if max_concurrency > http_client.POOL_MAXSIZE:
+            http_client.configure(pool_maxsize=max_concurrency)
+
+        results = asyncio.run(_fetch_all_gaps(gaps_by_id, max_concurrency))
+        for crypto_id, new_rows in results.items():
+            if new_rows is not None:
+                fetched[get_symbol(crypto_id)] = new_rows[['timestamp', 'price']]
+
+    # Strictement à l'intérieur des trous : les ticks existants sont conservés
+    added = price_store.append_many(fetched)
+
+    if added == 0:
+        print("✅ Historique portfolio complet, rien à récupérer")
+    else:
+        print(f"✅ Backfill portfolio : {added} points ajoutés")
+
+    return price_store.load_wide(symbols, start, end)
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("   BACKFILL INCRÉMENTAL")
+    print("="*70)
+
+    print("\n=== BITCOIN ===")
+    backfill_bitcoin(days=30)
+
+    print("\n=== PORTFOLIO ===")
+    backfill_portfolio(load_universe(), days=30)
@@ -0,0 +1,371 @@
+"""
+Runner batch de backtests (expériences hors ligne)
+
+Un fichier d'expérience JSON décrit des combinaisons stratégie × paramètres ×
+actifs × périodes ; chaque combinaison est une tâche exécutée dans un pool de
+processus. Les prix de chaque (actif, période) sont chargés une seule fois
+dans un segment de mémoire partagée : les workers s'y attachent par nom au
+lieu de recevoir une copie picklée à chaque tâche.
+
+Les métriques de calculate_metrics sont écrites au fil de l'eau dans une table
+SQLite (data/backtests.db, table backtest_results) : relancer la même
+expérience ne refait que les tâches manquantes ou en erreur.
+
+Format du fichier d'expérience :
+    {
+        "name": "ma_grid",
+        "assets": ["BTC", "ETH"],
+        "periods": [{"start": "2025-01-01", "end": "2025-06-30"}, {"start": "2025-07-01"}],
+        "resolution": "1h",
+        "initial_capital": 10000,
+        "strategies": [
+            {"strategy": "ma_crossover", "params": {"short_window": [5, 10, 20], "long_window": [50, 100]}},
+            {"strategy": "momentum", "params": {"window": [7, 14, 28]}},
+            {"strategy": "rules", "params": {"rules": "enter when rsi(14) < 30; exit when rsi(14) > 70"}},
+            {"strategy": "buy_and_hold"}
+        ]
+    }
+periods (défaut : tout l'historique), resolution (défaut : ticks bruts) et
+initial_capital sont optionnels. Stratégies : voir strategies.STRATEGIES.
+
+Usage :
+    python scripts/batch_backtest.py experiment.json [--workers 4] [--fresh]
+    python scripts/batch_backtest.py --results ma_grid [--by sharpe_ratio] [--top 20]
+"""
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from multiprocessing import Pool, shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics_engine import STRATEGY_METRICS
+from price_store import load, load_bars
+from strategies import STRATEGIES, backtest_strategy, calculate_metrics
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+RESULTS_DB = Path(os.environ.get('CRYPTOVISION_BACKTEST_DB', DATA_DIR / 'backtests.db'))
+
+# Métriques stockées (clés de calculate_metrics)
+METRIC_COLUMNS = STRATEGY_METRICS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS backtest_results (
+    experiment      TEXT NOT NULL,
+    task            TEXT NOT NULL,  -- clé stable de la combinaison (reprise)
+    asset           TEXT NOT NULL,
+    strategy        TEXT NOT NULL,
+    params          TEXT NOT NULL,  -- JSON
+    start_date      TEXT,
+    end_date        TEXT,
+    resolution      TEXT,
+    initial_capital REAL NOT NULL,
+    points          INTEGER,
+    {', '.join(f'{col} REAL' for col in METRIC_COLUMNS)},
+    duration_s      REAL,
+    error           TEXT,
+    created_at      TEXT NOT NULL,
+    PRIMARY KEY (experiment, task)
+) WITHOUT ROWID;
+"""
+
+# Intervalle minimal entre deux lignes de progression (secondes)
+PROGRESS_INTERVAL = 2.0
+
+# Segments de mémoire partagée déjà attachés dans ce worker : {nom: SharedMemory}
+_attached = {}
+
+
+# ======== EXPÉRIENCE → TÂCHES ========
+
+def load_experiment(path):
+    """Lit et valide un fichier d'expérience JSON"""
+    experiment = json.loads(Path(path).read_text(encoding='utf-8'))
+
+    for field in ['name', 'assets', 'strategies']:
+        if not experiment.get(field):
+            raise ValueError(f"Champ '{field}' manquant dans {path}")
+
+    for spec in experiment['strategies']:
+        if spec.get('strategy') not in STRATEGIES:
+            raise ValueError(
+                f"Stratégie inconnue : {spec.get('strategy')} (disponibles : {', '.join(STRATEGIES)})"
+            )
+
+    return experiment
+
+
+def _param_grid(params):
+    """Toutes les combinaisons d'une grille {nom: valeur ou [valeurs]}"""
+    names = sorted(params)
+    values = [params[name] if isinstance(params[name], list) else [params[name]] for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def expand_tasks(experiment):
+    """
+    Liste des tâches d'une expérience (une par combinaison)
+    Les combinaisons MA Crossover avec une MM courte >= MM longue sont ignorées
+    """
+    periods = experiment.get('periods') or [{}]
+    resolution = experiment.get('resolution')
+    capital = experiment.get('initial_capital', 10000)
+
+    tasks = []
+    for asset, period, spec in itertools.product(experiment['assets'], periods, experiment['strategies']):
+        start, end = period.get('start'), period.get('end')
+
+        for params in _param_grid(spec.get('params', {})):
+            if spec['strategy'] == 'ma_crossover' and \
+                    params.get('short_window', 20) >= params.get('long_window', 50):
+                continue
+
+            params_json = json.dumps(params, sort_keys=True)
+            tasks.append({
+                'task': f"{asset}|{start}|{end}|{resolution}|{spec['strategy']}|{params_json}|{capital}",
+                'asset': asset,
+                'strategy': spec['strategy'],
+                'params': params,
+                'start': start,
+                'end': end,
+                'resolution': resolution,
+                'initial_capital': capital,
+                'dataset': (asset, start, end, resolution)
+            })
+
+    return tasks
+
+
+def load_prices(asset, start=None, end=None, resolution=None):
+    """Prix d'un actif sur une période (clôtures des barres si resolution est donnée)"""
+    if resolution is None:
+        prices = load(asset, start, end, columns=['price'])['price']
+    else:
+        prices = load_bars(asset, resolution, start, end)['close']
+    return prices.to_numpy(dtype=np.float64)
+
+
+# ======== WORKERS ========
+
+def _attach(name, length):
+    """Vue en lecture seule sur les prix d'un segment partagé (attaché une fois par worker)"""
+    shm = _attached.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+
+    prices = np.ndarray((length,), dtype=np.float64, buffer=shm.buf)
+    prices.flags.writeable = False
+    return prices
+
+
+def run_task(task):
+    """Exécute une tâche dans un worker et retourne son résultat (jamais d'exception)"""
+    started = time.perf_counter()
+    result = {'task': task['task'], 'points': None, 'metrics': None, 'error': None}
+
+    try:
+        name, length = task['segment']
+        prices = pd.Series(_attach(name, length), copy=False)
+
+        if length < 2:
+            raise ValueError(f"Pas assez de prix ({length}) pour calculer les métriques")
+
+        portfolio_values = backtest_strategy(
+            prices, STRATEGIES[task['strategy']],
+            initial_capital=task['initial_capital'], **task['params']
+        )
+        result['metrics'] = calculate_metrics(portfolio_values, task['initial_capital'])
+        result['points'] = length
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    result['duration_s'] = time.perf_counter() - started
+    return result
+
+
+# ======== TABLE DE RÉSULTATS ========
+
+def _connect(db_path=RESULTS_DB):
+    """Connexion à la base de résultats (créée au premier appel)"""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def completed_tasks(conn, experiment_name):
+    """Clés des tâches déjà réussies d'une expérience"""
+    rows = conn.execute(
+        "SELECT task FROM backtest_results WHERE experiment = ? AND error IS NULL", (experiment_name,)
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def _store_results(conn, experiment_name, tasks_by_key, results):
+    """Écrit un lot de résultats en une transaction"""
+    created_at = datetime.now().isoformat(timespec='seconds')
+    rows = []
+
+    for result in results:
+        task = tasks_by_key[result['task']]
+        metrics = result['metrics'] or {}
+        values = [
+            float(metrics[col]) if col in metrics and not pd.isna(metrics[col]) else None
+            for col in METRIC_COLUMNS
+        ]
+        rows.append([
+            experiment_name, task['task'], task['asset'], task['strategy'],
+            json.dumps(task['params'], sort_keys=True), task['start'], task['end'],
+            task['resolution'], task['initial_capital'], result['points'],
+            *values, result['duration_s'], result['error'], created_at
+        ])
+
+    columns = [
+        'experiment', 'task', 'asset', 'strategy', 'params', 'start_date', 'end_date',
+        'resolution', 'initial_capital', 'points', *METRIC_COLUMNS, 'duration_s', 'error', 'created_at'
+    ]
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO backtest_results ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            rows
+        )
+
+
+def query_results(experiment_name, by='sharpe_ratio', top=20, db_path=RESULTS_DB):
+    """Meilleures combinaisons d'une expérience selon une métrique (DataFrame)"""
+    if by not in METRIC_COLUMNS:
+        raise ValueError(f"Métrique inconnue : {by} (disponibles : {', '.join(METRIC_COLUMNS)})")
+
+    conn = _connect(db_path)
+    try:
+        return pd.read_sql_query(
+            f"""
+            SELECT asset, strategy, params, start_date, end_date, resolution, {', '.join(METRIC_COLUMNS)}
+            FROM backtest_results
+            WHERE experiment = ? AND error IS NULL
+            ORDER BY {by} DESC
+            LIMIT ?
+            """,
+            conn, params=(experiment_name, top)
+        )
+    finally:
+        conn.close()
+
+
+# ======== EXÉCUTION ========
+
+def run_experiment(experiment, workers=None, db_path=RESULTS_DB, fresh=False):
+    """
+    Exécute les tâches d'une expérience dans un pool de processus
+    Les tâches déjà réussies sont sautées (reprise), sauf si fresh=True
+    Retourne {'total', 'skipped', 'done', 'errors'}
+    """
+    name = experiment['name']
+    workers = workers or os.cpu_count() or 1
+    tasks = expand_tasks(experiment)
+
+    conn = _connect(db_path)
+    if fresh:
+        with conn:
+            conn.execute("DELETE FROM backtest_results WHERE experiment = ?", (name,))
+
+    done_keys = completed_tasks(conn, name)
+    pending = [task for task in tasks if task['task'] not in done_keys]
+    summary = {'total': len(tasks), 'skipped': len(tasks) - len(pending), 'done': 0, 'errors': 0}
+
+    print(f"🧪 Expérience '{name}' : {len(tasks)} tâches, {summary['skipped']} déjà faites, "
+          f"{len(pending)} à exécuter sur {workers} worker(s)")
+
+    if not pending:
+        conn.close()
+        return summary
+
+    segments = {}
+    try:
+        # Une copie des prix par (actif, période, résolution), partagée par toutes ses tâches
+        for dataset in dict.fromkeys(task['dataset'] for task in pending):
+            prices = load_prices(*dataset)
+            shm = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+            np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)[:] = prices
+            segments[dataset] = (shm, len(prices))
+
+        for task in pending:
+            shm, length = segments[task['dataset']]
+            task['segment'] = (shm.name, length)
+
+        tasks_by_key = {task['task']: task for task in pending}
+        chunksize = max(1, len(pending) // (workers * 20))
+        started = last_report = time.perf_counter()
+        batch = []
+
+        with Pool(workers) as pool:
+            for result in pool.imap_unordered(run_task, pending, chunksize=chunksize):
+                batch.append(result)
+                summary['done'] += 1
+                if result['error'] is not None:
+                    summary['errors'] += 1
+
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL or summary['done'] == len(pending):
+                    # Les résultats sont écrits à chaque point de progression : une
+                    # interruption ne perd que le dernier intervalle
+                    _store_results(conn, name, tasks_by_key, batch)
+                    batch = []
+
+                    rate = summary['done'] / max(now - started, 1e-9)
+                    remaining = (len(pending) - summary['done']) / rate
+                    print(f"   ⏳ {summary['done']}/{len(pending)} "
+                          f"({summary['done'] / len(pending) * 100:.0f}%) - {rate:.1f} tâches/s - "
+                          f"reste ~{remaining:.0f}s - {summary['errors']} erreur(s)", flush=True)
+                    last_report = now
+    finally:
+        for shm, _ in segments.values():
+            shm.close()
+            shm.unlink()
+        conn.close()
+
+    return summary
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def option(flag, default=None):
+        if flag in args:
+            i = args.index(flag)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    if '--results' in args:
+        experiment_name = option('--results')
+        results = query_results(
+            experiment_name, by=option('--by', 'sharpe_ratio'), top=int(option('--top', 20))
+        )
+        print(f"🏆 Meilleurs résultats de '{experiment_name}' ({len(results)})")
+        print(results.to_string(index=False) if len(results) > 0 else "   Aucun résultat")
+        sys.exit(0)
+
+    workers = option('--workers')
+    fresh = '--fresh' in args
+    args = [arg for arg in args if arg != '--fresh']
+
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    summary = run_experiment(
+        load_experiment(args[0]), workers=int(workers) if workers else None, fresh=fresh
+    )
+    print(f"✅ {summary['done']} tâche(s) exécutée(s), {summary['errors']} erreur(s), "
+          f"{summary['skipped']} reprise(s) depuis {RESULTS_DB}")
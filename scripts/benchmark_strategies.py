@@ -0,0 +1,172 @@
+"""
+Benchmark des stratégies : boucle Python d'origine vs moteur vectorisé
+
+Les boucles d'origine (prices.iloc[i] barre par barre) sont conservées ici
+comme référence : le benchmark vérifie que les positions sont identiques et
+que les valeurs du portfolio coïncident aux arrondis flottants près.
+
+Usage :
+    python scripts/benchmark_strategies.py                  # 1e5, 1e6, 1e7 points
+    python scripts/benchmark_strategies.py 100000 1000000
+    python scripts/benchmark_strategies.py --loop-max 10000000
+
+Au-delà de --loop-max points (1e6 par défaut), la boucle n'est pas exécutée :
+son temps est extrapolé linéairement depuis la plus grande taille mesurée (~).
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from strategies import moving_average_crossover_strategy, simple_momentum_strategy
+
+DEFAULT_SIZES = [100_000, 1_000_000, 10_000_000]
+DEFAULT_LOOP_MAX = 1_000_000
+
+
+def reference_ma_crossover(prices, short_window=20, long_window=50, initial_capital=10000):
+    """Boucle d'origine de moving_average_crossover_strategy"""
+    short_ma = prices.rolling(window=short_window).mean()
+    long_ma = prices.rolling(window=long_window).mean()
+
+    cash = initial_capital
+    shares = 0
+    position = 0
+    portfolio_values = []
+
+    for i in range(len(prices)):
+        current_price = prices.iloc[i]
+        current_short_ma = short_ma.iloc[i]
+        current_long_ma = long_ma.iloc[i]
+
+        if pd.isna(current_short_ma) or pd.isna(current_long_ma):
+            portfolio_values.append(initial_capital)
+            continue
+
+        if current_short_ma > current_long_ma and position == 0:
+            shares = cash / current_price
+            cash = 0
+            position = 1
+        elif current_short_ma < current_long_ma and position == 1:
+            cash = shares * current_price
+            shares = 0
+            position = 0
+
+        portfolio_values.append(cash + (shares * current_price))
+
+    return pd.Series(portfolio_values, index=prices.index)
+
+
+def reference_momentum(prices, window=14, initial_capital=10000):
+    """Boucle d'origine de simple_momentum_strategy"""
+    ma = prices.rolling(window=window).mean()
+
+    cash = initial_capital
+    shares = 0
+    position = 0
+    portfolio_values = []
+
+    for i in range(len(prices)):
+        current_price = prices.iloc[i]
+        current_ma = ma.iloc[i]
+
+        if pd.isna(current_ma):
+            portfolio_values.append(initial_capital)
+            continue
+
+        if current_price > current_ma and position == 0:
+            shares = cash / current_price
+            cash = 0
+            position = 1
+        elif current_price < current_ma and position == 1:
+            cash = shares * current_price
+            shares = 0
+            position = 0
+
+        portfolio_values.append(cash + (shares * current_price))
+
+    return pd.Series(portfolio_values, index=prices.index)
+
+
+CASES = [
+    ('MA Crossover 20/50', reference_ma_crossover, moving_average_crossover_strategy),
+    ('Momentum 14', reference_momentum, simple_momentum_strategy)
+]
+
+
+def synthetic_prices(n, seed=42):
+    """Marche aléatoire géométrique à la minute (quelques NaN pour les cas limites)"""
+    rng = np.random.default_rng(seed)
+    prices = 40000 * np.exp(np.cumsum(rng.normal(0, 0.005, n)))
+    prices[rng.integers(0, n, max(1, n // 100000))] = np.nan
+    index = pd.date_range('2020-01-01', periods=n, freq='min')
+    return pd.Series(prices, index=index)
+
+
+def _timed(func, prices):
+    start = time.perf_counter()
+    result = func(prices)
+    return result, time.perf_counter() - start
+
+
+def same_result(expected, got):
+    """Même courbe (positions identiques, valeurs aux arrondis flottants près)"""
+    expected = expected.astype(np.float64)
+    return expected.index.equals(got.index) and np.allclose(
+        expected.to_numpy(), got.to_numpy(), rtol=1e-9, atol=0, equal_nan=True
+    )
+
+
+def run_benchmark(sizes=None, loop_max=DEFAULT_LOOP_MAX):
+    """
+    Mesure les deux implémentations pour chaque taille
+    Retourne une liste de dicts (stratégie, points, boucle_s, vectorisé_s, extrapolé, identique)
+    """
+    rows = []
+
+    for name, reference, vectorized in CASES:
+        loop_rate = None  # secondes par point, mesuré sur la plus grande taille exécutée
+
+        for n in sizes or DEFAULT_SIZES:
+            prices = synthetic_prices(n)
+            got, vec_time = _timed(vectorized, prices)
+
+            if n <= loop_max:
+                expected, loop_time = _timed(reference, prices)
+                loop_rate = loop_time / n
+                identical = same_result(expected, got)
+                extrapolated = False
+            else:
+                loop_time = loop_rate * n if loop_rate is not None else np.nan
+                identical = None
+                extrapolated = True
+
+            rows.append({
+                'strategy': name, 'points': n, 'loop_s': loop_time, 'vectorized_s': vec_time,
+                'extrapolated': extrapolated, 'identical': identical
+            })
+
+    return rows
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    loop_max = DEFAULT_LOOP_MAX
+    if '--loop-max' in args:
+        i = args.index('--loop-max')
+        loop_max = int(float(args[i + 1]))
+        del args[i:i + 2]
+    sizes = [int(float(arg)) for arg in args] or DEFAULT_SIZES
+
+    print("⏱️ Benchmark des stratégies (boucle d'origine vs vectorisé)")
+    print(f"{'Stratégie':<20} {'Points':>12} {'Boucle':>12} {'Vectorisé':>11} {'Gain':>9}  Identique")
+
+    for row in run_benchmark(sizes, loop_max):
+        mark = '~' if row['extrapolated'] else ' '
+        identical = 'n/a' if row['identical'] is None else ('✅' if row['identical'] else '❌')
+        speedup = row['loop_s'] / row['vectorized_s'] if row['vectorized_s'] > 0 else np.inf
+        print(
+            f"{row['strategy']:<20} {row['points']:>12,} {mark}{row['loop_s']:>10.2f}s "
+            f"{row['vectorized_s']:>10.3f}s {mark}{speedup:>7.0f}x  {identical}"
+        )
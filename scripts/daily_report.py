@@ -1,9 +1,9 @@
-import pathlib
-import pandas as pd
 from datetime import datetime, timedelta
-import numpy as np
 from pathlib import Path
 
+from metrics_engine import compute_metrics
+from price_store import load, load_bars, utc_now
+
 def generate_daily_report():
     """
     Génère un rapport quotidien sur Bitcoin et garde tous les historiques
@@ -11,34 +11,33 @@ def generate_daily_report():
     print("📄 Génération du rapport quotidien...")
     
     try:
-        BASE_DIR = pathlib.Path(__file__).resolve().parents[1]
-        DATA_PATH = BASE_DIR / "data" / "bitcoin_prices.csv"
+        BASE_DIR = Path(__file__).resolve().parents[1]
 
-        df = pd.read_csv(DATA_PATH)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        # Filtrer les données des dernières 24 heures
+        # Barres 5 minutes des dernières 24 heures (pré-agrégées à l'ingestion)
         now = datetime.now()
-        yesterday = now - timedelta(hours=24)
+        yesterday = utc_now() - timedelta(hours=24)
         
-        df_today = df[df['timestamp'] >= yesterday].copy()
+        bars = load_bars('BTC', '5m', start=yesterday)
         
-        if len(df_today) == 0:
+        # Volatilité, médiane et drawdown sur les ticks bruts (les barres ne les conservent pas)
+        prices = load('BTC', start=yesterday, columns=['price'])['price'].dropna()
+        
+        if len(bars) == 0:
             print("⚠️ Pas de données pour les dernières 24h")
             return
         
         # Calculer les statistiques
-        open_price = df_today['price'].iloc[0]
-        close_price = df_today['price'].iloc[-1]
-        high_price = df_today['price'].max()
-        low_price = df_today['price'].min()
-        volatility = df_today['price'].std()
+        open_price = bars['open'].iloc[0]
+        close_price = bars['close'].iloc[-1]
+        high_price = bars['high'].max()
+        low_price = bars['low'].min()
+        volatility = prices.std()
         price_change = ((close_price - open_price) / open_price) * 100
         
-        cumulative = df_today['price'] / df_today['price'].iloc[0]
-        running_max = cumulative.cummax()
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = drawdown.min() * 100
+        n_points = bars['count'].sum()
+        mean_price = (bars['mean'] * bars['count']).sum() / n_points
+        
+        max_drawdown = compute_metrics(prices, metrics=['max_drawdown'])['max_drawdown']
         
         price_range = high_price - low_price
         range_pct = (price_range / open_price) * 100
@@ -68,9 +67,9 @@ def generate_daily_report():
    Max Drawdown 24h   : {max_drawdown:.2f}%
 
 📊 STATISTIQUES
-   Nombre de points   : {len(df_today)}
-   Prix moyen 24h     : ${df_today['price'].mean():,.2f}
-   Prix médian 24h    : ${df_today['price'].median():,.2f}
+   Nombre de points   : {n_points}
+   Prix moyen 24h     : ${mean_price:,.2f}
+   Prix médian 24h    : ${prices.median():,.2f}
 
 {'═'*66}
 
@@ -1,9 +1,8 @@
-import requests
 import pandas as pd
-from datetime import datetime
 import time
-import os
-from pathlib import Path
+
+from http_client import coingecko_get
+from price_store import STORE_DIR, append, utc_now
 
 def fetch_historical_bitcoin(days=30):
     """
@@ -12,8 +11,6 @@ def fetch_historical_bitcoin(days=30):
     """
     print(f"📥 Récupération de {days} jours d'historique Bitcoin...")
     
-    url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
-    
     # IMPORTANT : Ne pas mettre interval pour la version gratuite
     # CoinGecko donne automatiquement :
     # - 1-2 jours : données toutes les 5 minutes
@@ -27,7 +24,7 @@ def fetch_historical_bitcoin(days=30):
     
     try:
         print("   Connexion à CoinGecko API...")
-        response = requests.get(url, params=params, timeout=15)
+        response = coingecko_get('/coins/bitcoin/market_chart', params=params, endpoint='market_chart')
         
         print(f"   Status code: {response.status_code}")
         
@@ -56,16 +53,10 @@ def fetch_historical_bitcoin(days=30):
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         df['change_24h'] = 0.0
         
-        # Créer dossier data (chemin projet)
-        BASE_DIR = Path(__file__).resolve().parents[1]
-        DATA_DIR = BASE_DIR / 'data'
-        BITCOIN_CSV = DATA_DIR / 'bitcoin_prices.csv'
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-        # Sauvegarder
-        df.to_csv(BITCOIN_CSV, index=False)
+        # Sauvegarder dans le store (les ticks déjà collectés sont conservés)
+        append('BTC', df)
         
-        print(f"✅ {len(df)} lignes sauvegardées dans {BITCOIN_CSV}")
+        print(f"✅ {len(df)} lignes sauvegardées dans {STORE_DIR / 'BTC'}")
         print(f"   Du {df['timestamp'].iloc[0]} au {df['timestamp'].iloc[-1]}")
         print(f"   Premier prix : ${df['price'].iloc[0]:,.2f}")
         print(f"   Dernier prix : ${df['price'].iloc[-1]:,.2f}")
@@ -79,12 +70,35 @@ def fetch_historical_bitcoin(days=30):
         return None
 
 
+def record_bitcoin_tick(data, timestamp):
+    """
+    Ajoute le prix Bitcoin d'une réponse /simple/price à l'historique
+    data: JSON de /simple/price (peut contenir d'autres cryptos)
+    """
+    if 'bitcoin' not in data:
+        print(f"❌ 'bitcoin' non trouvé")
+        return None, None
+    
+    price = data['bitcoin']['usd']
+    change = data['bitcoin'].get('usd_24h_change', 0.0)
+    
+    new_row = {
+        'timestamp': timestamp,
+        'price': price,
+        'change_24h': change
+    }
+    
+    # Ajouter à l'historique (seule la partition du jour est réécrite)
+    append('BTC', new_row)
+    print(f"✅ Prix mis à jour: ${price:,.2f} (Change: {change:.2f}%)")
+    
+    return price, change
+
+
 def fetch_current_bitcoin():
     """
     Récupère le prix actuel du Bitcoin
     """
-    url = "https://api.coingecko.com/api/v3/simple/price"
-    
     params = {
         'ids': 'bitcoin',
         'vs_currencies': 'usd',
@@ -92,50 +106,13 @@ def fetch_current_bitcoin():
     }
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = coingecko_get('/simple/price', params=params, endpoint='simple_price')
         
         if response.status_code != 200:
             print(f"❌ Erreur API: Status {response.status_code}")
             return None, None
         
-        data = response.json()
-        
-        if 'bitcoin' not in data:
-            print(f"❌ 'bitcoin' non trouvé")
-            return None, None
-        
-        price = data['bitcoin']['usd']
-        change = data['bitcoin'].get('usd_24h_change', 0.0)
-        
-        timestamp = datetime.now()
-        
-        new_row = pd.DataFrame([{
-            'timestamp': timestamp,
-            'price': price,
-            'change_24h': change
-        }])
-        
-        # Ajouter à l'historique (chemin basé sur le dossier du projet)
-        BASE_DIR = Path(__file__).resolve().parents[1]
-        DATA_DIR = BASE_DIR / 'data'
-        BITCOIN_CSV = DATA_DIR / 'bitcoin_prices.csv'
-
-        if BITCOIN_CSV.exists():
-            df = pd.read_csv(BITCOIN_CSV)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = pd.concat([df, new_row], ignore_index=True)
-            df = df.drop_duplicates(subset=['timestamp'], keep='last')
-            df = df.sort_values('timestamp').reset_index(drop=True)
-            df.to_csv(BITCOIN_CSV, index=False)
-
-            print(f"✅ Prix mis à jour: ${price:,.2f} (Change: {change:.2f}%)")
-        else:
-            # Si le fichier historique est absent, créer le dossier et écrire la dernière valeur
-            DATA_DIR.mkdir(parents=True, exist_ok=True)
-            new_row.to_csv(BITCOIN_CSV, index=False)
-            print(f"ℹ️ Fichier historique introuvable — créé {BITCOIN_CSV} avec la dernière valeur.")
-        
-        return price, change
+        return record_bitcoin_tick(response.json(), utc_now())
         
     except Exception as e:
         print(f"❌ Erreur: {e}")
@@ -1,21 +1,91 @@
-import requests
+import asyncio
 import pandas as pd
-from datetime import datetime
 import time
-import os
-from pathlib import Path
-
-# Liste des cryptos supportées
-AVAILABLE_CRYPTOS = {
-    'bitcoin': 'BTC',
-    'ethereum': 'ETH',
-    'solana': 'SOL',
-    'cardano': 'ADA',
-    'binancecoin': 'BNB',
-    'ripple': 'XRP',
-    'polkadot': 'DOT',
-    'avalanche-2': 'AVAX'
-}
+from concurrent.futures import ThreadPoolExecutor
+import sys
+
+import http_client
+from alignment import align_series
+from http_client import coingecko_get
+from price_store import STORE_DIR, append_many, utc_now
+
+# Symboles et univers : voir universe.py (AVAILABLE_CRYPTOS réexporté pour compatibilité)
+from universe import AVAILABLE_CRYPTOS, chunked, get_symbol, load_universe
+
+# Nombre de cryptos détaillées dans les logs d'un tick
+MAX_LOGGED_CRYPTOS = 10
+
+def _fetch_market_chart(crypto_id, days):
+    """
+    Récupère market_chart pour une crypto
+    Retourne un DataFrame [timestamp, price, crypto] ou None
+    """
+    params = {
+        'vs_currency': 'usd',
+        'days': days
+    }
+    
+    try:
+        response = coingecko_get(f'/coins/{crypto_id}/market_chart', params=params, endpoint='market_chart')
+        
+        if response.status_code != 200:
+            print(f"      ❌ {crypto_id} : Erreur {response.status_code}")
+            return None
+        
+        data = response.json()
+        
+        if 'prices' not in data:
+            print(f"      ❌ {crypto_id} : Pas de données")
+            return None
+        
+        prices = data['prices']
+        df = pd.DataFrame(prices, columns=['timestamp', 'price'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df['crypto'] = get_symbol(crypto_id)
+        
+        print(f"      ✅ {crypto_id} : {len(df)} points récupérés")
+        
+        return df
+        
+    except Exception as e:
+        print(f"      ❌ {crypto_id} : Erreur: {e}")
+        return None
+
+
+def _merge_and_save(all_data):
+    """
+    Sauvegarde chaque historique dans le store et retourne le tableau large
+    aligné sur le timestamp
+    all_data: dict {crypto_id: DataFrame}, dans l'ordre des crypto_ids
+    """
+    if len(all_data) == 0:
+        print("\n❌ Aucune donnée récupérée")
+        return None
+    
+    # Aligner toutes les séries sur une grille commune (une seule passe)
+    print(f"\n🔄 Alignement des données...")
+    
+    merged_df = align_series({
+        get_symbol(crypto_id): df[['timestamp', 'price']]
+        for crypto_id, df in all_data.items()
+    })
+    
+    # Même convention qu'avant : on ne garde que les lignes complètes
+    merged_df = merged_df.dropna().reset_index(drop=True)
+    
+    # Sauvegarder les séries brutes, une par actif (l'alignement se fait à la lecture)
+    append_many({
+        get_symbol(crypto_id): df[['timestamp', 'price']]
+        for crypto_id, df in all_data.items()
+    })
+
+    print(f"\n✅ Données fusionnées : {len(merged_df)} points")
+    print(f"   Cryptos: {', '.join([get_symbol(c) for c in all_data.keys()])}")
+    print(f"   Du {merged_df['timestamp'].iloc[0]} au {merged_df['timestamp'].iloc[-1]}")
+    print(f"   Store: {STORE_DIR}")
+    
+    return merged_df
+
 
 def fetch_multiple_cryptos_historical(crypto_ids, days=30):
     """
@@ -29,138 +99,122 @@ def fetch_multiple_cryptos_historical(crypto_ids, days=30):
     for crypto_id in crypto_ids:
         print(f"\n   → {crypto_id.upper()}...")
         
-        url = "https://api.coingecko.com/api/v3/coins/{}/market_chart".format(crypto_id)
-        
-        params = {
-            'vs_currency': 'usd',
-            'days': days
-        }
+        # Le débit est régulé par le token bucket partagé (rate_limiter.py)
+        df = _fetch_market_chart(crypto_id, days)
         
-        try:
-            response = requests.get(url, params=params, timeout=15)
-            
-            if response.status_code != 200:
-                print(f"      ❌ Erreur {response.status_code}")
-                continue
-            
-            data = response.json()
-            
-            if 'prices' not in data:
-                print(f"      ❌ Pas de données")
-                continue
-            
-            prices = data['prices']
-            df = pd.DataFrame(prices, columns=['timestamp', 'price'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df['crypto'] = AVAILABLE_CRYPTOS[crypto_id]
-            
+        if df is not None:
             all_data[crypto_id] = df
-            
-            print(f"      ✅ {len(df)} points récupérés")
-            
-            # Pause pour éviter rate limit
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"      ❌ Erreur: {e}")
-            continue
-    
-    if len(all_data) == 0:
-        print("\n❌ Aucune donnée récupérée")
-        return None
     
-    # Fusionner toutes les données sur le timestamp
-    print(f"\n🔄 Fusion des données...")
+    return _merge_and_save(all_data)
+
+
+async def _fetch_all_market_charts(crypto_ids, days, max_concurrency):
+    """Lance les requêtes market_chart en parallèle, au plus max_concurrency à la fois"""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
     
-    # Prendre le premier crypto comme base
-    first_crypto = list(all_data.keys())[0]
-    merged_df = all_data[first_crypto][['timestamp']].copy()
+    # La session requests est bloquante : un thread par requête en vol
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        
+        async def fetch_one(crypto_id):
+            async with semaphore:
+                return await loop.run_in_executor(executor, _fetch_market_chart, crypto_id, days)
+        
+        results = await asyncio.gather(*(fetch_one(crypto_id) for crypto_id in crypto_ids))
     
-    # Ajouter les prix de chaque crypto
-    for crypto_id, df in all_data.items():
-        symbol = AVAILABLE_CRYPTOS[crypto_id]
-        merged_df = merged_df.merge(
-            df[['timestamp', 'price']].rename(columns={'price': f'{symbol}_price'}),
-            on='timestamp',
-            how='outer'
-        )
+    # Garder l'ordre des crypto_ids (la première sert de base à la fusion)
+    return {
+        crypto_id: df
+        for crypto_id, df in zip(crypto_ids, results)
+        if df is not None
+    }
+
+
+def fetch_multiple_cryptos_historical_async(crypto_ids, days=30, max_concurrency=8):
+    """
+    Version concurrente de fetch_multiple_cryptos_historical
+    Les requêtes market_chart partent en parallèle (max_concurrency au plus),
+    le DataFrame fusionné retourné est le même que la version séquentielle
+    """
+    print(f"📥 Récupération concurrente de {days} jours pour {len(crypto_ids)} cryptos "
+          f"({max_concurrency} requêtes max en parallèle)...")
     
-    # Trier par timestamp
-    merged_df = merged_df.sort_values('timestamp').reset_index(drop=True)
+    # Une connexion keep-alive par requête concurrente
+    if max_concurrency > http_client.POOL_MAXSIZE:
+        http_client.configure(pool_maxsize=max_concurrency)
     
-    # Remplir les valeurs manquantes (forward fill)
-    merged_df = merged_df.fillna(method='ffill')
-    merged_df = merged_df.dropna()
+    all_data = asyncio.run(_fetch_all_market_charts(crypto_ids, days, max_concurrency))
     
-    # Créer dossier data (proj root)
-    data_dir = Path(__file__).resolve().parent.parent / 'data'
-    data_dir.mkdir(parents=True, exist_ok=True)
+    return _merge_and_save(all_data)
 
-    # Sauvegarder
-    target_file = data_dir / 'portfolio_prices.csv'
-    merged_df.to_csv(target_file, index=False)
 
-    print(f"\n✅ Données fusionnées : {len(merged_df)} points")
-    print(f"   Cryptos: {', '.join([AVAILABLE_CRYPTOS[c] for c in all_data.keys()])}")
-    print(f"   Du {merged_df['timestamp'].iloc[0]} au {merged_df['timestamp'].iloc[-1]}")
-    print(f"   Fichier: {target_file}")
+def fetch_simple_prices(crypto_ids):
+    """
+    Prix de toutes les cryptos demandées via /simple/price
+    Une requête par paquet de SIMPLE_PRICE_CHUNK ids (une seule en général)
+    Retourne le JSON fusionné (dict) ou None
+    """
+    data = {}
+
+    for chunk in chunked(crypto_ids):
+        params = {
+            'ids': ','.join(chunk),
+            'vs_currencies': 'usd',
+            'include_24hr_change': 'true'
+        }
+
+        response = coingecko_get('/simple/price', params=params, endpoint='simple_price')
+
+        if response.status_code != 200:
+            print(f"❌ Erreur {response.status_code}")
+            return None
+
+        data.update(response.json())
+
+    return data
+
+
+def record_portfolio_tick(data, crypto_ids, timestamp):
+    """
+    Ajoute les prix d'une réponse /simple/price à l'historique portfolio
+    data: JSON de /simple/price (peut contenir d'autres cryptos)
+    """
+    new_data = {'timestamp': timestamp}
+    rows = {}
     
-    return merged_df
+    for crypto_id in crypto_ids:
+        if crypto_id in data:
+            symbol = get_symbol(crypto_id)
+            new_data[f'{symbol}_price'] = data[crypto_id]['usd']
+            rows[symbol] = {
+                'timestamp': timestamp,
+                'price': data[crypto_id]['usd'],
+                'change_24h': data[crypto_id].get('usd_24h_change', 0.0)
+            }
+    
+    # Ajouter à l'historique, en un seul lot pour toutes les cryptos
+    append_many(rows)
+    
+    print(f"✅ Prix mis à jour pour {len(new_data) - 1}/{len(crypto_ids)} cryptos")
+    for crypto_id in crypto_ids[:MAX_LOGGED_CRYPTOS]:
+        symbol = get_symbol(crypto_id)
+        if f'{symbol}_price' in new_data:
+            print(f"   {symbol}: ${new_data[f'{symbol}_price']:,.2f}")
+    
+    return new_data
 
 
 def fetch_current_prices(crypto_ids):
     """
     Récupère les prix actuels de plusieurs cryptos
     """
-    url = "https://api.coingecko.com/api/v3/simple/price"
-    
-    params = {
-        'ids': ','.join(crypto_ids),
-        'vs_currencies': 'usd',
-        'include_24hr_change': 'true'
-    }
-    
     try:
-        response = requests.get(url, params=params, timeout=10)
+        data = fetch_simple_prices(crypto_ids)
         
-        if response.status_code != 200:
-            print(f"❌ Erreur {response.status_code}")
+        if data is None:
             return None
         
-        data = response.json()
-        
-        # Créer une nouvelle ligne pour chaque crypto
-        timestamp = datetime.now()
-        
-        new_data = {'timestamp': timestamp}
-        
-        for crypto_id in crypto_ids:
-            if crypto_id in data:
-                symbol = AVAILABLE_CRYPTOS[crypto_id]
-                new_data[f'{symbol}_price'] = data[crypto_id]['usd']
-        
-        # Ajouter à l'historique
-        data_dir = Path(__file__).resolve().parent.parent / 'data'
-        target_file = data_dir / 'portfolio_prices.csv'
-        if target_file.exists():
-            df = pd.read_csv(target_file)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            new_row = pd.DataFrame([new_data])
-            df = pd.concat([df, new_row], ignore_index=True)
-            df = df.drop_duplicates(subset=['timestamp'], keep='last')
-            df = df.sort_values('timestamp').reset_index(drop=True)
-            
-            data_dir.mkdir(parents=True, exist_ok=True)
-            df.to_csv(target_file, index=False)
-            
-            print(f"✅ Prix mis à jour pour {len(crypto_ids)} cryptos")
-            for crypto_id in crypto_ids:
-                symbol = AVAILABLE_CRYPTOS[crypto_id]
-                if f'{symbol}_price' in new_data:
-                    print(f"   {symbol}: ${new_data[f'{symbol}_price']:,.2f}")
-        
-        return new_data
+        return record_portfolio_tick(data, crypto_ids, utc_now())
         
     except Exception as e:
         print(f"❌ Erreur: {e}")
@@ -172,13 +226,16 @@ if __name__ == "__main__":
     print("   PORTFOLIO DATA FETCHER")
     print("="*70)
     
-    # Choisir les cryptos (modifiable)
-    selected_cryptos = ['bitcoin', 'ethereum', 'solana']
+    # Choisir les cryptos : data/universe.json (voir universe.py)
+    selected_cryptos = load_universe()
     
-    print(f"\n📋 Cryptos sélectionnées: {', '.join([AVAILABLE_CRYPTOS[c] for c in selected_cryptos])}")
+    print(f"\n📋 Cryptos sélectionnées: {', '.join([get_symbol(c) for c in selected_cryptos])}")
     
     print("\n=== RÉCUPÉRATION HISTORIQUE ===")
-    df = fetch_multiple_cryptos_historical(selected_cryptos, days=30)
+    if '--async' in sys.argv:
+        df = fetch_multiple_cryptos_historical_async(selected_cryptos, days=30)
+    else:
+        df = fetch_multiple_cryptos_historical(selected_cryptos, days=30)
     
     if df is not None:
         print("\n✅ Succès !")
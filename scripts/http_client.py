@@ -0,0 +1,175 @@
+"""
+Client HTTP partagé pour l'API CoinGecko
+
+Une seule requests.Session par processus : les connexions TCP+TLS sont
+gardées ouvertes (keep-alive) et réutilisées d'un appel à l'autre, au lieu
+d'un nouveau handshake à chaque requests.get.
+
+Configuration par variables d'environnement :
+    COINGECKO_API_URL           URL de base (ex: serveur mock local)
+    COINGECKO_POOL_CONNECTIONS  Nombre de pools d'hôtes gardés en cache
+    COINGECKO_POOL_MAXSIZE      Connexions gardées ouvertes par hôte
+    COINGECKO_MAX_RETRIES       Tentatives sur 429 / 5xx / erreur réseau
+
+Chaque appel passe par le token bucket partagé (rate_limiter.py). Sur un 429
+ou une erreur serveur, on réessaie avec un backoff exponentiel avec jitter,
+en respectant l'en-tête Retry-After s'il est présent.
+"""
+import email.utils
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import get_rate_limiter
+
+COINGECKO_API_URL = os.environ.get('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3')
+
+POOL_CONNECTIONS = int(os.environ.get('COINGECKO_POOL_CONNECTIONS', 4))
+POOL_MAXSIZE = int(os.environ.get('COINGECKO_POOL_MAXSIZE', 16))
+
+MAX_RETRIES = int(os.environ.get('COINGECKO_MAX_RETRIES', 5))
+BACKOFF_BASE = 1.0   # secondes
+BACKOFF_MAX = 60.0   # secondes
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Timeouts (connexion, lecture) en secondes, par endpoint
+TIMEOUTS = {
+    'market_chart': (5, 15),
+    'simple_price': (5, 10),
+    'default': (5, 15)
+}
+
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'User-Agent': 'CryptoVision-Pro/1.0'
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    """Crée une session avec un pool de connexions keep-alive"""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=False
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+
+def get_session():
+    """Retourne la session partagée (créée au premier appel)"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+
+    return _session
+
+
+def configure(base_url=None, pool_connections=None, pool_maxsize=None, timeouts=None):
+    """
+    Modifie la configuration du client (la session est recréée)
+    timeouts: dict comme {'market_chart': (5, 30)}
+    """
+    global COINGECKO_API_URL, POOL_CONNECTIONS, POOL_MAXSIZE
+
+    if base_url is not None:
+        COINGECKO_API_URL = base_url.rstrip('/')
+    if pool_connections is not None:
+        POOL_CONNECTIONS = pool_connections
+    if pool_maxsize is not None:
+        POOL_MAXSIZE = pool_maxsize
+    if timeouts is not None:
+        TIMEOUTS.update(timeouts)
+
+    close_session()
+
+
+def close_session():
+    """Ferme les connexions ouvertes"""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _retry_after(response):
+    """
+    Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), sinon None
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt):
+    """Backoff exponentiel avec full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def coingecko_get(path, params=None, endpoint='default'):
+    """
+    GET sur l'API CoinGecko via la session partagée
+    path: chemin relatif comme '/simple/price'
+    endpoint: clé de TIMEOUTS à utiliser
+    Retourne l'objet requests.Response (la dernière tentative si tout échoue)
+    """
+    url = f"{COINGECKO_API_URL}{path}"
+    timeout = TIMEOUTS.get(endpoint, TIMEOUTS['default'])
+    limiter = get_rate_limiter()
+
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+
+        try:
+            response = get_session().get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(_backoff_delay(attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+
+        delay = _retry_after(response)
+        if delay is None:
+            delay = _backoff_delay(attempt)
+
+        if response.status_code == 429:
+            # Pause partagée : les autres fetchers arrêtent aussi d'appeler
+            limiter.pause(delay)
+            print(f"⏳ Rate limit CoinGecko (429) - nouvelle tentative dans {delay:.1f}s")
+        else:
+            time.sleep(delay)
+
+    return response
@@ -0,0 +1,174 @@
+"""
+Daemon d'ingestion unique pour tous les actifs suivis
+
+Remplace les deux boucles continuous_fetch / continuous_portfolio_fetch :
+à chaque tick, UNE seule requête /simple/price pour l'union des cryptos
+suivies (découpée par paquets si l'univers dépasse la limite d'ids), puis la
+même réponse alimente tous les consommateurs (historique Bitcoin, historique
+portfolio, ...). Bitcoin n'est plus récupéré ni écrit deux fois.
+
+Les ticks sont planifiés sur une horloge monotone (début + k × intervalle) :
+pas de dérive, même si un tick prend du temps.
+
+Usage :
+    python scripts/ingest_daemon.py
+"""
+import time
+from datetime import datetime
+
+from backfill import backfill_bitcoin, backfill_portfolio
+from fetch_data import record_bitcoin_tick
+from fetch_portfolio_data import fetch_simple_prices, record_portfolio_tick
+from live_strategies import LiveStrategies
+from price_store import utc_now
+from universe import chunked, load_universe
+
+TICK_INTERVAL = 300  # 5 minutes
+
+
+class Consumer:
+    """
+    Destination d'un tick de prix
+    record: fonction (data, timestamp) appelée avec la réponse /simple/price
+    backfill: fonction optionnelle lancée une fois au démarrage
+    """
+
+    def __init__(self, name, crypto_ids, record, backfill=None):
+        self.name = name
+        self.crypto_ids = list(crypto_ids)
+        self.record = record
+        self.backfill = backfill
+
+
+def bitcoin_consumer():
+    """Historique Bitcoin (Module A)"""
+    return Consumer(
+        'bitcoin',
+        ['bitcoin'],
+        record_bitcoin_tick,
+        backfill=backfill_bitcoin
+    )
+
+
+def portfolio_consumer(crypto_ids=None, exclude=()):
+    """
+    Historique portfolio multi-actifs (Module B)
+    crypto_ids: par défaut l'univers de data/universe.json
+    exclude: cryptos déjà écrites par un autre consommateur (un seul écrivain par actif)
+    """
+    if crypto_ids is None:
+        crypto_ids = load_universe()
+    crypto_ids = [crypto_id for crypto_id in crypto_ids if crypto_id not in exclude]
+
+    return Consumer(
+        'portfolio',
+        crypto_ids,
+        lambda data, timestamp: record_portfolio_tick(data, crypto_ids, timestamp),
+        backfill=lambda: backfill_portfolio(crypto_ids)
+    )
+
+
+def live_consumer(asset='BTC', crypto_id='bitcoin'):
+    """
+    Stratégies live : P&L des stratégies avancé d'un tick à chaque requête
+    Au démarrage, rejoue les ticks manqués (après le backfill Bitcoin)
+    """
+    live = LiveStrategies.restore(asset)
+
+    def record(data, timestamp):
+        if crypto_id in data:
+            live.record(data[crypto_id]['usd'], timestamp)
+
+    return Consumer(
+        'live',
+        [crypto_id],
+        record,
+        backfill=live.catch_up
+    )
+
+
+def run_tick(consumers, crypto_ids):
+    """
+    Exécute un tick : une requête, puis distribution à chaque consommateur
+    Retourne True si la requête a réussi
+    """
+    data = fetch_simple_prices(crypto_ids)
+    if data is None:
+        return False
+
+    # Même horodatage pour toutes les destinations
+    timestamp = utc_now()
+
+    for consumer in consumers:
+        try:
+            consumer.record(data, timestamp)
+        except Exception as e:
+            print(f"❌ Erreur consommateur {consumer.name}: {e}")
+
+    return True
+
+
+def run_daemon(consumers=None, interval=TICK_INTERVAL, backfill=True):
+    """
+    Boucle d'ingestion principale
+    consumers: liste de Consumer (par défaut Bitcoin + portfolio + stratégies live)
+    """
+    if consumers is None:
+        # Ordre significatif : les stratégies live rattrapent après le backfill Bitcoin.
+        # BTC est écrit par le seul consommateur Bitcoin (pas de doublon de ticks)
+        consumers = [bitcoin_consumer(), portfolio_consumer(exclude=['bitcoin']), live_consumer()]
+
+    # Union des cryptos suivies, dans l'ordre d'apparition
+    crypto_ids = list(dict.fromkeys(
+        crypto_id for consumer in consumers for crypto_id in consumer.crypto_ids
+    ))
+
+    print("🚀 DÉMARRAGE - Daemon d'ingestion")
+    print(f"   Consommateurs : {', '.join(c.name for c in consumers)}")
+    print(f"   Cryptos suivies : {len(crypto_ids)} ({', '.join(crypto_ids[:10])}{', ...' if len(crypto_ids) > 10 else ''})")
+    print(f"   Fréquence : toutes les {interval} secondes ({len(chunked(crypto_ids))} requête(s) par tick)")
+    print("   Ctrl+C pour arrêter\n")
+
+    # Rattraper les périodes manquées pendant l'arrêt
+    if backfill:
+        for consumer in consumers:
+            if consumer.backfill is None:
+                continue
+            try:
+                consumer.backfill()
+            except Exception as e:
+                print(f"⚠️ Backfill {consumer.name} impossible : {e}")
+
+    start = time.monotonic()
+    tick = 0
+
+    while True:
+        try:
+            tick += 1
+            print(f"\n{'='*70}")
+            print(f"🔄 Tick #{tick} - {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+            print(f"{'='*70}")
+
+            if not run_tick(consumers, crypto_ids):
+                print("⚠️ Échec. Nouvelle tentative au prochain tick...")
+
+        except KeyboardInterrupt:
+            print("\n\n⏹️ Arrêt du daemon.")
+            break
+
+        except Exception as e:
+            print(f"❌ Erreur inattendue : {e}")
+
+        # Prochain tick aligné sur start + k × interval (ticks en retard sautés)
+        elapsed = time.monotonic() - start
+        next_tick = (int(elapsed // interval) + 1) * interval
+
+        try:
+            time.sleep(max(0.0, next_tick - (time.monotonic() - start)))
+        except KeyboardInterrupt:
+            print("\n\n⏹️ Arrêt du daemon.")
+            break
+
+
+if __name__ == "__main__":
+    run_daemon()
@@ -0,0 +1,360 @@
+"""
+Stratégies en continu : un tick à la fois, état sauvegardé sur disque
+
+Versions incrémentales des trois stratégies de strategies.py. Chaque stratégie
+garde ses moyennes mobiles (somme courante), sa position et son cash : un
+nouveau tick coûte O(1), quelle que soit la longueur de l'historique, au lieu
+de recalculer toute la courbe.
+
+Les décisions suivent exactement les boucles d'origine des stratégies (mêmes
+conditions d'achat / vente, capital initial affiché tant que les moyennes ne
+sont pas définies). Les moyennes étant des sommes courantes, elles peuvent
+différer de rolling().mean() à l'arrondi près.
+
+Le daemon d'ingestion fait avancer les stratégies à chaque tick (voir
+ingest_daemon.live_consumer) et sauvegarde leur état dans
+data/live/<ACTIF>.json. Au redémarrage, l'état est relu puis complété avec
+les ticks arrivés depuis (backfill compris) ; sans sauvegarde, l'historique
+est rejoué une fois.
+
+Usage :
+    python scripts/live_strategies.py [ACTIF]    # état des stratégies live
+"""
+import json
+import sys
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import atomic_write_text
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+LIVE_DIR = DATA_DIR / 'live'
+
+
+class RunningMean:
+    """
+    Moyenne mobile en O(1) par valeur (somme courante compensée)
+    NaN tant que la fenêtre n'est pas pleine ou si elle contient un NaN,
+    comme prices.rolling(window).mean()
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.compensation = 0.0
+        self.nan_count = 0
+
+    def _add(self, x):
+        # Sommation de Neumaier : pas de dérive sur des millions de ticks
+        total = self.total + x
+        if abs(self.total) >= abs(x):
+            self.compensation += (self.total - total) + x
+        else:
+            self.compensation += (x - total) + self.total
+        self.total = total
+
+    def push(self, x):
+        """Ajoute une valeur et retourne la moyenne courante"""
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            if np.isnan(old):
+                self.nan_count -= 1
+            else:
+                self._add(-old)
+
+        self.values.append(x)
+        if np.isnan(x):
+            self.nan_count += 1
+        else:
+            self._add(x)
+
+        return self.mean
+
+    @property
+    def mean(self):
+        if len(self.values) < self.window or self.nan_count > 0:
+            return np.nan
+        return (self.total + self.compensation) / self.window
+
+    @classmethod
+    def restore(cls, window, values):
+        """Reconstruit la moyenne depuis les dernières valeurs sauvegardées"""
+        running = cls(window)
+        for x in values:
+            running.push(x)
+        return running
+
+
+class OnlineStrategy(ABC):
+    """
+    Base des stratégies en continu (long / flat, tout investi)
+    Les sous-classes définissent _signals(price) -> (achat, vente, indicateurs définis)
+    """
+
+    name = None
+
+    def __init__(self, initial_capital=10000):
+        self.initial_capital = initial_capital
+        self.cash = initial_capital
+        self.shares = 0
+        self.position = 0
+        self.value = initial_capital
+        self.ticks = 0
+        self.last_timestamp = None
+
+    @abstractmethod
+    def _signals(self, price):
+        """Avance les indicateurs d'un prix : (achat, vente, indicateurs définis)"""
+
+    def update(self, price, timestamp=None):
+        """
+        Avance d'un tick et retourne la valeur du portfolio
+        Un tick pas plus récent que le dernier traité est ignoré
+        """
+        if timestamp is not None:
+            timestamp = pd.Timestamp(timestamp)
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return self.value
+            self.last_timestamp = timestamp
+
+        price = float(price) if price is not None else np.nan
+        buy, sell, ready = self._signals(price)
+        self.ticks += 1
+
+        # Pas assez de données pour les indicateurs
+        if not ready:
+            self.value = self.initial_capital
+            return self.value
+
+        if buy and self.position == 0:
+            self.shares = self.cash / price
+            self.cash = 0
+            self.position = 1
+        elif sell and self.position == 1:
+            self.cash = self.shares * price
+            self.shares = 0
+            self.position = 0
+
+        self.value = self.cash + (self.shares * price)
+        return self.value
+
+    def params(self):
+        """Paramètres de la stratégie (sauvegardés avec l'état)"""
+        return {}
+
+    def _indicator_state(self):
+        return {}
+
+    def _restore_indicators(self, state):
+        pass
+
+    def to_dict(self):
+        """État complet, sérialisable en JSON"""
+        return {
+            'strategy': self.name,
+            'params': self.params(),
+            'initial_capital': self.initial_capital,
+            'cash': self.cash,
+            'shares': self.shares,
+            'position': self.position,
+            'value': self.value,
+            'ticks': self.ticks,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp is not None else None,
+            'indicators': self._indicator_state()
+        }
+
+    @staticmethod
+    def from_dict(state):
+        """Recrée une stratégie depuis to_dict()"""
+        if state['strategy'] not in ONLINE_STRATEGIES:
+            raise ValueError(f"Stratégie inconnue : {state['strategy']}")
+
+        strategy = ONLINE_STRATEGIES[state['strategy']](
+            initial_capital=state['initial_capital'], **state['params']
+        )
+        strategy.cash = state['cash']
+        strategy.shares = state['shares']
+        strategy.position = state['position']
+        strategy.value = state['value']
+        strategy.ticks = state['ticks']
+        if state['last_timestamp'] is not None:
+            strategy.last_timestamp = pd.Timestamp(state['last_timestamp'])
+        strategy._restore_indicators(state['indicators'])
+        return strategy
+
+
+class OnlineBuyAndHold(OnlineStrategy):
+    """STRATÉGIE 1 en continu : achète au premier prix connu et garde"""
+
+    name = 'buy_and_hold'
+
+    def _signals(self, price):
+        ready = self.position == 1 or not np.isnan(price)
+        return True, False, ready
+
+
+class OnlineMACrossover(OnlineStrategy):
+    """STRATÉGIE 2 en continu : MA courte / MA longue"""
+
+    name = 'ma_crossover'
+
+    def __init__(self, short_window=20, long_window=50, initial_capital=10000):
+        super().__init__(initial_capital)
+        self.short_ma = RunningMean(short_window)
+        self.long_ma = RunningMean(long_window)
+
+    def _signals(self, price):
+        short_ma = self.short_ma.push(price)
+        long_ma = self.long_ma.push(price)
+        ready = not (np.isnan(short_ma) or np.isnan(long_ma))
+        return short_ma > long_ma, short_ma < long_ma, ready
+
+    def params(self):
+        return {'short_window': self.short_ma.window, 'long_window': self.long_ma.window}
+
+    def _indicator_state(self):
+        # La fenêtre longue contient aussi les valeurs de la courte
+        return {'prices': list(self.long_ma.values)}
+
+    def _restore_indicators(self, state):
+        prices = state['prices']
+        self.short_ma = RunningMean.restore(self.short_ma.window, prices[-self.short_ma.window:])
+        self.long_ma = RunningMean.restore(self.long_ma.window, prices)
+
+
+class OnlineMomentum(OnlineStrategy):
+    """STRATÉGIE 3 en continu : prix / moyenne mobile"""
+
+    name = 'momentum'
+
+    def __init__(self, window=14, initial_capital=10000):
+        super().__init__(initial_capital)
+        self.ma = RunningMean(window)
+
+    def _signals(self, price):
+        ma = self.ma.push(price)
+        return price > ma, price < ma, not np.isnan(ma)
+
+    def params(self):
+        return {'window': self.ma.window}
+
+    def _indicator_state(self):
+        return {'prices': list(self.ma.values)}
+
+    def _restore_indicators(self, state):
+        self.ma = RunningMean.restore(self.ma.window, state['prices'])
+
+
+# Mêmes noms que strategies.STRATEGIES (hors règles déclaratives)
+ONLINE_STRATEGIES = {
+    'buy_and_hold': OnlineBuyAndHold,
+    'ma_crossover': OnlineMACrossover,
+    'momentum': OnlineMomentum
+}
+
+# Stratégies suivies en continu : paramètres par défaut du dashboard
+DEFAULT_LIVE_STRATEGIES = {
+    'Buy and Hold': ('buy_and_hold', {}),
+    'MA Crossover (20/50)': ('ma_crossover', {'short_window': 20, 'long_window': 50}),
+    'Simple Momentum (14)': ('momentum', {'window': 14})
+}
+
+
+class LiveStrategies:
+    """
+    Ensemble de stratégies en continu sur un actif, sauvegardé dans data/live/<ACTIF>.json
+    """
+
+    def __init__(self, asset, strategies=None, initial_capital=10000):
+        self.asset = asset
+        if strategies is None:
+            strategies = {
+                label: ONLINE_STRATEGIES[name](initial_capital=initial_capital, **params)
+                for label, (name, params) in DEFAULT_LIVE_STRATEGIES.items()
+            }
+        self.strategies = strategies
+
+    @property
+    def checkpoint_file(self):
+        return LIVE_DIR / f'{self.asset}.json'
+
+    @property
+    def last_timestamp(self):
+        """Dernier tick traité par toutes les stratégies (None si aucun)"""
+        timestamps = [s.last_timestamp for s in self.strategies.values()]
+        if any(ts is None for ts in timestamps):
+            return None
+        return min(timestamps)
+
+    def update(self, price, timestamp):
+        """Avance toutes les stratégies d'un tick : {label: valeur du portfolio}"""
+        return {label: s.update(price, timestamp) for label, s in self.strategies.items()}
+
+    def save(self):
+        """Sauvegarde atomique de l'état de toutes les stratégies"""
+        state = {
+            'asset': self.asset,
+            'strategies': {label: s.to_dict() for label, s in self.strategies.items()}
+        }
+        atomic_write_text(self.checkpoint_file, json.dumps(state))
+
+    @classmethod
+    def restore(cls, asset, initial_capital=10000):
+        """État sauvegardé d'un actif, ou stratégies neuves s'il n'y en a pas"""
+        live = cls(asset, initial_capital=initial_capital)
+        if live.checkpoint_file.exists():
+            state = json.loads(live.checkpoint_file.read_text(encoding='utf-8'))
+            live.strategies = {
+                label: OnlineStrategy.from_dict(s) for label, s in state['strategies'].items()
+            }
+        return live
+
+    def catch_up(self):
+        """
+        Rejoue les ticks du store postérieurs au dernier tick traité
+        (tout l'historique la première fois), puis sauvegarde
+        Retourne le nombre de ticks rejoués
+        """
+        from price_store import load
+
+        df = load(self.asset, start=self.last_timestamp, columns=['price'])
+        for timestamp, price in zip(df['timestamp'], df['price'].to_numpy()):
+            self.update(price, timestamp)
+
+        self.save()
+        return len(df)
+
+    def record(self, price, timestamp):
+        """Nouveau tick du daemon : mise à jour puis sauvegarde"""
+        values = self.update(price, timestamp)
+        self.save()
+        return values
+
+
+def read_live_state(asset):
+    """État sauvegardé des stratégies live d'un actif ({label: dict}), ou None"""
+    checkpoint_file = LIVE_DIR / f'{asset}.json'
+    if not checkpoint_file.exists():
+        return None
+    return json.loads(checkpoint_file.read_text(encoding='utf-8'))['strategies']
+
+
+if __name__ == "__main__":
+    asset = sys.argv[1] if len(sys.argv) > 1 else 'BTC'
+    state = read_live_state(asset)
+
+    if state is None:
+        print(f"⚠️ Aucune stratégie live pour {asset} (lancer scripts/ingest_daemon.py)")
+        sys.exit(1)
+
+    print(f"⚡ Stratégies live : {asset}")
+    for label, s in state.items():
+        pnl = s['value'] - s['initial_capital']
+        print(f"   {label:<24} ${s['value']:>12,.2f}  P&L {pnl:>+12,.2f}  "
+              f"{'📈 long' if s['position'] == 1 else '💤 flat'}  "
+              f"({s['ticks']} ticks, dernier {s['last_timestamp']})")
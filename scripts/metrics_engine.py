@@ -0,0 +1,163 @@
+"""
+Moteur de métriques commun : stratégies, portfolio et actifs
+
+Une seule implémentation des métriques de performance, en NumPy : les
+rendements sont calculés une fois, puis chaque statistique (moyenne,
+écart-type, rendements négatifs, gains / pertes, drawdown) en est tirée sans
+temporaire pandas. Une courbe (Series) ou plusieurs à la fois (DataFrame
+temps × courbes, ou tableau courbes × temps) ; seules les métriques demandées
+sont calculées.
+
+Mêmes formules que les anciennes fonctions calculate_metrics,
+calculate_portfolio_metrics et calculate_asset_metrics (qui appellent
+désormais ce moteur) :
+    - données horaires : annualisation sur 24 × 365 barres ;
+    - un prix manquant est remplacé par le précédent pour les rendements
+      (comme pct_change()), les NaN de tête sont ignorés.
+
+Usage :
+    from metrics_engine import compute_metrics, STRATEGY_METRICS
+    compute_metrics(portfolio_values, 10000)                      # dict, toutes les métriques
+    compute_metrics(equity_df, 10000, ['sharpe_ratio', 'max_drawdown'])  # DataFrame, une ligne par colonne
+"""
+import numpy as np
+import pandas as pd
+
+# Barres par an (données horaires)
+PERIODS_PER_YEAR = 24 * 365
+
+# Métriques disponibles (volatility et annual_volatility sont la même valeur)
+METRICS = [
+    'final_value', 'total_return', 'annual_return', 'volatility', 'annual_volatility',
+    'max_drawdown', 'sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'win_rate', 'profit_factor'
+]
+
+# Jeux de métriques des appelants, dans l'ordre de leurs anciens dicts
+STRATEGY_METRICS = [
+    'total_return', 'annual_return', 'volatility', 'max_drawdown',
+    'sharpe_ratio', 'win_rate', 'profit_factor', 'final_value'
+]
+PORTFOLIO_METRICS = [
+    'final_value', 'total_return', 'annual_return', 'annual_volatility', 'sharpe_ratio',
+    'sortino_ratio', 'max_drawdown', 'calmar_ratio', 'win_rate'
+]
+ASSET_METRICS = ['total_return', 'annual_return', 'annual_volatility', 'sharpe_ratio', 'max_drawdown']
+
+# Métriques qui demandent les rendements barre à barre / le drawdown
+RETURN_METRICS = {'volatility', 'annual_volatility', 'sharpe_ratio', 'sortino_ratio', 'win_rate', 'profit_factor'}
+DRAWDOWN_METRICS = {'max_drawdown', 'calmar_ratio'}
+
+
+def _ffill(values):
+    """Forward-fill le long des lignes (les NaN de tête restent NaN)"""
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    return values[np.arange(len(values))[:, None], index]
+
+
+def _mean_std(x, mask=None):
+    """
+    Moyenne et écart-type (ddof=1) de chaque ligne, NaN sous 2 valeurs
+    mask: valeurs retenues (None : toutes)
+    """
+    if mask is None:
+        if x.shape[1] < 2:
+            return x.mean(axis=1), np.full(len(x), np.nan)
+        return x.mean(axis=1), x.std(axis=1, ddof=1)
+
+    count = mask.sum(axis=1)
+    mean = np.where(mask, x, 0.0).sum(axis=1) / count
+    centered = np.where(mask, x - mean[:, None], 0.0)
+    std = np.sqrt((centered ** 2).sum(axis=1) / (count - 1))
+    return mean, np.where(count > 1, std, np.nan)
+
+
+def _metrics(values, initial, wanted):
+    """Métriques demandées de chaque ligne de values (courbes × temps) : {nom: tableau}"""
+    n = values.shape[1]
+    final = values[:, -1]
+    results = {}
+
+    has_nan = np.isnan(values).any()
+    filled = _ffill(values) if has_nan else values
+
+    if 'final_value' in wanted:
+        results['final_value'] = final
+    results['total_return'] = (final - initial) / initial * 100
+    results['annual_return'] = ((final / initial) ** (365 / (n / 24)) - 1) * 100
+
+    if wanted & RETURN_METRICS:
+        # Rendements calculés une fois, toutes les statistiques en sont tirées
+        returns = filled[:, 1:] / filled[:, :-1] - 1
+        valid = ~np.isnan(returns) if has_nan else None
+        mean, std = _mean_std(returns, valid)
+
+        volatility = std * np.sqrt(PERIODS_PER_YEAR) * 100
+        results['volatility'] = results['annual_volatility'] = volatility
+        results['sharpe_ratio'] = np.where(std != 0, mean / std * np.sqrt(PERIODS_PER_YEAR), 0.0)
+
+        negative = returns < 0
+        if 'win_rate' in wanted:
+            count = valid.sum(axis=1) if has_nan else np.full(len(returns), returns.shape[1])
+            results['win_rate'] = np.where(count > 0, (returns > 0).sum(axis=1) / count * 100, 0.0)
+
+        if 'profit_factor' in wanted:
+            gains = np.where(returns > 0, returns, 0.0).sum(axis=1)
+            losses = np.abs(np.where(negative, returns, 0.0).sum(axis=1))
+            results['profit_factor'] = np.where(losses != 0, gains / losses, np.inf)
+
+        if 'sortino_ratio' in wanted:
+            # Volatilité des seuls rendements négatifs
+            _, downside_std = _mean_std(returns, negative)
+            downside_std = downside_std * np.sqrt(PERIODS_PER_YEAR)
+            results['sortino_ratio'] = np.where(
+                downside_std != 0, mean * PERIODS_PER_YEAR / downside_std, 0.0
+            )
+
+    if wanted & DRAWDOWN_METRICS:
+        cumulative = filled / filled[:, :1]
+        running_max = np.maximum.accumulate(cumulative, axis=1)
+        max_drawdown = ((cumulative - running_max) / running_max).min(axis=1) * 100
+        results['max_drawdown'] = max_drawdown
+        results['calmar_ratio'] = np.where(
+            max_drawdown != 0, np.abs(results['annual_return'] / max_drawdown), 0.0
+        )
+
+    return results
+
+
+def compute_metrics(values, initial_capital=None, metrics=None):
+    """
+    Métriques de performance d'une ou plusieurs courbes de valeurs
+    values: Series (une courbe), DataFrame (temps × courbes) ou tableau NumPy
+            (temps en dernier axe, une courbe par ligne en 2-D)
+    initial_capital: base des rendements (défaut : première valeur de chaque courbe)
+    metrics: noms dans METRICS (défaut : toutes), dans l'ordre voulu
+    Retourne un dict {métrique: valeur} pour une courbe, un DataFrame (une ligne
+    par colonne) pour un DataFrame, un dict {métrique: tableau} pour un tableau 2-D
+    """
+    metrics = list(metrics) if metrics is not None else list(METRICS)
+    unknown = [name for name in metrics if name not in METRICS]
+    if unknown:
+        raise ValueError(f"Métrique inconnue : {', '.join(unknown)} (disponibles : {', '.join(METRICS)})")
+
+    if isinstance(values, pd.DataFrame):
+        curves = values.to_numpy(dtype=np.float64).T
+    else:
+        curves = np.asarray(values, dtype=np.float64)
+    single = curves.ndim == 1
+    curves = np.atleast_2d(curves)
+
+    if initial_capital is None:
+        initial = curves[:, 0]
+    else:
+        initial = np.full(len(curves), float(initial_capital))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results = _metrics(curves, initial, set(metrics))
+
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame({name: results[name] for name in metrics}, index=values.columns)
+    if single:
+        return {name: results[name][0] for name in metrics}
+    return {name: results[name] for name in metrics}
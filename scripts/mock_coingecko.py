@@ -0,0 +1,162 @@
+"""
+Serveur CoinGecko factice pour tester les fetchers en local
+
+Sert des prix synthétiques déterministes (par crypto) sur :
+    /api/v3/coins/<id>/market_chart
+    /api/v3/coins/<id>/market_chart/range
+    /api/v3/simple/price
+    /api/v3/coins/list
+
+Usage :
+    python scripts/mock_coingecko.py --port 8765 --latency 0.2
+    COINGECKO_API_URL=http://127.0.0.1:8765/api/v3 python scripts/fetch_portfolio_data.py --async
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+def _synthetic_prices(coin_id, start_ms, end_ms, step_ms):
+    """Marche aléatoire reproductible pour une crypto donnée"""
+    timestamps = np.arange(start_ms, end_ms + 1, step_ms, dtype=np.int64)
+    rng = np.random.default_rng(zlib.crc32(coin_id.encode('utf-8')))
+    base = 10 + (zlib.crc32(coin_id.encode('utf-8')) % 50000)
+    returns = rng.normal(0, 0.005, len(timestamps))
+    prices = base * np.exp(np.cumsum(returns))
+    return [[int(t), float(p)] for t, p in zip(timestamps, prices)]
+
+
+def _step_for_range(span_ms):
+    """Même granularité automatique que l'API gratuite"""
+    day_ms = 24 * 3600 * 1000
+    if span_ms <= day_ms:
+        return 5 * 60 * 1000
+    if span_ms <= 90 * day_ms:
+        return 3600 * 1000
+    return day_ms
+
+
+class MockCoinGeckoHandler(BaseHTTPRequestHandler):
+    """Handler HTTP minimal imitant l'API CoinGecko"""
+
+    latency = 0.0
+    throttle_every = 0
+    request_count = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        # Pas de log par requête
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self._count_lock:
+            MockCoinGeckoHandler.request_count += 1
+            count = MockCoinGeckoHandler.request_count
+
+        # Simule le rate limit de l'API : 429 + Retry-After
+        if self.throttle_every and count % self.throttle_every == 0:
+            body = b'{"status": {"error_code": 429}}'
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+
+        # /api/v3/coins/<id>/market_chart
+        if len(parts) == 5 and parts[2] == 'coins' and parts[4] == 'market_chart':
+            days = float(params.get('days', 30))
+            span_ms = int(days * 24 * 3600 * 1000)
+            step_ms = _step_for_range(span_ms)
+            # Aligné sur la granularité : même réponse pour des appels proches
+            end_ms = int(time.time() * 1000) // step_ms * step_ms
+            prices = _synthetic_prices(parts[3], end_ms - span_ms, end_ms, step_ms)
+            self._send_json({'prices': prices})
+            return
+
+        # /api/v3/coins/list
+        if parts[2:] == ['coins', 'list']:
+            self._send_json([
+                {'id': f'mock-coin-{i}', 'symbol': f'mc{i}', 'name': f'Mock Coin {i}'}
+                for i in range(5000)
+            ])
+            return
+
+        # /api/v3/coins/<id>/market_chart/range
+        if len(parts) == 6 and parts[2] == 'coins' and parts[4:] == ['market_chart', 'range']:
+            start_ms = int(float(params['from']) * 1000)
+            end_ms = int(float(params['to']) * 1000)
+            step_ms = _step_for_range(end_ms - start_ms)
+            start_ms = -(-start_ms // step_ms) * step_ms
+            self._send_json({'prices': _synthetic_prices(parts[3], start_ms, end_ms, step_ms)})
+            return
+
+        # /api/v3/simple/price
+        if parts[2:] == ['simple', 'price']:
+            ids = [coin_id for coin_id in params.get('ids', '').split(',') if coin_id]
+            now_ms = int(time.time() * 1000)
+            payload = {}
+            for coin_id in ids:
+                price = _synthetic_prices(coin_id, now_ms, now_ms, 1)[0][1]
+                payload[coin_id] = {'usd': price, 'usd_24h_change': 0.0}
+            self._send_json(payload)
+            return
+
+        self._send_json({'error': 'not found'}, status=404)
+
+
+def start_mock_server(port=0, latency=0.0, throttle_every=0):
+    """
+    Démarre le serveur dans un thread
+    throttle_every: répond 429 à une requête sur N (0 = jamais)
+    Retourne (server, base_url) ; server.shutdown() pour l'arrêter
+    """
+    handler = type('Handler', (MockCoinGeckoHandler,), {'latency': latency, 'throttle_every': throttle_every})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v3"
+    return server, base_url
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serveur CoinGecko factice")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Latence ajoutée par requête (s)")
+    parser.add_argument('--throttle-every', type=int, default=0, help="Répondre 429 une requête sur N")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.port, args.latency, args.throttle_every)
+    print(f"🧪 Mock CoinGecko démarré : {base_url}")
+    print("   Ctrl+C pour arrêter")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("\n⏹️ Arrêt du serveur.")
@@ -0,0 +1,228 @@
+"""
+Monte Carlo / bootstrap : robustesse des stratégies
+
+calculate_metrics donne une seule estimation par backtest. Ici, des milliers
+de trajectoires de prix synthétiques sont générées à partir de l'historique,
+et les stratégies sont jouées sur toutes à la fois (matrice temps ×
+trajectoires, voir strategies.MATRIX_STRATEGIES) :
+    - bootstrap : blocs de rendements log observés tirés au hasard et mis
+      bout à bout (les blocs gardent l'autocorrélation et la volatilité
+      groupée à l'intérieur d'un bloc) ;
+    - gbm : mouvement brownien géométrique calibré sur la moyenne et
+      l'écart-type des rendements log.
+On obtient la distribution du Sharpe, du rendement total et du drawdown max
+de chaque stratégie, à comparer à la valeur observée sur l'historique réel.
+
+Les trajectoires sont traitées par blocs (MC_CHUNK_SIZE points au plus en
+mémoire par stratégie), éventuellement répartis dans un pool de processus.
+Chaque bloc a sa propre graine, dérivée de la graine principale : à graine et
+taille de bloc égales, le résultat ne dépend pas du nombre de workers.
+
+Usage :
+    python scripts/monte_carlo.py [ACTIF] [--resolution 1h] [--paths 1000] [--method bootstrap]
+                                  [--block 24] [--horizon 720] [--workers 4] [--seed 42]
+"""
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from strategies import MATRIX_STRATEGIES, STRATEGIES, calculate_metrics, curve_metrics
+
+MC_METHODS = ['bootstrap', 'gbm']
+
+# Taille max d'un bloc (trajectoires × points) simulé et évalué d'un coup
+MC_CHUNK_SIZE = 2_000_000
+
+# Métriques dont on estime la distribution (clés de curve_metrics)
+MC_METRICS = ['sharpe_ratio', 'total_return', 'max_drawdown']
+
+# Stratégies évaluées par défaut : paramètres par défaut du dashboard
+DEFAULT_MC_STRATEGIES = {
+    'Buy and Hold': ('buy_and_hold', {}),
+    'MA Crossover (20/50)': ('ma_crossover', {'short_window': 20, 'long_window': 50}),
+    'Simple Momentum (14)': ('momentum', {'window': 14})
+}
+
+
+def log_returns(prices):
+    """Rendements log de l'historique (les NaN sont sautés)"""
+    values = np.asarray(prices, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    return np.diff(np.log(values))
+
+
+def simulate_paths(returns, start_price, n_paths, horizon, method='bootstrap', block_size=24, rng=None):
+    """
+    Trajectoires de prix synthétiques : tableau (trajectoires, horizon)
+    returns: rendements log observés, start_price: premier prix de chaque trajectoire
+    """
+    if method not in MC_METHODS:
+        raise ValueError(f"Méthode inconnue : {method} (disponibles : {', '.join(MC_METHODS)})")
+    if rng is None:
+        rng = np.random.default_rng()
+
+    steps = horizon - 1
+
+    if method == 'bootstrap':
+        block_size = min(block_size, len(returns))
+        n_blocks = -(-steps // block_size)
+        starts = rng.integers(0, len(returns) - block_size + 1, size=(n_paths, n_blocks))
+        index = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :steps]
+        increments = returns[index]
+    else:
+        increments = rng.normal(returns.mean(), returns.std(ddof=1), size=(n_paths, steps))
+
+    log_paths = np.zeros((n_paths, horizon))
+    np.cumsum(increments, axis=1, out=log_paths[:, 1:])
+    return start_price * np.exp(log_paths)
+
+
+def _run_chunk(task):
+    """
+    Simule un bloc de trajectoires et y joue toutes les stratégies
+    Retourne {label: {métrique: tableau (trajectoires,)}}
+    """
+    returns, start_price, n_paths, horizon, method, block_size, seed, strategies, initial_capital = task
+
+    paths = simulate_paths(returns, start_price, n_paths, horizon, method, block_size, np.random.default_rng(seed))
+    frame = pd.DataFrame(paths.T)
+
+    results = {}
+    for label, (name, params) in strategies.items():
+        equity = MATRIX_STRATEGIES[name](frame, initial_capital=initial_capital, **params)
+        results[label] = curve_metrics(equity.T, initial_capital)
+    return results
+
+
+def monte_carlo(prices, strategies=None, method='bootstrap', n_paths=1000, horizon=None, block_size=24,
+                initial_capital=10000, chunk_size=MC_CHUNK_SIZE, workers=None, seed=None):
+    """
+    Distribution des métriques de stratégies sur des trajectoires simulées
+    prices: Series de l'historique réel (calibrage et point de départ)
+    strategies: {label: (nom dans MATRIX_STRATEGIES, paramètres)}
+    horizon: points par trajectoire (défaut : longueur de l'historique)
+    workers: nombre de processus (None ou 1 : dans le processus courant)
+    Retourne {
+        'paths': DataFrame une ligne par (stratégie, trajectoire) avec MC_METRICS,
+        'summary': DataFrame par (stratégie, métrique) : moyenne, écart-type,
+                   percentiles 5 / 50 / 95, valeur observée sur les horizon
+                   derniers points réels et son rang (%) dans la distribution
+                   simulée (NaN si l'horizon dépasse l'historique)
+    }
+    """
+    strategies = strategies or DEFAULT_MC_STRATEGIES
+    for name, _ in strategies.values():
+        if name not in MATRIX_STRATEGIES:
+            raise ValueError(f"Stratégie inconnue : {name} (disponibles : {', '.join(MATRIX_STRATEGIES)})")
+
+    returns = log_returns(prices)
+    if len(returns) < 2:
+        raise ValueError("Historique trop court pour calibrer les simulations")
+
+    horizon = horizon or len(prices)
+    if horizon < 2:
+        raise ValueError("horizon doit être >= 2")
+    start_price = float(prices.dropna().iloc[0])
+
+    # Blocs de trajectoires, une graine indépendante par bloc
+    per_chunk = max(1, chunk_size // horizon)
+    sizes = [min(per_chunk, n_paths - start) for start in range(0, n_paths, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [
+        (returns, start_price, size, horizon, method, block_size, chunk_seed, strategies, initial_capital)
+        for size, chunk_seed in zip(sizes, seeds)
+    ]
+
+    if workers is not None and workers > 1 and len(tasks) > 1:
+        with Pool(min(workers, len(tasks))) as pool:
+            chunks = list(pool.imap(_run_chunk, tasks))
+    else:
+        chunks = [_run_chunk(task) for task in tasks]
+
+    frames = []
+    for label in strategies:
+        frames.append(pd.DataFrame({
+            'strategy': label,
+            'path': np.arange(n_paths),
+            **{metric: np.concatenate([chunk[label][metric] for chunk in chunks]) for metric in MC_METRICS}
+        }))
+    paths = pd.concat(frames, ignore_index=True)
+
+    # Valeurs observées sur une fenêtre réelle de même longueur que les trajectoires,
+    # pour les situer dans la distribution
+    observed_prices = prices.iloc[-horizon:] if horizon <= len(prices) else None
+    rows = []
+    for label, (name, params) in strategies.items():
+        if observed_prices is None:
+            observed = {metric: np.nan for metric in MC_METRICS}
+        else:
+            observed = calculate_metrics(
+                STRATEGIES[name](observed_prices, initial_capital=initial_capital, **params), initial_capital
+            )
+        simulated = paths.loc[paths['strategy'] == label]
+
+        for metric in MC_METRICS:
+            values = simulated[metric].to_numpy()
+            p5, p50, p95 = np.percentile(values, [5, 50, 95])
+            rows.append({
+                'strategy': label,
+                'metric': metric,
+                'mean': values.mean(),
+                'std': values.std(ddof=1) if len(values) > 1 else np.nan,
+                'p5': p5,
+                'median': p50,
+                'p95': p95,
+                'observed': observed[metric],
+                'observed_rank': (values < observed[metric]).mean() * 100 if not np.isnan(observed[metric]) else np.nan
+            })
+
+    return {'paths': paths, 'summary': pd.DataFrame(rows).set_index(['strategy', 'metric'])}
+
+
+if __name__ == "__main__":
+    import time
+
+    from price_store import load_bars
+
+    args = sys.argv[1:]
+
+    def option(flag, default=None):
+        if flag in args:
+            i = args.index(flag)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    resolution = option('--resolution', '1h')
+    n_paths = int(option('--paths', 1000))
+    method = option('--method', 'bootstrap')
+    block_size = int(option('--block', 24))
+    horizon = option('--horizon')
+    workers = option('--workers')
+    seed = option('--seed')
+    asset = args[0] if args else 'BTC'
+
+    bars = load_bars(asset, resolution)
+    prices = pd.Series(bars['close'].to_numpy(), index=bars['timestamp'])
+
+    print(f"🎲 Monte Carlo ({method}) : {asset} en {resolution}, {len(prices)} barres, {n_paths} trajectoires")
+
+    start = time.perf_counter()
+    result = monte_carlo(
+        prices, method=method, n_paths=n_paths, block_size=block_size,
+        horizon=int(horizon) if horizon else None,
+        workers=int(workers) if workers else None,
+        seed=int(seed) if seed else None
+    )
+    print(f"⏱️ {time.perf_counter() - start:.2f}s")
+
+    pd.set_option('display.width', 160)
+    print(result['summary'].round(2).to_string())
+
+    losses = result['paths'].groupby('strategy')['total_return'].apply(lambda r: (r < 0).mean() * 100)
+    print("\n📉 Probabilité de perte :")
+    for label, probability in losses.items():
+        print(f"   {label:<24} {probability:.1f}%")
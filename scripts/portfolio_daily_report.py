@@ -3,7 +3,12 @@ from datetime import datetime, timedelta
 import numpy as np
 import os
 from pathlib import Path
-from portfolio_engine import Portfolio, calculate_portfolio_metrics
+from metrics_engine import PORTFOLIO_METRICS, compute_metrics
+from portfolio_engine import Portfolio
+from price_store import load_wide, portfolio_assets, utc_now
+
+# Au-delà, le rapport ne détaille que les meilleurs et les pires actifs
+MAX_DETAILED_ASSETS = 20
 
 def generate_portfolio_daily_report():
     """
@@ -13,41 +18,29 @@ def generate_portfolio_daily_report():
     print(f"📄 Génération rapport portfolio : {now.strftime('%d/%m/%Y %H:%M')}")
     
     try:
-        # Charger les données
-        data_file = Path(__file__).resolve().parent.parent / 'data' / 'portfolio_prices.csv'
-        df = pd.read_csv(data_file)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # Charger les dernières 24h (seules ces partitions sont lues)
+        yesterday = utc_now() - timedelta(hours=24)
+        df_24h = load_wide(portfolio_assets(), start=yesterday)
         
         # Détecter les cryptos
-        price_cols = [col for col in df.columns if col.endswith('_price')]
+        price_cols = [col for col in df_24h.columns if col.endswith('_price')]
         cryptos = [col.replace('_price', '') for col in price_cols]
         
-        # Dernières 24h
-        yesterday = now - timedelta(hours=24)
-        df_24h = df[df['timestamp'] >= yesterday].copy()
-        
         if len(df_24h) == 0:
             print("⚠️ Pas assez de données")
             return None
         
-        # Calculer performance de chaque crypto
-        crypto_performance = {}
-        
-        for crypto in cryptos:
-            price_col = f"{crypto}_price"
-            open_price = df_24h[price_col].iloc[0]
-            close_price = df_24h[price_col].iloc[-1]
-            high_price = df_24h[price_col].max()
-            low_price = df_24h[price_col].min()
-            change = ((close_price - open_price) / open_price) * 100
-            
-            crypto_performance[crypto] = {
-                'open': open_price,
-                'close': close_price,
-                'high': high_price,
-                'low': low_price,
-                'change': change
-            }
+        # Calculer performance de chaque crypto (en une passe sur toutes les colonnes)
+        prices_24h = df_24h[price_cols]
+        summary = pd.DataFrame({
+            'open': prices_24h.iloc[0].values,
+            'close': prices_24h.iloc[-1].values,
+            'high': prices_24h.max().values,
+            'low': prices_24h.min().values
+        }, index=cryptos)
+        summary['change'] = ((summary['close'] - summary['open']) / summary['open']) * 100
+        
+        crypto_performance = summary.to_dict('index')
         
         # Identifier top/bottom
         sorted_cryptos = sorted(crypto_performance.items(), key=lambda x: x[1]['change'], reverse=True)
@@ -59,7 +52,7 @@ def generate_portfolio_daily_report():
         
         portfolio = Portfolio(df_24h, weights, initial_capital=10000, rebalance='none')
         result_df = portfolio.run_backtest()
-        portfolio_metrics = calculate_portfolio_metrics(result_df, 10000)
+        portfolio_metrics = compute_metrics(result_df['portfolio_value'], 10000, PORTFOLIO_METRICS)
         
         # Créer le rapport
         report = f"""
@@ -82,7 +75,15 @@ def generate_portfolio_daily_report():
 💰 PERFORMANCE PAR ACTIF
 """
         
-        for crypto, perf in crypto_performance.items():
+        # Grand univers : seulement les meilleurs et les pires actifs
+        if len(sorted_cryptos) > MAX_DETAILED_ASSETS:
+            half = MAX_DETAILED_ASSETS // 2
+            detailed = sorted_cryptos[:half] + sorted_cryptos[-half:]
+            report += f"\n   ({half} meilleurs et {half} pires sur {len(sorted_cryptos)} actifs)\n"
+        else:
+            detailed = list(crypto_performance.items())
+        
+        for crypto, perf in detailed:
             report += f"""
    {crypto}:
       Open   : ${perf['open']:,.2f}
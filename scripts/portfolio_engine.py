@@ -1,6 +1,6 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+from metrics_engine import ASSET_METRICS, PORTFOLIO_METRICS, compute_metrics
 
 class Portfolio:
     """
@@ -117,84 +117,16 @@ class Portfolio:
 def calculate_portfolio_metrics(portfolio_df, initial_capital=10000):
     """
     Calcule toutes les métriques du portfolio
+    (moteur commun : metrics_engine.compute_metrics)
     """
-    portfolio_values = portfolio_df['portfolio_value']
-    returns = portfolio_values.pct_change().dropna()
-    
-    # 1. Performance totale
-    final_value = portfolio_values.iloc[-1]
-    total_return = ((final_value - initial_capital) / initial_capital) * 100
-    
-    # 2. Rendement annualisé
-    days = len(portfolio_df) / 24  # Données horaires
-    annual_return = ((final_value / initial_capital) ** (365 / days) - 1) * 100
-    
-    # 3. Volatilité annualisée
-    annual_volatility = returns.std() * np.sqrt(24 * 365) * 100
-    
-    # 4. Sharpe Ratio (taux sans risque = 0%)
-    sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(24 * 365) if returns.std() != 0 else 0
-    
-    # 5. Sortino Ratio (pénalise seulement la volatilité négative)
-    downside_returns = returns[returns < 0]
-    downside_std = downside_returns.std() * np.sqrt(24 * 365)
-    sortino_ratio = (returns.mean() * 24 * 365) / downside_std if downside_std != 0 else 0
-    
-    # 6. Max Drawdown
-    cumulative = portfolio_values / portfolio_values.iloc[0]
-    running_max = cumulative.cummax()
-    drawdown = (cumulative - running_max) / running_max
-    max_drawdown = drawdown.min() * 100
-    
-    # 7. Calmar Ratio (rendement annualisé / max drawdown)
-    calmar_ratio = abs(annual_return / max_drawdown) if max_drawdown != 0 else 0
-    
-    # 8. Win Rate
-    winning_periods = (returns > 0).sum()
-    win_rate = (winning_periods / len(returns)) * 100 if len(returns) > 0 else 0
-    
-    return {
-        'final_value': final_value,
-        'total_return': total_return,
-        'annual_return': annual_return,
-        'annual_volatility': annual_volatility,
-        'sharpe_ratio': sharpe_ratio,
-        'sortino_ratio': sortino_ratio,
-        'max_drawdown': max_drawdown,
-        'calmar_ratio': calmar_ratio,
-        'win_rate': win_rate
-    }
+    return compute_metrics(portfolio_df['portfolio_value'], initial_capital, PORTFOLIO_METRICS)
 
 
 def calculate_asset_metrics(prices, asset_name):
     """
-    Calcule les métriques pour un seul actif
+    Calcule les métriques pour un seul actif (base : premier prix)
     """
-    returns = prices.pct_change().dropna()
-    
-    initial = prices.iloc[0]
-    final = prices.iloc[-1]
-    total_return = ((final - initial) / initial) * 100
-    
-    days = len(prices) / 24
-    annual_return = ((final / initial) ** (365 / days) - 1) * 100
-    
-    annual_volatility = returns.std() * np.sqrt(24 * 365) * 100
-    sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(24 * 365) if returns.std() != 0 else 0
-    
-    cumulative = prices / prices.iloc[0]
-    running_max = cumulative.cummax()
-    drawdown = (cumulative - running_max) / running_max
-    max_drawdown = drawdown.min() * 100
-    
-    return {
-        'asset': asset_name,
-        'total_return': total_return,
-        'annual_return': annual_return,
-        'annual_volatility': annual_volatility,
-        'sharpe_ratio': sharpe_ratio,
-        'max_drawdown': max_drawdown
-    }
+    return {'asset': asset_name, **compute_metrics(prices, None, ASSET_METRICS)}
 
 
 def calculate_correlation_matrix(prices_df, assets):
@@ -217,10 +149,8 @@ if __name__ == "__main__":
     # Test
     print("🧪 Test du Portfolio Engine")
     
-    from pathlib import Path
-    data_file = Path(__file__).resolve().parent.parent / 'data' / 'portfolio_prices.csv'
-    df = pd.read_csv(data_file)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    from price_store import load_wide
+    df = load_wide(['BTC', 'ETH', 'SOL'])
     
     weights = {'BTC': 0.5, 'ETH': 0.3, 'SOL': 0.2}
     
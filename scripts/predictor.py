@@ -2,11 +2,9 @@
 Bitcoin Price Prediction Module
 Implements multiple ML models: Linear Regression, ARIMA, Random Forest, LSTM
 """
-from pathlib import Path
-import pathlib
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -368,10 +366,9 @@ if __name__ == "__main__":
     print("   BITCOIN PRICE PREDICTION - ML MODELS")
     print("="*70)
     
-    BASE_DIR = pathlib.Path(__file__).resolve().parents[1]
-    DATA_PATH = BASE_DIR / "data" / "bitcoin_prices.csv"
+    from price_store import load
 
-    df = pd.read_csv(DATA_PATH)
+    df = load('BTC')
     print(f"\n📊 Données chargées: {len(df)} points")
     print(f"   Du {df['timestamp'].iloc[0]} au {df['timestamp'].iloc[-1]}")
     
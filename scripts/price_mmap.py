@@ -0,0 +1,226 @@
+"""
+Vue mémoire-mappée (zéro copie) de l'historique complet d'un actif
+
+Les partitions journalières de price_store restent la source de vérité.
+Pour chaque actif, une copie contiguë est maintenue dans data/store/<ACTIF>/_mmap :
+une colonne binaire brute par champ, préallouée, et un meta.json qui donne
+le nombre de lignes valides et la génération des fichiers.
+
+    data/store/BTC/_mmap/meta.json         {"length", "capacity", "columns", "version", "generation"}
+    data/store/BTC/_mmap/timestamp.3.bin   int64 (nanosecondes), génération 3
+    data/store/BTC/_mmap/price.3.bin       float64
+
+Les lecteurs (dashboard, rapports, prédicteur) ouvrent ces fichiers avec
+np.memmap en copie à l'écriture (mode 'c') : ni parsing ni allocation, et
+le cache de pages du système est partagé entre processus. Une écriture côté
+lecteur (certaines opérations pandas travaillent en place) reste privée au
+processus et ne touche jamais le fichier. Un tick plus récent que la dernière
+ligne est écrit en place ; les autres cas (backfill dans le passé, nouvelle
+colonne) reconstruisent la vue depuis les partitions.
+
+Cohérence lecteurs / écrivain (sans verrou côté lecteur) :
+    - meta.json est remplacé atomiquement, toujours après les données ;
+    - une reconstruction écrit une nouvelle génération de fichiers, puis
+      bascule meta.json dessus : un lecteur voit l'ancienne ou la nouvelle,
+      jamais un mélange ;
+    - une ligne déjà visible réécrite en place (même horodatage) est d'abord
+      masquée (length - 1), puis réécrite, puis de nouveau publiée.
+Les écrivains, eux, se coordonnent par le verrou de price_store.
+"""
+import json
+import os
+
+import numpy as np
+
+from atomic_io import atomic_write, atomic_write_text
+
+MMAP_DIRNAME = '_mmap'
+
+# Lignes préallouées à la création (la capacité double ensuite si besoin)
+INITIAL_CAPACITY = 4096
+
+# Tentatives d'ouverture si une reconstruction bascule de génération entre-temps
+OPEN_RETRIES = 3
+
+
+def _dtype(col):
+    """Type d'une colonne : int64 pour les timestamps, float64 sinon"""
+    return np.dtype(np.int64) if col == 'timestamp' else np.dtype(np.float64)
+
+
+def _column_file(mmap_dir, meta, col):
+    """Fichier d'une colonne pour la génération décrite par meta"""
+    generation = meta.get('generation')
+    if generation is None:
+        # Vue créée avant les générations
+        return mmap_dir / f'{col}.bin'
+    return mmap_dir / f'{col}.{generation}.bin'
+
+
+def read_meta(mmap_dir):
+    """Métadonnées de la vue (None si elle n'existe pas encore)"""
+    path = mmap_dir / 'meta.json'
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def _write_meta(mmap_dir, meta):
+    """Remplace meta.json d'un coup : un lecteur voit l'ancienne ou la nouvelle longueur"""
+    atomic_write_text(mmap_dir / 'meta.json', json.dumps(meta))
+
+
+def _map(mmap_dir, meta, col, length):
+    """np.memmap d'une colonne en copie à l'écriture (tableau vide si length == 0)"""
+    dtype = _dtype(col)
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(_column_file(mmap_dir, meta, col), dtype=dtype, mode='c', shape=(length,))
+
+
+def open_snapshot(mmap_dir, columns=None):
+    """
+    Ouvre la vue pour lecture (copie à l'écriture, le fichier n'est jamais modifié)
+    Retourne (timestamps, {colonne: valeurs}) sous forme de np.memmap,
+    ou None si la vue n'existe pas
+    """
+    for attempt in range(OPEN_RETRIES):
+        meta = read_meta(mmap_dir)
+        if meta is None:
+            return None
+
+        length = meta['length']
+        wanted = meta['columns'] if columns is None else columns
+
+        try:
+            ts = _map(mmap_dir, meta, 'timestamp', length)
+            values = {
+                col: _map(mmap_dir, meta, col, length) if col in meta['columns'] else np.full(length, np.nan)
+                for col in wanted
+            }
+            return ts, values
+        except FileNotFoundError:
+            # Génération remplacée entre la lecture de meta.json et l'ouverture
+            if attempt == OPEN_RETRIES - 1:
+                raise
+
+
+def read_range(mmap_dir, start, end, columns):
+    """
+    Copie des lignes dont le timestamp est dans [start, end], pour un écrivain
+    (sous verrou) : seule la colonne timestamp est mappée, les autres ne sont
+    lues que sur la plage
+    Retourne (timestamps, {colonne: valeurs}, premier timestamp de la vue ou None),
+    ou None si la vue n'existe pas
+    """
+    meta = read_meta(mmap_dir)
+    if meta is None:
+        return None
+
+    ts = _map(mmap_dir, meta, 'timestamp', meta['length'])
+    first = int(ts[0]) if len(ts) > 0 else None
+    lo = int(np.searchsorted(ts, start, side='left'))
+    hi = int(np.searchsorted(ts, end, side='right'))
+
+    values = {}
+    for col in columns:
+        if col not in meta['columns']:
+            values[col] = np.full(hi - lo, np.nan)
+            continue
+        dtype = _dtype(col)
+        values[col] = np.fromfile(_column_file(mmap_dir, meta, col), dtype=dtype, count=hi - lo, offset=lo * dtype.itemsize)
+
+    return np.array(ts[lo:hi]), values, first
+
+
+def write_snapshot(mmap_dir, ts, values):
+    """
+    Réécrit entièrement la vue dans une nouvelle génération de fichiers
+    ts: timestamps int64 triés et sans doublon, values: {colonne: valeurs}
+    """
+    mmap_dir.mkdir(parents=True, exist_ok=True)
+    capacity = max(INITIAL_CAPACITY, 2 * len(ts))
+
+    previous = read_meta(mmap_dir)
+    version = previous.get('version', 0) + 1 if previous else 1
+    generation = previous.get('generation', 0) + 1 if previous else 1
+
+    meta = {
+        'length': len(ts), 'capacity': capacity, 'columns': list(values),
+        'version': version, 'generation': generation
+    }
+
+    for col, arr in [('timestamp', ts)] + list(values.items()):
+        dtype = _dtype(col)
+
+        def write(f, arr=arr, dtype=dtype):
+            np.asarray(arr, dtype=dtype).tofile(f)
+            f.truncate(capacity * dtype.itemsize)
+
+        atomic_write(_column_file(mmap_dir, meta, col), write)
+
+    # Bascule des lecteurs sur la nouvelle génération
+    _write_meta(mmap_dir, meta)
+
+    # Anciennes générations : les lecteurs qui les ont déjà ouvertes gardent leur mapping
+    current = {_column_file(mmap_dir, meta, col).name for col in ['timestamp'] + list(values)}
+    for path in mmap_dir.glob('*.bin'):
+        if path.name not in current:
+            path.unlink(missing_ok=True)
+
+
+def append_snapshot(mmap_dir, ts, values):
+    """
+    Ajoute en place des lignes au moins aussi récentes que la dernière de la vue
+    ts: timestamps int64 triés et sans doublon, values: {colonne: valeurs}
+    Retourne False si c'est impossible (vue absente, lignes plus anciennes,
+    nouvelle colonne) : l'appelant doit alors reconstruire la vue
+    """
+    meta = read_meta(mmap_dir)
+    if meta is None or any(col not in meta['columns'] for col in values):
+        return False
+
+    length, capacity = meta['length'], meta['capacity']
+
+    start = length
+    if length > 0:
+        with open(_column_file(mmap_dir, meta, 'timestamp'), 'rb') as f:
+            f.seek((length - 1) * 8)
+            last = np.frombuffer(f.read(8), dtype=np.int64)[0]
+        if ts[0] < last:
+            return False
+        if ts[0] == last:
+            # Même horodatage que la dernière ligne : la nouvelle valeur gagne.
+            # La ligne est masquée pendant sa réécriture.
+            start = length - 1
+            _write_meta(mmap_dir, dict(meta, length=start))
+
+    end = start + len(ts)
+    columns = ['timestamp'] + meta['columns']
+
+    # Agrandir les fichiers : les lecteurs déjà ouverts gardent un mapping valide
+    if end > capacity:
+        capacity = max(2 * capacity, end)
+        for col in columns:
+            with open(_column_file(mmap_dir, meta, col), 'r+b') as f:
+                f.truncate(capacity * _dtype(col).itemsize)
+
+    # Écriture positionnée (sans np.memmap : quelques lignes seulement)
+    for col in columns:
+        if col == 'timestamp':
+            arr = ts
+        else:
+            arr = values.get(col, np.full(len(ts), np.nan))
+
+        dtype = _dtype(col)
+        with open(_column_file(mmap_dir, meta, col), 'r+b') as f:
+            f.seek(start * dtype.itemsize)
+            f.write(np.asarray(arr, dtype=dtype).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Les données sont écrites (et synchronisées) avant la nouvelle longueur
+    _write_meta(mmap_dir, dict(
+        meta, length=end, capacity=capacity, version=meta.get('version', 0) + 1
+    ))
+    return True
@@ -0,0 +1,845 @@
+"""
+Stockage colonnaire des prix, partitionné par jour
+
+Remplace les CSV : chaque actif a un dossier par jour contenant une colonne
+binaire NumPy par champ (timestamp en int64 nanosecondes, prix en float64).
+
+    data/store/BTC/2025-12-23/timestamp.npy
+    data/store/BTC/2025-12-23/price.npy
+    data/store/BTC/2025-12-23/change_24h.npy
+
+Un tick plus récent que la dernière ligne est ajouté en fin de partition,
+sans la relire ; un backfill dans le passé ne réécrit que les partitions des
+jours concernés. Les lectures passent
+par une vue contiguë mémoire-mappée de chaque actif (voir price_mmap.py) :
+load() retourne des vues NumPy sans copie ni parsing.
+
+Usage :
+    from price_store import load
+    df = load('BTC', start=utc_now() - timedelta(hours=24))
+
+    python scripts/price_store.py migrate   # import one-shot des CSV
+    python scripts/price_store.py rollups   # reconstruit les barres OHLC (voir rollups.py)
+
+Backend SQLite optionnel (index (asset, timestamp), voir tick_db.py) :
+    CRYPTOVISION_STORE=sqlite streamlit run app.py
+"""
+import io
+import os
+import shutil
+import sys
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import tick_db
+from atomic_io import atomic_write, file_lock, fsync_dir
+from price_mmap import MMAP_DIRNAME, append_snapshot, open_snapshot, read_meta, read_range, write_snapshot
+from rollups import (
+    BAR_COLUMNS, BARS_DIRNAME, RESOLUTIONS, bars_frame, bucket_range,
+    compute_bars, load_bars_files, rollup_bars, store_bars_files
+)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+STORE_DIR = DATA_DIR / 'store'
+
+# Anciens fichiers CSV, importés une fois par migrate_csvs()
+BITCOIN_CSV = DATA_DIR / 'bitcoin_prices.csv'
+PORTFOLIO_CSV = DATA_DIR / 'portfolio_prices.csv'
+MIGRATION_MARKER = STORE_DIR / '.migrated'
+
+# 'files' (partitions journalières + vues mémoire-mappées) ou 'sqlite'
+BACKEND = os.environ.get('CRYPTOVISION_STORE', 'files')
+
+# Vrai pendant migrate_csvs() (ses propres écritures ne relancent pas l'import)
+_migrating = False
+
+NS_PER_DAY = 24 * 3600 * 10**9
+
+# Vues larges matérialisées gardées en mémoire (les plus récemment utilisées)
+WIDE_CACHE_SIZE = 8
+_wide_cache = OrderedDict()
+
+
+def _day_name(ns):
+    """Nom de partition (AAAA-MM-JJ) pour un timestamp en nanosecondes"""
+    return str(np.datetime64(int(ns), 'ns').astype('datetime64[D]'))
+
+
+def _to_ns(timestamp):
+    """Convertit un horodatage (datetime, str, Timestamp) en int64 nanosecondes"""
+    return pd.Timestamp(timestamp).value
+
+
+def utc_now():
+    """Heure courante en UTC sans fuseau, comme les timestamps du store (API en ms UTC)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def list_assets():
+    """Actifs présents dans le store"""
+    _ensure_migrated()
+    if BACKEND == 'sqlite':
+        return tick_db.list_assets()
+    return _file_assets()
+
+
+def _file_assets():
+    """Actifs présents dans le store fichiers"""
+    if not STORE_DIR.exists():
+        return []
+    return sorted(p.name for p in STORE_DIR.iterdir() if p.is_dir())
+
+
+def list_partitions(asset):
+    """Jours disponibles pour un actif, triés"""
+    asset_dir = STORE_DIR / asset
+    if not asset_dir.exists():
+        return []
+    # Ni les dossiers techniques (_mmap, ...) ni les partitions en cours d'écriture (.tmp, .old)
+    return sorted(
+        p.name for p in asset_dir.iterdir()
+        if p.is_dir() and not p.name.startswith('_') and '.' not in p.name
+    )
+
+
+def _writer_lock(asset):
+    """
+    Verrou d'écriture d'un actif (flock), pris par append et update_rollups
+    Store fichiers : data/store/<ACTIF>/.lock ; SQLite : data/ticks.db.locks/<ACTIF>.lock
+    (hors de data/store, qui appartient au store fichiers). Les lecteurs ne le prennent jamais.
+    """
+    if BACKEND == 'sqlite':
+        return file_lock(tick_db.DB_FILE.with_name(tick_db.DB_FILE.name + '.locks') / f'{asset}.lock')
+    return file_lock(STORE_DIR / asset / '.lock')
+
+
+def _recover_partitions(asset):
+    """
+    Remet d'aplomb les partitions d'un écrivain interrompu (sous verrou)
+    <jour>.old sans <jour> : le remplacement n'a pas abouti, on restaure l'ancienne
+    """
+    asset_dir = STORE_DIR / asset
+    if not asset_dir.exists():
+        return
+
+    for path in asset_dir.glob('*.old'):
+        target = path.with_suffix('')
+        if target.exists():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.rename(path, target)
+
+    for path in asset_dir.glob('*.tmp'):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _partition_columns(partition_dir):
+    """Colonnes de valeurs (hors timestamp) d'une partition"""
+    return sorted(p.stem for p in partition_dir.glob('*.npy') if p.stem != 'timestamp')
+
+
+def _read_partition(partition_dir, columns):
+    """
+    Lit timestamp + les colonnes demandées (NaN si absente de la partition)
+    timestamp.npy fait foi : une colonne plus longue (ajout en fin interrompu,
+    voir _append_partition) est tronquée à sa longueur
+    """
+    ts = np.load(partition_dir / 'timestamp.npy')
+    values = {}
+    for col in columns:
+        path = partition_dir / f'{col}.npy'
+        values[col] = np.load(path)[:len(ts)] if path.exists() else np.full(len(ts), np.nan)
+    return ts, values
+
+
+def _write_partition(partition_dir, ts, values):
+    """
+    Écrit une partition complète (timestamp trié + colonnes)
+    Toutes les colonnes sont écrites et synchronisées dans <jour>.tmp, puis le
+    dossier remplace l'ancien : après un crash, la partition est entière,
+    ancienne ou nouvelle (voir _recover_partitions)
+    """
+    tmp_dir = partition_dir.with_name(partition_dir.name + '.tmp')
+    old_dir = partition_dir.with_name(partition_dir.name + '.old')
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    atomic_write(tmp_dir / 'timestamp.npy', lambda f: np.save(f, ts.astype(np.int64)))
+    for col, arr in values.items():
+        atomic_write(tmp_dir / f'{col}.npy', lambda f, arr=arr: np.save(f, np.asarray(arr, dtype=np.float64)))
+
+    if partition_dir.exists():
+        os.rename(partition_dir, old_dir)
+    os.rename(tmp_dir, partition_dir)
+    fsync_dir(partition_dir.parent)
+
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _npy_header(f):
+    """En-tête d'un fichier .npy ouvert : (version, nombre de lignes, dtype, taille de l'en-tête)"""
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+    return version, shape[0], dtype, f.tell()
+
+
+def _npy_header_bytes(version, length, dtype):
+    """En-tête .npy d'un tableau 1-D de length lignes"""
+    buffer = io.BytesIO()
+    header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (length,)}
+    if version == (1, 0):
+        np.lib.format.write_array_header_1_0(buffer, header)
+    else:
+        np.lib.format.write_array_header_2_0(buffer, header)
+    return buffer.getvalue()
+
+
+def _append_partition(partition_dir, ts, values):
+    """
+    Ajoute en fin de partition des lignes plus récentes que sa dernière ligne,
+    sans relire ni réécrire la partition (cas d'un tick en direct)
+    ts: timestamps int64 triés et sans doublon, values: {colonne: valeurs}
+
+    Les données sont écrites après la dernière ligne, puis l'en-tête .npy
+    (de taille fixe, numpy réserve la place des chiffres de la longueur) est
+    réécrit en place : colonnes de valeurs d'abord, timestamp.npy en dernier.
+    timestamp.npy fait foi (voir _read_partition) : après un crash, les lignes
+    en trop d'une colonne sont ignorées puis écrasées par l'ajout suivant.
+
+    Retourne False si c'est impossible (partition absente, lignes pas plus
+    récentes, nouvelle colonne) : l'appelant réécrit alors la partition
+    """
+    if not partition_dir.exists():
+        return False
+
+    columns = _partition_columns(partition_dir)
+    if any(col not in columns for col in values):
+        return False
+
+    with open(partition_dir / 'timestamp.npy', 'rb') as f:
+        version, length, _, offset = _npy_header(f)
+        if length > 0:
+            f.seek(offset + (length - 1) * 8)
+            if ts[0] <= np.frombuffer(f.read(8), dtype=np.int64)[0]:
+                return False
+
+    # Tous les en-têtes doivent garder leur taille, sinon rien n'est modifié
+    files = []
+    for col in columns + ['timestamp']:
+        path = partition_dir / f'{col}.npy'
+        with open(path, 'rb') as f:
+            version, _, dtype, offset = _npy_header(f)
+        header = _npy_header_bytes(version, length + len(ts), dtype)
+        if len(header) != offset:
+            return False
+
+        arr = ts if col == 'timestamp' else values.get(col, np.full(len(ts), np.nan))
+        files.append((path, header, np.asarray(arr, dtype=dtype)))
+
+    for path, header, arr in files:
+        with open(path, 'r+b') as f:
+            f.seek(len(header) + length * arr.itemsize)
+            f.write(arr.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+            # Nouvelle longueur publiée une fois les données synchronisées
+            f.seek(0)
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+
+    return True
+
+
+def _order_columns(columns):
+    """'price' en premier, comme dans les anciens CSV"""
+    return sorted(columns, key=lambda col: (col != 'price', col))
+
+
+def _load_partitions(asset, start_ns=None, end_ns=None, columns=None):
+    """
+    Lit les partitions d'un actif entre start_ns et end_ns (inclus)
+    Retourne (timestamps int64, {colonne: valeurs}) concaténés
+    """
+    # Élagage des partitions par jour
+    days = list_partitions(asset)
+    if start_ns is not None:
+        days = [day for day in days if day >= _day_name(start_ns)]
+    if end_ns is not None:
+        days = [day for day in days if day <= _day_name(end_ns)]
+
+    asset_dir = STORE_DIR / asset
+    if columns is None:
+        columns = _order_columns({col for day in days for col in _partition_columns(asset_dir / day)})
+    columns = list(columns)
+
+    ts_chunks = []
+    value_chunks = {col: [] for col in columns}
+
+    for day in days:
+        ts, values = _read_partition(asset_dir / day, columns)
+
+        # Élagage à l'intérieur de la partition (triée)
+        lo = np.searchsorted(ts, start_ns, side='left') if start_ns is not None else 0
+        hi = np.searchsorted(ts, end_ns, side='right') if end_ns is not None else len(ts)
+
+        ts_chunks.append(ts[lo:hi])
+        for col in columns:
+            value_chunks[col].append(values[col][lo:hi])
+
+    if len(ts_chunks) == 0:
+        return np.array([], dtype=np.int64), {col: np.array([], dtype=np.float64) for col in columns}
+
+    return np.concatenate(ts_chunks), {col: np.concatenate(value_chunks[col]) for col in columns}
+
+
+def _rebuild_snapshot(asset):
+    """Reconstruit la vue mémoire-mappée d'un actif depuis ses partitions"""
+    with _writer_lock(asset):
+        ts, values = _load_partitions(asset)
+        write_snapshot(STORE_DIR / asset / MMAP_DIRNAME, ts, values)
+
+
+def load(asset, start=None, end=None, columns=None):
+    """
+    Charge l'historique d'un actif entre start et end (inclus)
+    columns: colonnes à lire, ex ['price'] (None = toutes)
+    Retourne un DataFrame [timestamp, ...colonnes], trié par timestamp
+
+    Avec le store fichiers, les colonnes sont des vues mémoire-mappées en
+    copie à l'écriture : une modification reste locale au processus.
+    """
+    _ensure_migrated()
+    if BACKEND == 'sqlite':
+        return tick_db.load(asset, start, end, columns)
+
+    start_ns = _to_ns(start) if start is not None else None
+    end_ns = _to_ns(end) if end is not None else None
+
+    mmap_dir = STORE_DIR / asset / MMAP_DIRNAME
+    snapshot = open_snapshot(mmap_dir, columns)
+    if snapshot is None and len(list_partitions(asset)) > 0:
+        # Store créé avant la vue mémoire-mappée
+        _rebuild_snapshot(asset)
+        snapshot = open_snapshot(mmap_dir, columns)
+
+    if snapshot is None:
+        ts, values = _load_partitions(asset, start_ns, end_ns, columns)
+    else:
+        ts, values = snapshot
+
+        # Plage demandée : deux recherches dichotomiques, puis des vues
+        lo = np.searchsorted(ts, start_ns, side='left') if start_ns is not None else 0
+        hi = np.searchsorted(ts, end_ns, side='right') if end_ns is not None else len(ts)
+        ts = ts[lo:hi]
+        values = {col: arr[lo:hi] for col, arr in values.items()}
+
+    data = {'timestamp': ts.view('datetime64[ns]')}
+    data.update(values)
+
+    # copy=False : pandas garde les tableaux mappés tels quels
+    return pd.DataFrame(data, copy=False)
+
+
+def append(asset, df):
+    """
+    Ajoute des lignes à l'historique d'un actif
+    df: DataFrame (ou dict d'une ligne) avec 'timestamp' et des colonnes numériques
+    Seules les partitions des jours concernés sont réécrites ;
+    en cas de doublon de timestamp, la nouvelle valeur gagne.
+    Les barres OHLC des périodes touchées sont mises à jour dans la foulée.
+    Retourne le nombre de lignes reçues
+    """
+    _ensure_migrated()
+
+    if isinstance(df, dict):
+        df = pd.DataFrame([df])
+    if len(df) == 0:
+        return 0
+
+    with _writer_lock(asset):
+        if BACKEND == 'sqlite':
+            tick_db.append(asset, df)
+        else:
+            _recover_partitions(asset)
+            _append_files(asset, df)
+
+        timestamps = pd.to_datetime(df['timestamp'])
+        update_rollups(asset, timestamps.min(), timestamps.max())
+
+    return len(df)
+
+
+def _append_files(asset, df):
+    """
+    Ajoute les lignes aux partitions des jours touchés puis met à jour la vue
+    mémoire-mappée. Un tick plus récent que la partition est ajouté en fin
+    (_append_partition) ; sinon la partition est réécrite
+    """
+    new_ts = pd.to_datetime(df['timestamp']).values.astype('datetime64[ns]').astype(np.int64)
+    value_cols = [col for col in df.columns if col != 'timestamp']
+    new_values = {col: df[col].to_numpy(dtype=np.float64) for col in value_cols}
+
+    day_idx = new_ts // NS_PER_DAY
+
+    for day_value in np.unique(day_idx):
+        rows = day_idx == day_value
+        partition_dir = STORE_DIR / asset / _day_name(day_value * NS_PER_DAY)
+
+        # Lignes plus récentes que la partition (tick en direct) : ajout en fin
+        order = np.argsort(new_ts[rows], kind='stable')
+        ts = new_ts[rows][order]
+        keep = np.append(ts[1:] != ts[:-1], True)
+        if _append_partition(partition_dir, ts[keep], {col: arr[rows][order][keep] for col, arr in new_values.items()}):
+            continue
+
+        # Lignes dans le passé, doublons ou nouvelle colonne : réécriture de la partition
+        columns = sorted(set(value_cols) | set(_partition_columns(partition_dir))) if partition_dir.exists() else value_cols
+
+        ts = new_ts[rows]
+        values = {
+            col: new_values[col][rows] if col in new_values else np.full(rows.sum(), np.nan)
+            for col in columns
+        }
+
+        if partition_dir.exists():
+            old_ts, old_values = _read_partition(partition_dir, columns)
+            ts = np.concatenate([old_ts, ts])
+            values = {col: np.concatenate([old_values[col], values[col]]) for col in columns}
+
+        # Tri stable puis dernier gagnant pour chaque timestamp
+        order = np.argsort(ts, kind='stable')
+        ts = ts[order]
+        keep = np.append(ts[1:] != ts[:-1], True)
+
+        _write_partition(
+            partition_dir,
+            ts[keep],
+            {col: arr[order][keep] for col, arr in values.items()}
+        )
+
+    # Vue mémoire-mappée : écriture en place pour un tick récent, sinon reconstruction
+    order = np.argsort(new_ts, kind='stable')
+    ts = new_ts[order]
+    keep = np.append(ts[1:] != ts[:-1], True)
+
+    if not append_snapshot(
+        STORE_DIR / asset / MMAP_DIRNAME,
+        ts[keep],
+        {col: arr[order][keep] for col, arr in new_values.items()}
+    ):
+        _rebuild_snapshot(asset)
+
+
+def append_many(frames):
+    """
+    Ajoute les lignes de plusieurs actifs (un tick du portfolio, un historique...)
+    frames: dict {actif: DataFrame ou dict d'une ligne}
+    Avec SQLite, une seule transaction pour l'ensemble
+    """
+    _ensure_migrated()
+    if BACKEND != 'sqlite':
+        return sum(append(asset, df) for asset, df in frames.items())
+
+    frames = {
+        asset: pd.DataFrame([df]) if isinstance(df, dict) else df
+        for asset, df in frames.items()
+    }
+    count = tick_db.append_many(frames)
+
+    for asset, df in frames.items():
+        if len(df) > 0:
+            timestamps = pd.to_datetime(df['timestamp'])
+            update_rollups(asset, timestamps.min(), timestamps.max())
+
+    return count
+
+
+def _bars_dir(asset, resolution):
+    """Vue mémoire-mappée des barres d'un actif pour une résolution"""
+    return STORE_DIR / asset / BARS_DIRNAME / resolution
+
+
+def _raw_bars(asset, lo, hi, resolution):
+    """Barres d'une résolution sur [lo, hi] calculées depuis les prix bruts"""
+    raw = load(asset, lo, hi, columns=['price'])
+    return compute_bars(raw['timestamp'].to_numpy().view(np.int64), raw['price'].to_numpy(dtype=np.float64), resolution)
+
+
+def _stored_bars(asset, resolution, lo, hi):
+    """
+    Barres stockées d'une résolution sur [lo, hi] (colonnes brutes, sum comprise)
+    Retourne (débuts, {colonne: valeurs}, début de la plus ancienne barre stockée ou None)
+    """
+    if BACKEND == 'sqlite':
+        ts, values = tick_db.load_bars(asset, resolution, lo, hi)
+        return ts, values, tick_db.oldest_bar(asset, resolution)
+
+    stored = read_range(_bars_dir(asset, resolution), lo, hi, BAR_COLUMNS)
+    if stored is None:
+        return np.array([], dtype=np.int64), {col: np.array([], dtype=np.float64) for col in BAR_COLUMNS}, None
+    return stored
+
+
+def _finer_bars(asset, resolution, lo, hi, fresh):
+    """
+    Barres de `resolution` sur [lo, hi], pour agréger la résolution supérieure
+    fresh: (fresh_lo, fresh_hi, débuts, valeurs) déjà recalculées pour ce tour,
+    qui remplacent les barres stockées sur leur plage
+    Si la rétention a élagué des barres de la plage alors que les prix bruts
+    existent encore, la plage est recalculée depuis le brut.
+    """
+    fresh_lo, fresh_hi, fresh_ts, fresh_values = fresh
+    if fresh_lo <= lo and hi <= fresh_hi:
+        return fresh_ts, fresh_values
+
+    ts, values, oldest = _stored_bars(asset, resolution, lo, hi)
+
+    # Pas de barre stockée avant `oldest` : élaguées, ou simplement aucun prix
+    if oldest is None or oldest > lo:
+        head_hi = hi if oldest is None else min(hi, oldest - 1)
+        if len(load(asset, lo, head_hi, columns=['price'])) > 0:
+            return _raw_bars(asset, lo, hi, resolution)
+
+    keep = (ts < fresh_lo) | (ts > fresh_hi)
+    merged_ts = np.concatenate([ts[keep], fresh_ts])
+    order = np.argsort(merged_ts, kind='stable')
+    return merged_ts[order], {
+        col: np.concatenate([values[col][keep], fresh_values[col]])[order]
+        for col in BAR_COLUMNS
+    }
+
+
+def update_rollups(asset, start, end):
+    """
+    Met à jour les barres OHLC de toutes les résolutions pour les périodes
+    qui recoupent [start, end]
+    Seuls les prix bruts des minutes touchées sont relus (barres 1m) ; chaque
+    résolution plus large est agrégée depuis la précédente, avec les barres
+    stockées autour (open / high / low / close / count / sum suffisent).
+    Un tick en direct coûte quelques barres par résolution, pas une journée
+    de prix bruts. Lecture, calcul et remplacement se font sous le verrou
+    d'écriture de l'actif : un écrivain concurrent ne perd pas ses barres.
+    """
+    min_ns, max_ns = _to_ns(start), _to_ns(end)
+
+    with _writer_lock(asset):
+        updates = {}
+        finer = fresh = None
+
+        # RESOLUTIONS va de la plus fine à la plus large
+        for resolution in RESOLUTIONS:
+            lo, hi = bucket_range(min_ns, max_ns, resolution)
+
+            if fresh is None:
+                bars_ts, values = _raw_bars(asset, lo, hi, resolution)
+            else:
+                bars_ts, values = rollup_bars(*_finer_bars(asset, finer, lo, hi, fresh), resolution)
+
+            updates[resolution] = (lo, hi, bars_ts, values)
+            finer, fresh = resolution, updates[resolution]
+
+        if BACKEND == 'sqlite':
+            tick_db.replace_bars(asset, updates)
+        else:
+            for resolution, (lo, hi, bars_ts, values) in updates.items():
+                store_bars_files(_bars_dir(asset, resolution), bars_ts, values, lo, hi)
+
+
+def rebuild_rollups(asset):
+    """Reconstruit toutes les barres d'un actif depuis son historique complet"""
+    raw = load(asset, columns=['price'])
+    if len(raw) > 0:
+        update_rollups(asset, raw['timestamp'].iloc[0], raw['timestamp'].iloc[-1])
+
+    if BACKEND == 'sqlite':
+        tick_db.mark_rollups_built(asset)
+
+
+def load_bars(asset, resolution='5m', start=None, end=None):
+    """
+    Barres OHLC pré-agrégées d'un actif entre start et end (début de barre inclus)
+    resolution: '1m', '5m', '1h' ou '1d'
+    Retourne un DataFrame [timestamp, open, high, low, close, count, mean]
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Résolution inconnue : {resolution} (disponibles : {', '.join(RESOLUTIONS)})")
+
+    _ensure_migrated()
+
+    # Barres déjà construites, même si la plage est vide ou élaguée depuis
+    if BACKEND == 'sqlite':
+        built = tick_db.rollups_built(asset)
+    else:
+        built = read_meta(_bars_dir(asset, resolution)) is not None
+
+    # Store créé avant les barres : construction au premier accès
+    if not built:
+        rebuild_rollups(asset)
+
+    if BACKEND == 'sqlite':
+        return bars_frame(*tick_db.load_bars(asset, resolution, start, end))
+
+    df = load_bars_files(
+        _bars_dir(asset, resolution),
+        _to_ns(start) if start is not None else None,
+        _to_ns(end) if end is not None else None
+    )
+    if df is None:
+        return bars_frame(np.array([], dtype=np.int64), {col: np.array([]) for col in BAR_COLUMNS})
+    return df
+
+
+def oldest_raw_day(asset):
+    """Premier jour (minuit) qui contient encore des prix bruts, ou None"""
+    if BACKEND == 'sqlite':
+        oldest = tick_db.oldest_timestamp(asset)
+        return pd.Timestamp(oldest).floor('D') if oldest is not None else None
+
+    days = list_partitions(asset)
+    return pd.Timestamp(days[0]) if days else None
+
+
+def drop_raw_day(asset, day):
+    """Supprime les prix bruts d'un jour (les barres OHLC sont conservées)"""
+    start = pd.Timestamp(day).floor('D')
+
+    if BACKEND == 'sqlite':
+        tick_db.delete_range(asset, start.value, start.value + NS_PER_DAY - 1)
+    else:
+        with _writer_lock(asset):
+            shutil.rmtree(STORE_DIR / asset / _day_name(start.value), ignore_errors=True)
+
+
+def refresh_snapshot(asset):
+    """
+    Reconstruit la vue mémoire-mappée si elle contient encore des jours
+    supprimés (après drop_raw_day, ou une rétention interrompue)
+    """
+    if BACKEND == 'sqlite':
+        return
+
+    with _writer_lock(asset):
+        _recover_partitions(asset)
+
+        snapshot = open_snapshot(STORE_DIR / asset / MMAP_DIRNAME, [])
+        if snapshot is None or len(snapshot[0]) == 0:
+            return
+
+        days = list_partitions(asset)
+        if len(days) == 0 or snapshot[0][0] < pd.Timestamp(days[0]).value:
+            _rebuild_snapshot(asset)
+
+
+def prune_bars(asset, resolution, before):
+    """Supprime les barres d'une résolution qui commencent avant `before`"""
+    before_ns = _to_ns(before)
+
+    if BACKEND == 'sqlite':
+        return tick_db.delete_bars_before(asset, resolution, before_ns)
+
+    bars_dir = _bars_dir(asset, resolution)
+
+    with _writer_lock(asset):
+        snapshot = open_snapshot(bars_dir, BAR_COLUMNS)
+        if snapshot is None:
+            return 0
+
+        ts, values = snapshot
+        n = int(np.searchsorted(ts, before_ns, side='left'))
+        if n > 0:
+            write_snapshot(bars_dir, ts[n:], {col: arr[n:] for col, arr in values.items()})
+        return n
+
+
+def asset_version(asset):
+    """Compteur d'écritures d'un actif : change à chaque append"""
+    if BACKEND == 'sqlite':
+        return tick_db.asset_version(asset)
+
+    meta = read_meta(STORE_DIR / asset / MMAP_DIRNAME)
+    return meta.get('version', 0) if meta else 0
+
+
+def load_wide(assets, start=None, end=None):
+    """
+    Tableau large [timestamp, <SYM>_price, ...] aligné sur la grille commune
+    (même format que l'ancien portfolio_prices.csv)
+
+    Le stockage reste en format long (une série par actif) ; la vue large
+    est matérialisée à la demande puis gardée en cache tant qu'aucun des
+    actifs n'a reçu de nouvelle écriture.
+    """
+    from alignment import align_series
+
+    _ensure_migrated()
+
+    key = (
+        BACKEND,
+        tuple(assets),
+        _to_ns(start) if start is not None else None,
+        _to_ns(end) if end is not None else None
+    )
+    versions = tuple(asset_version(asset) for asset in assets)
+
+    cached = _wide_cache.get(key)
+    if cached is not None and cached[0] == versions:
+        _wide_cache.move_to_end(key)
+        # Copie : l'appelant peut ajouter des colonnes sans toucher au cache
+        return cached[1].copy()
+
+    series = {asset: load(asset, start, end, columns=['price']) for asset in assets}
+    series = {asset: df for asset, df in series.items() if len(df) > 0}
+
+    if len(series) == 0:
+        return pd.DataFrame(columns=['timestamp'])
+
+    wide = align_series(series).dropna().reset_index(drop=True)
+
+    _wide_cache[key] = (versions, wide)
+    _wide_cache.move_to_end(key)
+    while len(_wide_cache) > WIDE_CACHE_SIZE:
+        _wide_cache.popitem(last=False)
+
+    return wide.copy()
+
+
+def portfolio_assets():
+    """Symboles de l'univers portfolio présents dans le store"""
+    from universe import get_symbol, load_universe
+
+    available = set(list_assets())
+    return [symbol for symbol in (get_symbol(c) for c in load_universe()) if symbol in available]
+
+
+def _ensure_migrated():
+    """Import automatique au premier accès si le store n'existe pas encore"""
+    if BACKEND == 'sqlite':
+        # La base existe dès le début de la copie : seul le drapeau final compte
+        if not _migrating and not tick_db.migration_done():
+            _migrate_to_sqlite()
+        return
+
+    # Marqueur propre au store fichiers : data/store peut exister sans avoir été rempli
+    if _migrating or MIGRATION_MARKER.exists() or not (BITCOIN_CSV.exists() or PORTFOLIO_CSV.exists()):
+        return
+    if len(_file_assets()) > 0:
+        # Store rempli avant l'existence du marqueur
+        MIGRATION_MARKER.touch()
+        return
+    migrate_csvs()
+
+
+def _migrate_to_sqlite():
+    """
+    Remplit la base SQLite depuis le store fichiers, ou à défaut depuis les CSV
+    Interrompue, la migration est reprise au prochain accès (les lignes déjà
+    copiées sont simplement réécrites)
+    """
+    assets = _file_assets()
+
+    if len(assets) == 0:
+        if BITCOIN_CSV.exists() or PORTFOLIO_CSV.exists():
+            migrate_csvs(force=True)
+        tick_db.mark_migration_done()
+        return
+
+    for asset in assets:
+        ts, values = _load_partitions(asset)
+        df = pd.DataFrame(values)
+        df.insert(0, 'timestamp', ts.view('datetime64[ns]'))
+        tick_db.append(asset, df)
+        print(f"✅ {asset} : {len(df)} lignes copiées dans {tick_db.DB_FILE.name}")
+    tick_db.mark_migration_done()
+
+
+def migrate_csvs(force=False):
+    """
+    Import one-shot de bitcoin_prices.csv et portfolio_prices.csv dans le store
+    BTC vient de bitcoin_prices.csv (la colonne BTC du portfolio n'est prise
+    que si le fichier Bitcoin est absent, pour éviter des quasi-doublons)
+    Le marqueur .migrated ne concerne que le store fichiers (SQLite : voir _ensure_migrated)
+    """
+    global _migrating
+
+    files_store = BACKEND != 'sqlite'
+    if files_store and MIGRATION_MARKER.exists() and not force:
+        print("ℹ️ Migration déjà effectuée")
+        return []
+
+    _migrating = True
+    try:
+        migrated = _import_csvs()
+    finally:
+        _migrating = False
+
+    if files_store:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        MIGRATION_MARKER.touch()
+    return migrated
+
+
+def _import_csvs():
+    """Importe les CSV présents, retourne les actifs importés"""
+    migrated = []
+
+    if BITCOIN_CSV.exists():
+        df = pd.read_csv(BITCOIN_CSV)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+        append('BTC', df[['timestamp'] + [c for c in ('price', 'change_24h') if c in df.columns]])
+        migrated.append('BTC')
+        print(f"✅ BTC : {len(df)} lignes importées depuis {BITCOIN_CSV.name}")
+
+    if PORTFOLIO_CSV.exists():
+        df = pd.read_csv(PORTFOLIO_CSV)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+
+        frames = {}
+        for col in df.columns:
+            if not col.endswith('_price'):
+                continue
+            asset = col[:-len('_price')]
+            if asset in migrated:
+                continue
+
+            frames[asset] = df[['timestamp', col]].rename(columns={col: 'price'}).dropna()
+            migrated.append(asset)
+            print(f"✅ {asset} : {len(frames[asset])} lignes importées depuis {PORTFOLIO_CSV.name}")
+
+        append_many(frames)
+
+    return migrated
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'info'
+
+    if command == 'migrate':
+        print("📦 Migration des CSV vers le store colonnaire...")
+        migrate_csvs(force='--force' in sys.argv)
+
+    if command == 'rollups':
+        print(f"📊 Reconstruction des barres OHLC ({', '.join(RESOLUTIONS)})...")
+        for asset in list_assets():
+            rebuild_rollups(asset)
+            print(f"   ✅ {asset}")
+
+    _ensure_migrated()
+    if BACKEND == 'sqlite':
+        print(f"\n📊 Store SQLite : {tick_db.DB_FILE}")
+        for asset, (count, first, last) in tick_db.summary().items():
+            print(f"   {asset:<8} {count:>8} lignes ({first:%Y-%m-%d} → {last:%Y-%m-%d})")
+    else:
+        print(f"\n📊 Store : {STORE_DIR}")
+        for asset in list_assets():
+            days = list_partitions(asset)
+            print(f"   {asset:<8} {len(days):>4} jours ({days[0]} → {days[-1]})")
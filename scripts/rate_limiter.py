@@ -0,0 +1,162 @@
+"""
+Token bucket partagé pour les appels CoinGecko
+
+Chaque appel à l'API consomme un jeton. L'état du seau (jetons restants,
+dernière recharge, pause imposée par un 429) est stocké dans un petit
+fichier JSON protégé par un verrou fcntl : les fetchers continus et le
+backfill, même lancés dans des processus différents, partagent le même
+débit maximal.
+
+Configuration par variables d'environnement :
+    COINGECKO_RATE_PER_MINUTE   Débit soutenu (défaut 30 appels/minute)
+    COINGECKO_BURST             Taille du seau (défaut 5 appels d'affilée)
+    COINGECKO_RATE_STATE        Fichier d'état partagé
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows : coordination limitée au processus courant
+    FCNTL_AVAILABLE = False
+
+RATE_PER_MINUTE = float(os.environ.get('COINGECKO_RATE_PER_MINUTE', 30))
+BURST = float(os.environ.get('COINGECKO_BURST', 5))
+
+DEFAULT_STATE_FILE = Path(__file__).resolve().parent.parent / 'data' / '.coingecko_ratelimit.json'
+STATE_FILE = Path(os.environ.get('COINGECKO_RATE_STATE', DEFAULT_STATE_FILE))
+
+
+class TokenBucket:
+    """
+    Token bucket coordonné entre threads (verrou) et processus (fichier + flock)
+    """
+
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE, capacity=BURST, state_file=STATE_FILE):
+        """
+        rate_per_minute: jetons ajoutés par minute
+        capacity: nombre max de jetons accumulés (rafale autorisée)
+        state_file: fichier d'état partagé, None pour un seau local au processus
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.state_file = Path(state_file) if state_file is not None and FCNTL_AVAILABLE else None
+
+        self._lock = threading.Lock()
+        self._local_state = {'tokens': capacity, 'updated': time.time(), 'paused_until': 0.0}
+
+        if self.state_file is not None:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def _update(self, func):
+        """
+        Applique func(state) -> résultat sous verrou, puis persiste l'état
+        """
+        with self._lock:
+            if self.state_file is None:
+                return func(self._local_state)
+
+            with open(self.state_file, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read() or '{}')
+                    except json.JSONDecodeError:
+                        state = {}
+
+                    state.setdefault('tokens', self.capacity)
+                    state.setdefault('updated', time.time())
+                    state.setdefault('paused_until', 0.0)
+
+                    result = func(state)
+
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                    return result
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _take(self, state, tokens):
+        """Recharge le seau puis prend des jetons ; retourne l'attente nécessaire"""
+        now = time.time()
+
+        if state['paused_until'] > now:
+            return state['paused_until'] - now
+
+        elapsed = max(0.0, now - state['updated'])
+        state['tokens'] = min(self.capacity, state['tokens'] + elapsed * self.rate)
+        state['updated'] = now
+
+        if state['tokens'] >= tokens:
+            state['tokens'] -= tokens
+            return 0.0
+
+        return (tokens - state['tokens']) / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        Bloque jusqu'à obtenir des jetons
+        Retourne le temps total attendu (secondes)
+        """
+        waited = 0.0
+
+        while True:
+            wait = self._update(lambda state: self._take(state, tokens))
+            if wait <= 0:
+                return waited
+
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """
+        Suspend tous les appels (tous processus) pendant seconds
+        Utilisé quand l'API répond 429 avec Retry-After
+        """
+        until = time.time() + seconds
+
+        def apply(state):
+            state['paused_until'] = max(state['paused_until'], until)
+            state['tokens'] = 0.0
+            # La recharge reprend à la fin de la pause, pas avant
+            state['updated'] = max(state['updated'], until)
+
+        self._update(apply)
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Retourne le token bucket partagé du processus"""
+    global _bucket
+
+    if _bucket is None:
+        with _bucket_lock:
+            if _bucket is None:
+                _bucket = TokenBucket()
+
+    return _bucket
+
+
+def configure(rate_per_minute=None, capacity=None, state_file=STATE_FILE):
+    """Remplace le token bucket partagé (ex: débit d'une clé API payante)"""
+    global _bucket
+
+    with _bucket_lock:
+        _bucket = TokenBucket(
+            rate_per_minute=RATE_PER_MINUTE if rate_per_minute is None else rate_per_minute,
+            capacity=BURST if capacity is None else capacity,
+            state_file=state_file
+        )
+
+    return _bucket
@@ -2,6 +2,7 @@ import time
 import schedule
 from datetime import datetime
 from daily_report import generate_daily_report
+from retention import RAW_RETENTION_DAYS, run_retention
 
 def job():
     """
@@ -17,6 +18,17 @@ def job():
     except Exception as e:
         print(f"❌ Erreur: {e}")
 
+def retention_job():
+    """
+    Archive les prix bruts sortis de la fenêtre de rétention (résumés en barres)
+    """
+    try:
+        report = run_retention()
+        if report:
+            print(f"🧹 Jours archivés : {', '.join(f'{asset} ({days})' for asset, days in report.items())}")
+    except Exception as e:
+        print(f"❌ Erreur rétention: {e}")
+
 def run_scheduler():
     """
     Lance le scheduler qui tourne en continu
@@ -26,11 +38,13 @@ def run_scheduler():
     print("📋 Configuration :")
     print("   - Fréquence : Toutes les 10 minutes")
     print("   - Premier rapport : Immédiatement")
+    print(f"   - Rétention des prix bruts : {RAW_RETENTION_DAYS} jours (tous les jours à 03:00)")
     print("   - Appuie sur Ctrl+C pour arrêter")
     print("="*70)
     
     # Programmer la tâche toutes les 10 minutes
     schedule.every(10).minutes.do(job)
+    schedule.every().day.at("03:00").do(retention_job)
     
     # Exécuter immédiatement un premier rapport
     print("\n📝 Génération du premier rapport...")
@@ -0,0 +1,128 @@
+"""
+Rétention par paliers de l'historique des prix
+
+    - prix bruts : conservés RAW_RETENTION_DAYS jours (90 par défaut)
+    - barres 1m / 5m : conservées 7 / 90 jours
+    - barres 1h / 1d : conservées indéfiniment
+
+Au-delà de la fenêtre, chaque jour de prix bruts est d'abord résumé en barres
+(voir rollups.py), puis archivé compressé dans data/archive/<ACTIF>/<jour>.npz,
+puis retiré du store. Les données chaudes gardent ainsi une taille bornée.
+
+Chaque jour est traité de bout en bout avant le suivant, et chaque étape peut
+être rejouée sans effet de bord : un job interrompu reprend simplement là où
+il s'était arrêté au lancement suivant.
+
+Usage :
+    python scripts/retention.py
+"""
+import os
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import price_store
+from atomic_io import atomic_write
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+ARCHIVE_DIR = DATA_DIR / 'archive'
+
+# Fenêtre des prix bruts (doit rester plus large que celle du backfill, 30 jours)
+RAW_RETENTION_DAYS = int(os.environ.get('CRYPTOVISION_RAW_RETENTION_DAYS', 90))
+
+# Durée de conservation des barres par résolution (None = indéfiniment)
+BAR_RETENTION = {
+    '1m': timedelta(days=7),
+    '5m': timedelta(days=90),
+    '1h': None,
+    '1d': None
+}
+
+
+def archive_day(asset, day, df):
+    """
+    Écrit les prix bruts d'un jour dans data/archive/<ACTIF>/<jour>.npz
+    (compressé, écriture atomique : jamais d'archive partielle, même après un crash)
+    """
+    target = ARCHIVE_DIR / asset / f'{day:%Y-%m-%d}.npz'
+
+    timestamps = df['timestamp'].to_numpy().view(np.int64)
+    columns = {col: df[col].to_numpy(dtype=np.float64) for col in df.columns if col != 'timestamp'}
+    atomic_write(target, lambda f: np.savez_compressed(f, timestamp=timestamps, **columns))
+
+    return target
+
+
+def load_archive(asset, day):
+    """Relit les prix bruts archivés d'un jour (DataFrame [timestamp, ...])"""
+    with np.load(ARCHIVE_DIR / asset / f'{pd.Timestamp(day):%Y-%m-%d}.npz') as archive:
+        df = pd.DataFrame({'timestamp': archive['timestamp'].view('datetime64[ns]')})
+        for col in archive.files:
+            if col != 'timestamp':
+                df[col] = archive[col]
+    return df
+
+
+def compact_asset(asset, now=None):
+    """
+    Applique la politique de rétention à un actif
+    Retourne le nombre de jours de prix bruts archivés
+    """
+    now = now or price_store.utc_now()
+    cutoff = pd.Timestamp(now - timedelta(days=RAW_RETENTION_DAYS)).floor('D')
+
+    # Un passage précédent a pu s'arrêter entre la suppression et la reconstruction
+    price_store.refresh_snapshot(asset)
+
+    archived = 0
+    day = price_store.oldest_raw_day(asset)
+
+    while day is not None and day < cutoff:
+        day_end = day + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+
+        # 1. Barres à jour pour ce jour  2. archive  3. suppression du brut
+        price_store.update_rollups(asset, day, day_end)
+        archive_day(asset, day, price_store.load(asset, day, day_end))
+        price_store.drop_raw_day(asset, day)
+
+        archived += 1
+        day = price_store.oldest_raw_day(asset)
+
+    if archived > 0:
+        price_store.refresh_snapshot(asset)
+
+    for resolution, keep in BAR_RETENTION.items():
+        if keep is not None:
+            price_store.prune_bars(asset, resolution, now - keep)
+
+    return archived
+
+
+def run_retention(now=None):
+    """
+    Applique la rétention à tous les actifs du store
+    Retourne {actif: jours archivés} pour les actifs modifiés
+    """
+    report = {}
+
+    for asset in price_store.list_assets():
+        archived = compact_asset(asset, now)
+        if archived > 0:
+            report[asset] = archived
+
+    return report
+
+
+if __name__ == "__main__":
+    print("🧹 Rétention de l'historique des prix")
+    print(f"   Prix bruts : {RAW_RETENTION_DAYS} jours, archives dans {ARCHIVE_DIR}")
+
+    report = run_retention()
+
+    if report:
+        for asset, days in report.items():
+            print(f"   ✅ {asset} : {days} jour(s) archivé(s)")
+    else:
+        print("   ✅ Rien à archiver")
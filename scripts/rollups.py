@@ -0,0 +1,138 @@
+"""
+Barres OHLC pré-agrégées (1m / 5m / 1h / 1d)
+
+Mises à jour à chaque écriture dans price_store : seules les barres 1m des
+minutes touchées sont recalculées depuis les prix bruts, chaque résolution
+plus large est agrégée depuis la précédente (rollup_bars). Les lecteurs (rapports, graphiques, backtests) demandent une
+résolution et lisent directement les barres.
+
+Store fichiers : une vue mémoire-mappée par résolution (voir price_mmap.py)
+    data/store/BTC/_bars/5m/{timestamp,open,high,low,close,count,sum}.bin
+Backend SQLite : table bars (voir tick_db.py)
+"""
+import numpy as np
+import pandas as pd
+
+from price_mmap import append_snapshot, open_snapshot, write_snapshot
+
+BARS_DIRNAME = '_bars'
+
+# Résolutions maintenues (pas en nanosecondes)
+RESOLUTIONS = {
+    '1m': pd.Timedelta(minutes=1).value,
+    '5m': pd.Timedelta(minutes=5).value,
+    '1h': pd.Timedelta(hours=1).value,
+    '1d': pd.Timedelta(days=1).value
+}
+
+# Colonnes stockées par barre (sum permet de reconstruire la moyenne)
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'count', 'sum']
+
+
+def bucket_range(min_ns, max_ns, resolution):
+    """Bornes (incluses) des barres couvrant [min_ns, max_ns]"""
+    step = RESOLUTIONS[resolution]
+    return min_ns - min_ns % step, max_ns - max_ns % step + step - 1
+
+
+def compute_bars(ts, prices, resolution):
+    """
+    Agrège des prix bruts triés en barres OHLC
+    ts: timestamps int64 (ns) triés, prices: float64
+    Retourne (début de chaque barre, {colonne: valeurs})
+    """
+    valid = ~np.isnan(prices)
+    ts, prices = ts[valid], prices[valid]
+
+    if len(ts) == 0:
+        return np.array([], dtype=np.int64), {col: np.array([], dtype=np.float64) for col in BAR_COLUMNS}
+
+    step = RESOLUTIONS[resolution]
+    buckets = ts - ts % step
+
+    # Début de chaque barre dans le tableau trié
+    starts = np.flatnonzero(np.append(True, buckets[1:] != buckets[:-1]))
+    ends = np.append(starts[1:], len(ts))
+
+    return buckets[starts], {
+        'open': prices[starts],
+        'high': np.maximum.reduceat(prices, starts),
+        'low': np.minimum.reduceat(prices, starts),
+        'close': prices[ends - 1],
+        'count': (ends - starts).astype(np.float64),
+        'sum': np.add.reduceat(prices, starts)
+    }
+
+
+def rollup_bars(ts, values, resolution):
+    """
+    Agrège des barres plus fines (triées) en barres de la résolution demandée
+    (open / close aux extrémités, high / low extrêmes, count et sum additionnés)
+    Retourne (début de chaque barre, {colonne: valeurs})
+    """
+    if len(ts) == 0:
+        return np.array([], dtype=np.int64), {col: np.array([], dtype=np.float64) for col in BAR_COLUMNS}
+
+    step = RESOLUTIONS[resolution]
+    buckets = ts - ts % step
+
+    starts = np.flatnonzero(np.append(True, buckets[1:] != buckets[:-1]))
+    ends = np.append(starts[1:], len(ts))
+
+    return buckets[starts], {
+        'open': values['open'][starts],
+        'high': np.maximum.reduceat(values['high'], starts),
+        'low': np.minimum.reduceat(values['low'], starts),
+        'close': values['close'][ends - 1],
+        'count': np.add.reduceat(values['count'], starts),
+        'sum': np.add.reduceat(values['sum'], starts)
+    }
+
+
+def bars_frame(ts, values):
+    """DataFrame [timestamp, open, high, low, close, count, mean] à partir des colonnes stockées"""
+    df = pd.DataFrame({'timestamp': np.asarray(ts, dtype=np.int64).view('datetime64[ns]')})
+    for col in ['open', 'high', 'low', 'close']:
+        df[col] = np.asarray(values[col])
+    df['count'] = np.asarray(values['count']).astype(np.int64)
+    df['mean'] = np.asarray(values['sum']) / np.maximum(df['count'].to_numpy(), 1)
+    return df
+
+
+def store_bars_files(bars_dir, ts, values, lo, hi):
+    """
+    Remplace les barres [lo, hi] d'une résolution dans sa vue mémoire-mappée
+    Cas courant (tick récent) : mise à jour en place de la dernière barre
+    """
+    # append_snapshot vérifie lui-même que les barres sont au moins aussi récentes
+    if len(ts) > 0 and append_snapshot(bars_dir, ts, values):
+        return
+
+    snapshot = open_snapshot(bars_dir, BAR_COLUMNS)
+    if snapshot is None:
+        write_snapshot(bars_dir, ts, values)
+        return
+
+    old_ts, old_values = snapshot
+
+    # Barres plus anciennes touchées (backfill) : fusion puis réécriture
+    keep = (old_ts < lo) | (old_ts > hi)
+    merged_ts = np.concatenate([old_ts[keep], ts])
+    order = np.argsort(merged_ts, kind='stable')
+    write_snapshot(bars_dir, merged_ts[order], {
+        col: np.concatenate([old_values[col][keep], values[col]])[order]
+        for col in BAR_COLUMNS
+    })
+
+
+def load_bars_files(bars_dir, start_ns=None, end_ns=None):
+    """Barres d'une résolution entre start_ns et end_ns, ou None si la vue n'existe pas"""
+    snapshot = open_snapshot(bars_dir, BAR_COLUMNS)
+    if snapshot is None:
+        return None
+
+    ts, values = snapshot
+    lo = np.searchsorted(ts, start_ns, side='left') if start_ns is not None else 0
+    hi = np.searchsorted(ts, end_ns, side='right') if end_ns is not None else len(ts)
+
+    return bars_frame(ts[lo:hi], {col: arr[lo:hi] for col, arr in values.items()})
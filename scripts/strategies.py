@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from metrics_engine import STRATEGY_METRICS, compute_metrics
+
 def buy_and_hold_strategy(prices, initial_capital=10000):
     """
     STRATÉGIE 1 : Buy and Hold
@@ -16,51 +18,108 @@ def buy_and_hold_strategy(prices, initial_capital=10000):
     return portfolio_value
 
 
+# ======== MOTEUR VECTORISÉ (position long / flat) ========
+
+def position_from_signals(entries, exits):
+    """
+    État de la position après chaque barre (True = long), sans boucle Python
+    entries / exits: tableaux booléens des signaux d'achat / de vente,
+    le temps sur le dernier axe (une ligne par jeu de paramètres en 2-D)
+    La position suit le dernier signal émis (forward-fill), flat au départ :
+    un achat déjà en position ou une vente hors position ne change rien.
+    """
+    entries = np.asarray(entries, dtype=bool)
+    events = entries | np.asarray(exits, dtype=bool)
+
+    # Indice du dernier signal à chaque barre (-1 si aucun)
+    last = np.where(events, np.arange(events.shape[-1]), -1)
+    np.maximum.accumulate(last, axis=-1, out=last)
+
+    return np.take_along_axis(entries, np.maximum(last, 0), axis=-1) & (last >= 0)
+
+
+def equity_from_positions(prices, position, valid, initial_capital=10000):
+    """
+    Valeur du portfolio d'une stratégie long / flat tout investi
+    prices: float64, position: état après chaque barre (voir position_from_signals),
+    valid: barres où les indicateurs sont définis (capital initial affiché sinon)
+    En 2-D, une courbe par ligne, le temps sur le dernier axe.
+    Achat et vente au prix de la barre du signal, comme les boucles d'origine.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    squeeze = prices.ndim == 1
+    prices = np.atleast_2d(prices)
+    position = np.atleast_2d(position)
+    rows = np.arange(prices.shape[0])[:, None]
+
+    previous = np.zeros_like(position)
+    previous[:, 1:] = position[:, :-1]
+    entry = position & ~previous
+    exit_ = ~position & previous
+
+    # Trades dans l'ordre (ligne, temps) ; numéro de chaque trade dans sa ligne
+    entry_rows, entry_cols = np.nonzero(entry)
+    exit_rows, exit_cols = np.nonzero(exit_)
+    entries_per_row = entry.sum(axis=1)
+    first_entry = np.concatenate([[0], np.cumsum(entries_per_row)[:-1]])
+    first_exit = np.concatenate([[0], np.cumsum(exit_.sum(axis=1))[:-1]])
+    entry_trade = np.arange(len(entry_rows)) - first_entry[entry_rows]
+    exit_trade = np.arange(len(exit_rows)) - first_exit[exit_rows]
+
+    # Cash disponible avant chaque trade : capital composé trade par trade
+    entry_prices = prices[entry_rows, entry_cols]
+    growth = np.ones((len(prices), entries_per_row.max(initial=0)))
+    growth[exit_rows, exit_trade] = (
+        prices[exit_rows, exit_cols] / entry_prices[first_entry[exit_rows] + exit_trade]
+    )
+    cash = initial_capital * np.concatenate([np.ones((len(prices), 1)), np.cumprod(growth, axis=1)], axis=1)
+
+    values = cash[rows, np.cumsum(exit_, axis=1)]
+    if len(entry_rows) > 0:
+        shares = cash[entry_rows, entry_trade] / entry_prices
+        trade = np.minimum(first_entry[:, None] + np.maximum(np.cumsum(entry, axis=1) - 1, 0), len(shares) - 1)
+        values = np.where(position, shares[trade] * prices, values)
+
+    values[~np.atleast_2d(np.asarray(valid, dtype=bool))] = initial_capital
+    return values[0] if squeeze else values
+
+
+def buy_and_hold_position(prices):
+    """Position de Buy and Hold : long dès la première barre"""
+    position = np.ones(len(prices), dtype=bool)
+    return position, position
+
+
+def ma_crossover_position(prices, short_window=20, long_window=50):
+    """Position (True = long) et barres où les indicateurs sont définis, MA Crossover"""
+    # Calculer les moyennes mobiles
+    short_ma = prices.rolling(window=short_window).mean().to_numpy()
+    long_ma = prices.rolling(window=long_window).mean().to_numpy()
+
+    # Signaux (les comparaisons avec NaN sont fausses : pas de signal)
+    position = position_from_signals(short_ma > long_ma, short_ma < long_ma)
+    valid = ~(np.isnan(short_ma) | np.isnan(long_ma))
+    return position, valid
+
+
+def momentum_position(prices, window=14):
+    """Position (True = long) et barres où la moyenne est définie, Simple Momentum"""
+    price_values = prices.to_numpy(dtype=np.float64)
+    ma = prices.rolling(window=window).mean().to_numpy()
+
+    position = position_from_signals(price_values > ma, price_values < ma)
+    return position, ~np.isnan(ma)
+
+
 def moving_average_crossover_strategy(prices, short_window=20, long_window=50, initial_capital=10000):
     """
     STRATÉGIE 2 : Moving Average Crossover (Momentum)
     Achète quand MA courte > MA longue
     Vend quand MA courte < MA longue
     """
-    # Calculer les moyennes mobiles
-    short_ma = prices.rolling(window=short_window).mean()
-    long_ma = prices.rolling(window=long_window).mean()
-    
-    # Variables de position
-    cash = initial_capital
-    shares = 0
-    position = 0  # 0 = pas de position, 1 = position longue
-    
-    portfolio_values = []
-    
-    for i in range(len(prices)):
-        current_price = prices.iloc[i]
-        current_short_ma = short_ma.iloc[i]
-        current_long_ma = long_ma.iloc[i]
-        
-        # Si pas assez de données pour les MA
-        if pd.isna(current_short_ma) or pd.isna(current_long_ma):
-            portfolio_values.append(initial_capital)
-            continue
-        
-        # SIGNAL D'ACHAT : MA courte croise au-dessus de MA longue
-        if current_short_ma > current_long_ma and position == 0:
-            shares = cash / current_price
-            cash = 0
-            position = 1
-            # print(f"📈 ACHAT à ${current_price:.2f}")
-        
-        # SIGNAL DE VENTE : MA courte croise en-dessous de MA longue
-        elif current_short_ma < current_long_ma and position == 1:
-            cash = shares * current_price
-            shares = 0
-            position = 0
-            # print(f"📉 VENTE à ${current_price:.2f}")
-        
-        # Valeur actuelle du portfolio
-        portfolio_value = cash + (shares * current_price)
-        portfolio_values.append(portfolio_value)
-    
+    position, valid = ma_crossover_position(prices, short_window, long_window)
+
+    portfolio_values = equity_from_positions(prices.to_numpy(), position, valid, initial_capital)
     return pd.Series(portfolio_values, index=prices.index)
 
 
@@ -70,42 +129,261 @@ def simple_momentum_strategy(prices, window=14, initial_capital=10000):
     Achète si prix > moyenne mobile
     Vend si prix < moyenne mobile
     """
-    ma = prices.rolling(window=window).mean()
-    
-    cash = initial_capital
-    shares = 0
-    position = 0
-    
-    portfolio_values = []
-    
-    for i in range(len(prices)):
-        current_price = prices.iloc[i]
-        current_ma = ma.iloc[i]
-        
-        if pd.isna(current_ma):
-            portfolio_values.append(initial_capital)
-            continue
-        
-        # ACHAT : prix au-dessus de la moyenne
-        if current_price > current_ma and position == 0:
-            shares = cash / current_price
-            cash = 0
-            position = 1
-        
-        # VENTE : prix en-dessous de la moyenne
-        elif current_price < current_ma and position == 1:
-            cash = shares * current_price
-            shares = 0
-            position = 0
-        
-        portfolio_value = cash + (shares * current_price)
-        portfolio_values.append(portfolio_value)
-    
+    position, valid = momentum_position(prices, window)
+
+    portfolio_values = equity_from_positions(prices.to_numpy(dtype=np.float64), position, valid, initial_capital)
     return pd.Series(portfolio_values, index=prices.index)
 
 
+# ======== BALAYAGE DES PARAMÈTRES ========
+
+# Grille par défaut : celle des sliders de la sidebar
+SWEEP_SHORT_WINDOWS = range(5, 51, 5)
+SWEEP_LONG_WINDOWS = range(20, 201, 10)
+
+# Taille max d'un bloc (combinaisons x points) évalué d'un coup
+SWEEP_CHUNK_SIZE = 2_000_000
+
+# Métriques du balayage (clés des grilles de sweep_ma_crossover)
+SWEEP_METRICS = ['sharpe_ratio', 'total_return', 'max_drawdown']
+
+
+def rolling_means(prices, windows):
+    """
+    Moyennes mobiles de plusieurs fenêtres à partir d'une seule somme cumulée
+    Retourne un tableau (fenêtres, points), NaN tant que la fenêtre n'est pas
+    pleine ou si elle contient un NaN (comme prices.rolling(window).mean())
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    valid = ~np.isnan(prices)
+
+    # Centrer sur le premier prix limite l'erreur d'arrondi de la somme cumulée
+    base = prices[valid][0] if valid.any() else 0.0
+    cumsum = np.concatenate([[0.0], np.cumsum(np.where(valid, prices - base, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+
+    means = np.full((len(windows), len(prices)), np.nan)
+    for k, window in enumerate(windows):
+        if window <= len(prices):
+            total = cumsum[window:] - cumsum[:-window]
+            full = (counts[window:] - counts[:-window]) == window
+            means[k, window - 1:] = np.where(full, total / window + base, np.nan)
+
+    return means
+
+
+def curve_metrics(equity, initial_capital=10000):
+    """
+    Sharpe, rendement total et drawdown max de plusieurs courbes à la fois
+    equity: tableau (courbes, points), mêmes formules que calculate_metrics
+    """
+    return compute_metrics(equity, initial_capital, SWEEP_METRICS)
+
+
+def prefix_metrics(equity, ends, initial_capital=10000):
+    """
+    curve_metrics de chaque préfixe equity[:, :end] en une passe (fenêtres ancrées)
+    Retourne {métrique: tableau (courbes, len(ends))}
+    La variance vient des sommes cumulées des rendements et de leurs carrés :
+    égale à curve_metrics aux arrondis près.
+    """
+    ends = np.asarray(ends)
+    returns = equity[:, 1:] / equity[:, :-1] - 1
+    sums = np.cumsum(returns, axis=1)[:, ends - 2]
+    squares = np.cumsum(returns ** 2, axis=1)[:, ends - 2]
+
+    count = ends - 1
+    mean = sums / count
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std = np.sqrt(np.maximum(squares - count * mean ** 2, 0) / (count - 1))
+        sharpe_ratio = np.where(std != 0, mean / std * np.sqrt(24 * 365), 0.0)
+
+    cumulative = equity / equity[:, :1]
+    drawdown = cumulative / np.maximum.accumulate(cumulative, axis=1) - 1
+
+    return {
+        'sharpe_ratio': sharpe_ratio,
+        'total_return': (equity[:, ends - 1] - initial_capital) / initial_capital * 100,
+        'max_drawdown': np.minimum.accumulate(drawdown, axis=1)[:, ends - 1] * 100
+    }
+
+
+def price_growth(prices):
+    """Rendement brut de chaque barre, p[i] / p[i-1] (prix manquants : dernier prix connu)"""
+    prices = np.asarray(prices, dtype=np.float64)
+    filled = pd.Series(prices).ffill().to_numpy()
+
+    growth = np.ones(len(prices))
+    if len(prices) > 1:
+        growth[1:] = np.nan_to_num(filled[1:] / filled[:-1], nan=1.0)
+    return growth
+
+
+def evaluate_grid(short_ma, long_ma, growth, short_windows, long_windows, initial_capital=10000, ends=None):
+    """
+    Métriques MA Crossover de toutes les combinaisons, moyennes déjà calculées
+    short_ma / long_ma: tableaux (fenêtres, points) de rolling_means (ou une
+    tranche de ceux-ci), growth: price_growth sur les mêmes points
+    Retourne {métrique: tableau (courtes, longues)}, NaN si courte >= longue
+    ends: longueurs de préfixes (>= 2) à évaluer dans la même passe ; le
+    tableau a alors un dernier axe de plus, un préfixe par entrée
+    """
+    n = short_ma.shape[1]
+    shape = (len(short_windows), len(long_windows)) + (() if ends is None else (len(ends),))
+    results = {name: np.full(shape, np.nan) for name in SWEEP_METRICS}
+    chunk = max(1, SWEEP_CHUNK_SIZE // max(n, 1))
+
+    # Moins de 2 points : aucun rendement, la grille reste à NaN
+    if n < 2:
+        return results
+
+    for i, short_window in enumerate(short_windows):
+        columns = [j for j, long_window in enumerate(long_windows) if short_window < long_window]
+
+        for start in range(0, len(columns), chunk):
+            block = columns[start:start + chunk]
+            short, long_ = short_ma[i], long_ma[block]
+
+            position = position_from_signals(short > long_, short < long_)
+            held = np.concatenate([np.zeros((len(block), 1), dtype=bool), position[:, :-1]], axis=1)
+
+            equity = initial_capital * np.cumprod(np.where(held, growth, 1.0), axis=1)
+            equity[np.isnan(short) | np.isnan(long_)] = initial_capital
+
+            if ends is None:
+                metrics = curve_metrics(equity, initial_capital)
+            else:
+                metrics = prefix_metrics(equity, ends, initial_capital)
+
+            for name, values in metrics.items():
+                results[name][i, block] = values
+
+    return results
+
+
+def sweep_ma_crossover(prices, short_windows=SWEEP_SHORT_WINDOWS, long_windows=SWEEP_LONG_WINDOWS,
+                       initial_capital=10000):
+    """
+    Évalue MA Crossover sur toute une grille de fenêtres en un appel
+    Toutes les moyennes mobiles viennent d'une seule somme cumulée, et les
+    fenêtres longues sont évaluées par blocs sur le moteur vectorisé 2-D.
+    Retourne {'sharpe_ratio' | 'total_return' | 'max_drawdown': DataFrame}
+    (lignes = MM courte, colonnes = MM longue, NaN si courte >= longue)
+    Les moyennes par somme cumulée peuvent différer de rolling().mean() à
+    l'arrondi près : une combinaison exactement sur un croisement peut
+    trancher différemment de moving_average_crossover_strategy.
+    """
+    short_windows, long_windows = list(short_windows), list(long_windows)
+    price_values = prices.to_numpy(dtype=np.float64)
+
+    results = evaluate_grid(
+        rolling_means(price_values, short_windows),
+        rolling_means(price_values, long_windows),
+        price_growth(price_values),
+        short_windows, long_windows, initial_capital
+    )
+
+    index = pd.Index(short_windows, name='short_window')
+    columns = pd.Index(long_windows, name='long_window')
+    return {name: pd.DataFrame(values, index=index, columns=columns) for name, values in results.items()}
+
+
+# ======== MULTI-ACTIFS (matrices temps × actifs) ========
+
+def _equity_matrix(prices, entries, exits, valid, initial_capital):
+    """Courbes long / flat de chaque colonne (temps × actifs) en un appel"""
+    # Le moteur travaille une courbe par ligne, le temps sur le dernier axe
+    position = position_from_signals(entries.T, exits.T)
+    return equity_from_positions(prices.T, position, valid.T, initial_capital).T
+
+
+def buy_and_hold_matrix(prices, initial_capital=10000):
+    """STRATÉGIE 1 sur chaque colonne d'une matrice de prix (temps × actifs)"""
+    values = prices.to_numpy(dtype=np.float64)
+    return initial_capital / values[0] * values
+
+
+def moving_average_crossover_matrix(prices, short_window=20, long_window=50, initial_capital=10000):
+    """STRATÉGIE 2 sur chaque colonne d'une matrice de prix (temps × actifs)"""
+    short_ma = prices.rolling(window=short_window).mean().to_numpy()
+    long_ma = prices.rolling(window=long_window).mean().to_numpy()
+
+    valid = ~(np.isnan(short_ma) | np.isnan(long_ma))
+    return _equity_matrix(prices.to_numpy(dtype=np.float64), short_ma > long_ma, short_ma < long_ma,
+                          valid, initial_capital)
+
+
+def simple_momentum_matrix(prices, window=14, initial_capital=10000):
+    """STRATÉGIE 3 sur chaque colonne d'une matrice de prix (temps × actifs)"""
+    values = prices.to_numpy(dtype=np.float64)
+    ma = prices.rolling(window=window).mean().to_numpy()
+
+    return _equity_matrix(values, values > ma, values < ma, ~np.isnan(ma), initial_capital)
+
+
+# Mêmes noms que STRATEGIES
+MATRIX_STRATEGIES = {
+    'buy_and_hold': buy_and_hold_matrix,
+    'ma_crossover': moving_average_crossover_matrix,
+    'momentum': simple_momentum_matrix
+}
+
+
+def backtest_matrix(prices, strategy, initial_capital=10000, **kwargs):
+    """
+    Backtest d'une stratégie sur tous les actifs à la fois
+    prices: DataFrame temps × actifs (une colonne de prix par actif)
+    strategy: nom dans MATRIX_STRATEGIES
+    Retourne (DataFrame des valeurs du portfolio, métriques par actif)
+    Mêmes positions que la stratégie appliquée colonne par colonne, valeurs
+    identiques aux arrondis flottants près.
+    """
+    if strategy not in MATRIX_STRATEGIES:
+        raise ValueError(f"Stratégie inconnue : {strategy} (disponibles : {', '.join(MATRIX_STRATEGIES)})")
+
+    equity = pd.DataFrame(
+        MATRIX_STRATEGIES[strategy](prices, initial_capital=initial_capital, **kwargs),
+        index=prices.index, columns=prices.columns
+    )
+    return equity, calculate_metrics_matrix(equity, initial_capital)
+
+
 # ======== BACKTESTING ========
 
+def rule_strategy(prices, rules, initial_capital=10000):
+    """
+    Stratégie décrite par des règles déclaratives (voir strategy_dsl.py)
+    ex. rules="enter when close > sma(14); exit when close < sma(14)"
+    """
+    # Import local : strategy_dsl s'appuie sur le moteur vectorisé de ce module
+    from strategy_dsl import rule_strategy as run_rules
+    return run_rules(prices, rules, initial_capital)
+
+
+def rule_position(prices, rules):
+    """Position et barres exploitables d'une stratégie à règles (voir strategy_dsl.py)"""
+    from strategy_dsl import compile_rules
+    entries, exits, valid = compile_rules(rules).signals(prices)['rules']
+    return position_from_signals(entries, exits), valid
+
+
+# Stratégies disponibles par nom (runner batch, fichiers d'expérience)
+STRATEGIES = {
+    'buy_and_hold': buy_and_hold_strategy,
+    'ma_crossover': moving_average_crossover_strategy,
+    'momentum': simple_momentum_strategy,
+    'rules': rule_strategy
+}
+
+# Positions des mêmes stratégies (journal des trades), mêmes paramètres sans le capital
+STRATEGY_POSITIONS = {
+    'buy_and_hold': buy_and_hold_position,
+    'ma_crossover': ma_crossover_position,
+    'momentum': momentum_position,
+    'rules': rule_position
+}
+
+
 def backtest_strategy(prices, strategy_func, **kwargs):
     """
     Exécute le backtesting d'une stratégie
@@ -115,59 +393,122 @@ def backtest_strategy(prices, strategy_func, **kwargs):
     return portfolio_values
 
 
+# ======== JOURNAL DES TRADES ========
+
+def trade_ledger(prices, position, timestamps=None, initial_capital=10000):
+    """
+    Journal des trades d'une position long / flat, sans boucle Python
+    Les trades sont les changements de position : entrée et sortie au prix de la
+    barre du signal, capital réinvesti d'un trade à l'autre (comme equity_from_positions).
+    Un trade encore ouvert est valorisé au dernier prix (open = True).
+    timestamps: dates des barres (défaut : index de prices)
+    Retourne un DataFrame, un trade par ligne : entry_time, exit_time,
+    entry_price, exit_price, shares, pnl, return_pct, bars, duration, open
+    """
+    price_values = np.asarray(prices, dtype=np.float64)
+    position = np.asarray(position, dtype=bool)
+    if timestamps is None:
+        timestamps = prices.index if hasattr(prices, 'index') else np.arange(len(price_values))
+    timestamps = pd.Index(timestamps)
+
+    previous = np.concatenate([[False], position[:-1]])
+    entry_bars = np.flatnonzero(position & ~previous)
+    exit_bars = np.flatnonzero(~position & previous)
+
+    # Position encore ouverte : sortie fictive sur la dernière barre
+    is_open = np.zeros(len(entry_bars), dtype=bool)
+    if len(exit_bars) < len(entry_bars):
+        exit_bars = np.append(exit_bars, len(price_values) - 1)
+        is_open[-1] = True
+
+    entry_prices = price_values[entry_bars]
+    exit_prices = price_values[exit_bars]
+    growth = exit_prices / entry_prices
+
+    # Capital engagé à chaque trade : capital initial composé des trades précédents
+    capital = initial_capital * np.concatenate([[1.0], np.cumprod(growth)[:-1]])
+    shares = capital / entry_prices
+
+    entry_times = timestamps[entry_bars]
+    exit_times = timestamps[exit_bars]
+
+    return pd.DataFrame({
+        'entry_time': entry_times,
+        'exit_time': exit_times,
+        'entry_price': entry_prices,
+        'exit_price': exit_prices,
+        'shares': shares,
+        'pnl': shares * exit_prices - capital,
+        'return_pct': (growth - 1) * 100,
+        'bars': exit_bars - entry_bars,
+        'duration': exit_times - entry_times,
+        'open': is_open
+    })
+
+
+def backtest_trades(prices, strategy, initial_capital=10000, timestamps=None, **kwargs):
+    """
+    Journal des trades d'une stratégie de STRATEGY_POSITIONS
+    prices: Series de prix (ou DataFrame de barres pour 'rules'), kwargs: paramètres de la stratégie
+    """
+    if strategy not in STRATEGY_POSITIONS:
+        raise ValueError(f"Stratégie inconnue : {strategy} (disponibles : {', '.join(STRATEGY_POSITIONS)})")
+
+    position, _ = STRATEGY_POSITIONS[strategy](prices, **kwargs)
+    if isinstance(prices, pd.DataFrame):
+        prices = prices['close'] if 'close' in prices.columns else prices['price']
+    return trade_ledger(prices, position, timestamps, initial_capital)
+
+
+def trade_statistics(ledger):
+    """
+    Statistiques par trade d'un journal (trade_ledger), trade ouvert compris
+    win_rate : part des trades gagnants (et non des barres, comme dans calculate_metrics)
+    """
+    pnl = ledger['pnl'].to_numpy()
+    returns = ledger['return_pct'].to_numpy()
+    wins = pnl > 0
+    losses = pnl < 0
+
+    gains = pnl[wins].sum()
+    lost = -pnl[losses].sum()
+
+    # Plus longue série de pertes : longueurs des plages de trades perdants
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], losses.astype(np.int8), [0]])))
+    streaks = edges[1::2] - edges[::2]
+
+    return {
+        'trades': len(ledger),
+        'open_trades': int(ledger['open'].sum()),
+        'win_rate': wins.mean() * 100 if len(pnl) > 0 else 0,
+        'avg_return': returns.mean() if len(returns) > 0 else 0,
+        'avg_win': returns[wins].mean() if wins.any() else 0,
+        'avg_loss': returns[losses].mean() if losses.any() else 0,
+        'best_trade': returns.max() if len(returns) > 0 else 0,
+        'worst_trade': returns.min() if len(returns) > 0 else 0,
+        'profit_factor': gains / lost if lost != 0 else np.inf,
+        'expectancy': pnl.mean() if len(pnl) > 0 else 0,
+        'avg_bars': ledger['bars'].mean() if len(ledger) > 0 else 0,
+        'max_consecutive_losses': int(streaks.max(initial=0))
+    }
+
+
 # ======== MÉTRIQUES ========
 
 def calculate_metrics(portfolio_values, initial_capital=10000):
     """
     ÉTAPE 5 : Calculer tous les indicateurs & métriques
+    (moteur commun : metrics_engine.compute_metrics)
     """
-    # Rendements
-    returns = portfolio_values.pct_change().dropna()
-    
-    # 1. RENDEMENT TOTAL
-    final_value = portfolio_values.iloc[-1]
-    total_return = ((final_value - initial_capital) / initial_capital) * 100
-    
-    # 2. RENDEMENT ANNUALISÉ (approximation sur 30 jours)
-    days = len(portfolio_values) / 24  # Données horaires -> jours
-    annual_return = ((final_value / initial_capital) ** (365 / days) - 1) * 100
-    
-    # 3. VOLATILITÉ (écart-type des rendements annualisé)
-    volatility = returns.std() * np.sqrt(24 * 365) * 100  # Annualisé
-    
-    # 4. MAX DRAWDOWN (perte maximale depuis le plus haut)
-    cumulative = portfolio_values / portfolio_values.iloc[0]
-    running_max = cumulative.cummax()
-    drawdown = (cumulative - running_max) / running_max
-    max_drawdown = drawdown.min() * 100
-    
-    # 5. SHARPE RATIO (rendement ajusté au risque)
-    # On suppose un taux sans risque de 0% pour simplifier
-    if returns.std() != 0:
-        sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(24 * 365)
-    else:
-        sharpe_ratio = 0
-    
-    # 6. WIN RATE (pourcentage de trades gagnants)
-    winning_trades = (returns > 0).sum()
-    total_trades = len(returns)
-    win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-    
-    # 7. PROFIT FACTOR
-    gains = returns[returns > 0].sum()
-    losses = abs(returns[returns < 0].sum())
-    profit_factor = gains / losses if losses != 0 else np.inf
-    
-    return {
-        'total_return': total_return,
-        'annual_return': annual_return,
-        'volatility': volatility,
-        'max_drawdown': max_drawdown,
-        'sharpe_ratio': sharpe_ratio,
-        'win_rate': win_rate,
-        'profit_factor': profit_factor,
-        'final_value': final_value
-    }
+    return compute_metrics(portfolio_values, initial_capital, STRATEGY_METRICS)
+
+
+def calculate_metrics_matrix(portfolio_values, initial_capital=10000):
+    """
+    calculate_metrics pour chaque colonne d'un DataFrame de valeurs (temps × actifs)
+    Retourne un DataFrame : une ligne par actif, une colonne par métrique
+    """
+    return compute_metrics(portfolio_values, initial_capital, STRATEGY_METRICS)
 
 
 def print_metrics(metrics, strategy_name):
@@ -192,8 +533,9 @@ def print_metrics(metrics, strategy_name):
 
 if __name__ == "__main__":
     # Charger les données
-    df = pd.read_csv('data/bitcoin_prices.csv')
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    from price_store import load
+
+    df = load('BTC', columns=['price'])
     prices = df['price']
     
     print(f"📊 Données chargées : {len(prices)} points")
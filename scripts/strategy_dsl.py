@@ -0,0 +1,516 @@
+"""
+Stratégies déclaratives : règles compilées en calcul vectorisé
+
+Une stratégie long / flat s'écrit en règles d'entrée et de sortie, une par
+ligne ou séparées par « ; » :
+
+    enter when close > sma(14)
+    exit when close < sma(14)
+
+Plusieurs règles « enter » (ou « exit ») se combinent en « ou ». Sans règle
+« exit », la position n'est jamais soldée.
+
+Expressions :
+    - séries : close (ou price), open, high, low (barres OHLC uniquement)
+    - nombres, + - * /, parenthèses
+    - comparaisons : > < >= <= == !=, a crosses above b, a crosses below b
+    - logique : and, or, not
+    - indicateurs (fenêtre entière, sur close par défaut) : sma(14),
+      ema(close, 20), std(20), rsi(14), highest(20), lowest(20),
+      lag(1), change(24) (variation en %)
+
+Compilation : chaque règle devient un arbre d'expressions, puis une liste
+d'instructions NumPy sans doublons. Une sous-expression (un indicateur le plus
+souvent) utilisée par plusieurs règles, ou par plusieurs stratégies compilées
+ensemble, n'est calculée qu'une fois. Les positions passent ensuite par le
+moteur vectorisé de strategies.py, comme les stratégies intégrées.
+
+Comme dans les stratégies intégrées, le portfolio reste au capital initial tant
+que les indicateurs ne sont pas tous définis, et rien ne se passe sur ces
+barres. Si l'entrée et la sortie sont vraies sur la même barre, la sortie
+l'emporte.
+
+Stratégies utilisateur : data/user_strategies.json (proposées dans le
+dashboard), au format
+    {"strategies": {"RSI 30/70": "enter when rsi(14) < 30; exit when rsi(14) > 70"}}
+
+Usage :
+    python scripts/strategy_dsl.py "enter when close > sma(14); exit when close < sma(14)" [ACTIF]
+"""
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from strategies import equity_from_positions, position_from_signals
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+USER_STRATEGIES_FILE = Path(os.environ.get('CRYPTOVISION_USER_STRATEGIES', DATA_DIR / 'user_strategies.json'))
+
+# Stratégies proposées tant que data/user_strategies.json n'existe pas
+DEFAULT_USER_STRATEGIES = {
+    'RSI 30/70': 'enter when rsi(14) < 30; exit when rsi(14) > 70',
+    'Croisement EMA 12/26': 'enter when ema(12) crosses above ema(26); exit when ema(12) crosses below ema(26)',
+    'Retour à la moyenne (Bollinger)': 'enter when close < sma(20) - 2 * std(20); exit when close > sma(20)'
+}
+
+
+# ======== INDICATEURS ========
+
+def _sma(x, window):
+    return pd.Series(x).rolling(window=window).mean().to_numpy()
+
+
+def _ema(x, window):
+    return pd.Series(x).ewm(span=window, adjust=False, min_periods=window).mean().to_numpy()
+
+
+def _std(x, window):
+    return pd.Series(x).rolling(window=window).std().to_numpy()
+
+
+def _rsi(x, window):
+    # RSI de Wilder (moyennes exponentielles de paramètre 1 / fenêtre)
+    delta = pd.Series(x).diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    return (100 - 100 / (1 + gain / loss)).to_numpy()
+
+
+def _highest(x, window):
+    return pd.Series(x).rolling(window=window).max().to_numpy()
+
+
+def _lowest(x, window):
+    return pd.Series(x).rolling(window=window).min().to_numpy()
+
+
+def _lag(x, window):
+    return pd.Series(x).shift(window).to_numpy()
+
+
+def _change(x, window):
+    return (pd.Series(x).pct_change(window, fill_method=None) * 100).to_numpy()
+
+
+INDICATORS = {
+    'sma': _sma,
+    'ema': _ema,
+    'std': _std,
+    'rsi': _rsi,
+    'highest': _highest,
+    'lowest': _lowest,
+    'lag': _lag,
+    'change': _change
+}
+
+# Séries utilisables dans les règles (close et price désignent le même prix)
+SERIES = {'close', 'price', 'open', 'high', 'low'}
+
+
+def _crosses(a, b, above):
+    # a ou b peut être une constante (ex. rsi(14) crosses above 30)
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+    crossed = np.zeros(a.shape, dtype=bool)
+    if a.ndim == 1:
+        if above:
+            crossed[1:] = (a[1:] > b[1:]) & (a[:-1] <= b[:-1])
+        else:
+            crossed[1:] = (a[1:] < b[1:]) & (a[:-1] >= b[:-1])
+    return crossed
+
+
+def _crosses_above(a, b):
+    return _crosses(a, b, above=True)
+
+
+def _crosses_below(a, b):
+    return _crosses(a, b, above=False)
+
+
+OPERATORS = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.divide,
+    'neg': np.negative,
+    '>': np.greater,
+    '<': np.less,
+    '>=': np.greater_equal,
+    '<=': np.less_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+    'crosses above': _crosses_above,
+    'crosses below': _crosses_below,
+    'and': np.logical_and,
+    'or': np.logical_or,
+    'not': np.logical_not
+}
+
+COMPARISONS = {'>', '<', '>=', '<=', '==', '!=', 'crosses above', 'crosses below'}
+LOGICAL = {'and', 'or', 'not'}
+
+
+# ======== ANALYSE DES RÈGLES ========
+#
+# Noeuds : tuples (genre, nom, enfants, paramètre), hashables et comparables,
+# donc deux sous-expressions identiques sont le même noeud.
+#     ('const', None, (), valeur)      ('var', 'close', (), None)
+#     ('call', 'sma', (x,), 14)        ('op', '>', (a, b), None)
+
+TOKEN_RE = re.compile(r"\s*(?:(\d+(?:\.\d*)?|\.\d+)|([A-Za-z_]\w*)|(>=|<=|==|!=|[-+*/<>(),]))")
+
+
+def _tokenize(rule):
+    tokens, pos = [], 0
+    rule = rule.strip()
+    while pos < len(rule):
+        match = TOKEN_RE.match(rule, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Caractère inattendu : {rule[pos:].strip()[:10]!r}")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(('number', float(number)))
+        elif name is not None:
+            tokens.append(('name', name.lower()))
+        else:
+            tokens.append(('symbol', symbol))
+        pos = match.end()
+    return tokens
+
+
+def _is_boolean(node):
+    return node[0] == 'op' and (node[1] in COMPARISONS or node[1] in LOGICAL)
+
+
+class _Parser:
+    """Descente récursive sur les tokens d'une règle"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset]
+        return (None, None)
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.pos += 1
+            return token
+        return None
+
+    def expect(self, kind, value=None):
+        token = self.accept(kind, value)
+        if token is None:
+            found = self.peek()[1]
+            expected = value or {'name': 'une valeur', 'number': 'un nombre'}.get(kind, kind)
+            raise ValueError(f"« {expected} » attendu, trouvé « {found if found is not None else 'fin de règle'} »")
+        return token
+
+    def end(self):
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Texte inattendu après la règle : « {self.peek()[1]} »")
+
+    def _logical(self, op, *operands):
+        if not all(_is_boolean(x) for x in operands):
+            raise ValueError(f"« {op} » porte sur des conditions, pas sur des valeurs")
+        return ('op', op, operands, None)
+
+    def _numeric(self, op, *operands):
+        if any(_is_boolean(x) for x in operands):
+            raise ValueError(f"« {op} » porte sur des valeurs, pas sur des conditions")
+        return ('op', op, operands, None)
+
+    def condition(self):
+        node = self.conjunction()
+        while self.accept('name', 'or'):
+            node = self._logical('or', node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.accept('name', 'and'):
+            node = self._logical('and', node, self.negation())
+        return node
+
+    def negation(self):
+        if self.accept('name', 'not'):
+            return self._logical('not', self.negation())
+        return self.comparison()
+
+    def comparison(self):
+        left = self.sum()
+        if self.accept('name', 'crosses'):
+            direction = self.accept('name', 'above') or self.expect('name', 'below')
+            return self._numeric(f'crosses {direction[1]}', left, self.sum())
+        for op in ('>=', '<=', '==', '!=', '>', '<'):
+            if self.accept('symbol', op):
+                return self._numeric(op, left, self.sum())
+        return left
+
+    def sum(self):
+        node = self.product()
+        while self.peek() in (('symbol', '+'), ('symbol', '-')):
+            op = self.peek()[1]
+            self.pos += 1
+            node = self._numeric(op, node, self.product())
+        return node
+
+    def product(self):
+        node = self.unary()
+        while self.peek() in (('symbol', '*'), ('symbol', '/')):
+            op = self.peek()[1]
+            self.pos += 1
+            node = self._numeric(op, node, self.unary())
+        return node
+
+    def unary(self):
+        if self.accept('symbol', '-'):
+            node = self.unary()
+            if node[0] == 'const':
+                return ('const', None, (), -node[3])
+            return self._numeric('neg', node)
+        return self.atom()
+
+    def atom(self):
+        token = self.accept('number')
+        if token:
+            return ('const', None, (), token[1])
+
+        if self.accept('symbol', '('):
+            node = self.condition()
+            self.expect('symbol', ')')
+            return node
+
+        name = self.expect('name')[1]
+        if name in INDICATORS:
+            return self.call(name)
+        if name in SERIES:
+            # close et price : même série, même noeud
+            return ('var', 'close' if name == 'price' else name, (), None)
+        raise ValueError(f"Nom inconnu : {name}")
+
+    def call(self, name):
+        """indicateur(fenêtre) ou indicateur(série, fenêtre)"""
+        self.expect('symbol', '(')
+        args = [self.sum()]
+        while self.accept('symbol', ','):
+            args.append(self.sum())
+        self.expect('symbol', ')')
+
+        if len(args) == 1:
+            args.insert(0, ('var', 'close', (), None))
+        if len(args) != 2:
+            raise ValueError(f"{name}() prend une fenêtre, éventuellement précédée d'une série")
+
+        series, window = args
+        if window[0] != 'const' or window[3] != int(window[3]) or window[3] < 1:
+            raise ValueError(f"La fenêtre de {name}() doit être un entier >= 1")
+        if _is_boolean(series):
+            raise ValueError(f"{name}() porte sur une série de valeurs, pas sur une condition")
+        return ('call', name, (series,), int(window[3]))
+
+
+def parse_rules(text):
+    """
+    Analyse un texte de règles
+    Retourne {'enter': noeud, 'exit': noeud ou None} (règles de même type combinées en « ou »)
+    """
+    rules = {'enter': [], 'exit': []}
+
+    for line in re.split(r'[;\n]', text):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+
+        parser = _Parser(_tokenize(line))
+        kind = parser.peek()[1]
+        if not (parser.accept('name', 'enter') or parser.accept('name', 'exit')):
+            raise ValueError(f"Une règle commence par « enter » ou « exit », pas « {kind} »")
+        parser.expect('name', 'when')
+        condition = parser.condition()
+        parser.end()
+
+        if not _is_boolean(condition):
+            raise ValueError(f"La règle « {line} » doit être une condition (comparaison)")
+        rules[kind].append(condition)
+
+    if not rules['enter']:
+        raise ValueError("Aucune règle « enter when ... »")
+
+    combined = {}
+    for kind, conditions in rules.items():
+        node = conditions[0] if conditions else None
+        for condition in conditions[1:]:
+            node = ('op', 'or', (node, condition), None)
+        combined[kind] = node
+    return combined
+
+
+# ======== COMPILATION ========
+
+class CompiledRules:
+    """
+    Une ou plusieurs stratégies compilées ensemble en une liste d'instructions
+    Chaque sous-expression distincte occupe une seule instruction : les
+    indicateurs communs aux règles et aux stratégies sont calculés une fois.
+    """
+
+    def __init__(self, strategies):
+        """strategies: {nom: texte des règles}"""
+        self.instructions = []  # noeuds dans l'ordre d'évaluation (enfants d'abord)
+        self._slots = {}        # noeud -> indice dans instructions
+        self.strategies = {}    # nom -> (entrée, sortie ou None, indicateurs)
+
+        for name, text in strategies.items():
+            rules = parse_rules(text)
+            enter = self._emit(rules['enter'])
+            exit_ = self._emit(rules['exit']) if rules['exit'] is not None else None
+            self.strategies[name] = (enter, exit_, self._indicators(rules))
+
+    def _emit(self, node):
+        if node not in self._slots:
+            for child in node[2]:
+                self._emit(child)
+            self._slots[node] = len(self.instructions)
+            self.instructions.append(node)
+        return self._slots[node]
+
+    def _indicators(self, rules):
+        """Indicateurs utilisés par une stratégie (définis = barre exploitable)"""
+        found, stack = set(), [node for node in rules.values() if node is not None]
+        while stack:
+            node = stack.pop()
+            if node[0] == 'call':
+                found.add(self._slots[node])
+            stack.extend(node[2])
+        return sorted(found)
+
+    def evaluate(self, data):
+        """
+        Exécute les instructions sur des prix (Series) ou des barres (DataFrame
+        avec close ou price, et open / high / low pour ces séries)
+        Retourne la liste des tableaux, dans l'ordre des instructions
+        """
+        values = []
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for kind, name, children, param in self.instructions:
+                args = [values[self._slots[child]] for child in children]
+                if kind == 'const':
+                    values.append(param)
+                elif kind == 'var':
+                    values.append(_series(data, name))
+                elif kind == 'call':
+                    values.append(INDICATORS[name](args[0], param))
+                else:
+                    values.append(OPERATORS[name](*args))
+
+        return values
+
+    def signals(self, data):
+        """
+        Signaux de chaque stratégie : {nom: (achats, ventes, valid)}
+        Aucun signal tant que les indicateurs ne sont pas tous définis ;
+        la sortie l'emporte si les deux règles sont vraies.
+        """
+        values = self.evaluate(data)
+        n = len(data)
+        results = {}
+
+        for name, (enter, exit_, indicators) in self.strategies.items():
+            valid = np.ones(n, dtype=bool)
+            for slot in indicators:
+                valid &= ~np.isnan(values[slot])
+
+            exits = np.broadcast_to(values[exit_], n) & valid if exit_ is not None else np.zeros(n, dtype=bool)
+            entries = np.broadcast_to(values[enter], n) & valid & ~exits
+            results[name] = (entries, exits, valid)
+
+        return results
+
+    def run(self, data, initial_capital=10000):
+        """Valeurs du portfolio de chaque stratégie : {nom: Series}"""
+        price = _series(data, 'close')
+        return {
+            name: pd.Series(
+                equity_from_positions(price, position_from_signals(entries, exits), valid, initial_capital),
+                index=data.index
+            )
+            for name, (entries, exits, valid) in self.signals(data).items()
+        }
+
+
+def _series(data, name):
+    """Série d'entrée en float64 (close et price désignent la même colonne)"""
+    if isinstance(data, pd.Series):
+        if name != 'close':
+            raise ValueError(f"« {name} » demande des barres OHLC, pas une simple série de prix")
+        return data.to_numpy(dtype=np.float64)
+
+    column = name
+    if name == 'close' and 'close' not in data.columns:
+        column = 'price'
+    if column not in data.columns:
+        raise ValueError(f"Colonne « {name} » absente des données")
+    return data[column].to_numpy(dtype=np.float64)
+
+
+@lru_cache(maxsize=128)
+def compile_rules(text):
+    """Compile (avec cache) les règles d'une seule stratégie"""
+    return CompiledRules({'rules': text})
+
+
+def rule_strategy(prices, rules, initial_capital=10000):
+    """
+    Stratégie décrite par des règles, même interface que les stratégies intégrées
+    prices: Series de prix ou DataFrame de barres
+    """
+    return compile_rules(rules).run(prices, initial_capital)['rules']
+
+
+def load_user_strategies():
+    """Stratégies utilisateur {nom: règles} (défauts si le fichier n'existe pas)"""
+    if not USER_STRATEGIES_FILE.exists():
+        return dict(DEFAULT_USER_STRATEGIES)
+    with open(USER_STRATEGIES_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)['strategies']
+
+
+if __name__ == "__main__":
+    from price_store import load
+    from strategies import calculate_metrics, print_metrics
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    rules = sys.argv[1]
+    asset = sys.argv[2] if len(sys.argv) > 2 else 'BTC'
+
+    compiled = compile_rules(rules)
+    print(f"🧩 Règles compilées : {len(compiled.instructions)} instructions")
+    for i, (kind, name, children, param) in enumerate(compiled.instructions):
+        operands = ', '.join(f'#{compiled._slots[child]}' for child in children)
+        if kind == 'const':
+            label = param
+        elif kind == 'var':
+            label = name
+        elif kind == 'call':
+            label = f"{name}({operands}, {param})"
+        else:
+            label = f"{name}({operands})"
+        print(f"   #{i:<3} {label}")
+
+    df = load(asset, columns=['price'])
+    portfolio_values = rule_strategy(df['price'], rules)
+    print_metrics(calculate_metrics(portfolio_values, 10000), f"Règles sur {asset}")
@@ -0,0 +1,356 @@
+"""
+Backend SQLite (optionnel) pour l'historique des prix
+
+Une seule table de ticks, indexée par (asset, timestamp) : une requête sur
+les dernières 24h ne lit que les lignes de ces 24h, quelle que soit la
+taille de l'historique. Le journal WAL permet au daemon d'écrire pendant
+que le dashboard et les rapports lisent.
+
+Activé par la variable d'environnement CRYPTOVISION_STORE=sqlite
+(voir price_store.py, qui reste le point d'entrée des lecteurs et écrivains).
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+# Hors de data/store : ce dossier appartient au store fichiers
+DB_FILE = Path(os.environ.get('CRYPTOVISION_TICK_DB', DATA_DIR / 'ticks.db'))
+
+# Colonnes de valeurs stockées (les autres sont ignorées)
+VALUE_COLUMNS = ['price', 'change_24h']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticks (
+    asset      TEXT    NOT NULL,
+    timestamp  INTEGER NOT NULL,  -- nanosecondes depuis epoch
+    price      REAL,
+    change_24h REAL,
+    PRIMARY KEY (asset, timestamp)
+) WITHOUT ROWID;
+
+-- Barres OHLC pré-agrégées (voir rollups.py)
+CREATE TABLE IF NOT EXISTS bars (
+    asset      TEXT    NOT NULL,
+    resolution TEXT    NOT NULL,
+    bucket     INTEGER NOT NULL,  -- début de la barre, nanosecondes
+    open       REAL,
+    high       REAL,
+    low        REAL,
+    close      REAL,
+    count      INTEGER,
+    sum        REAL,
+    PRIMARY KEY (asset, resolution, bucket)
+) WITHOUT ROWID;
+
+-- Incrémenté à chaque écriture : invalide les vues larges en cache
+CREATE TABLE IF NOT EXISTS asset_versions (
+    asset   TEXT    PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+-- Actifs dont les barres ont été construites (même vides ou élaguées depuis)
+CREATE TABLE IF NOT EXISTS rollups_built (
+    asset TEXT PRIMARY KEY
+);
+
+-- Drapeaux de la base (ex. migration depuis le store fichiers terminée)
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Une connexion par thread (Streamlit sert chaque session dans un thread)
+_local = threading.local()
+
+
+def get_connection():
+    """Connexion SQLite du thread courant (créée et configurée au premier appel)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        DB_FILE.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(DB_FILE, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def close_connection():
+    """Ferme la connexion du thread courant"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def _to_ns(timestamp):
+    """Convertit un horodatage en int64 nanosecondes"""
+    return pd.Timestamp(timestamp).value
+
+
+def _rows(asset, df):
+    """Lignes (asset, timestamp, price, change_24h) à insérer, NaN → NULL"""
+    ts = pd.to_datetime(df['timestamp']).values.astype('datetime64[ns]').astype(np.int64)
+
+    columns = []
+    for col in VALUE_COLUMNS:
+        if col in df.columns:
+            values = df[col].to_numpy(dtype=np.float64).astype(object)
+            values[pd.isna(values)] = None
+        else:
+            values = [None] * len(df)
+        columns.append(values)
+
+    return zip([asset] * len(df), ts.tolist(), *columns)
+
+
+def append_many(frames):
+    """
+    Insère les lignes de plusieurs actifs en une seule transaction
+    frames: dict {actif: DataFrame ou dict d'une ligne} avec 'timestamp'
+    En cas de doublon (asset, timestamp), la nouvelle valeur gagne.
+    Retourne le nombre de lignes reçues
+    """
+    conn = get_connection()
+    count = 0
+
+    with conn:
+        for asset, df in frames.items():
+            if isinstance(df, dict):
+                df = pd.DataFrame([df])
+            if len(df) == 0:
+                continue
+
+            conn.executemany(
+                """
+                INSERT INTO ticks (asset, timestamp, price, change_24h)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (asset, timestamp) DO UPDATE SET
+                    price = excluded.price,
+                    change_24h = excluded.change_24h
+                """,
+                _rows(asset, df)
+            )
+            _bump_version(conn, asset)
+            count += len(df)
+
+    return count
+
+
+def append(asset, df):
+    """Insère les lignes d'un actif (voir append_many)"""
+    return append_many({asset: df})
+
+
+def load(asset, start=None, end=None, columns=None):
+    """
+    Lignes d'un actif entre start et end (inclus), via l'index (asset, timestamp)
+    Retourne un DataFrame [timestamp, ...colonnes], trié par timestamp
+    """
+    columns = list(columns) if columns is not None else list(VALUE_COLUMNS)
+    selected = [col for col in columns if col in VALUE_COLUMNS]
+
+    query = f"SELECT timestamp{''.join(', ' + col for col in selected)} FROM ticks WHERE asset = ?"
+    params = [asset]
+
+    if start is not None:
+        query += " AND timestamp >= ?"
+        params.append(_to_ns(start))
+    if end is not None:
+        query += " AND timestamp <= ?"
+        params.append(_to_ns(end))
+
+    query += " ORDER BY timestamp"
+
+    rows = get_connection().execute(query, params).fetchall()
+
+    df = pd.DataFrame({
+        'timestamp': np.array([row[0] for row in rows], dtype=np.int64).view('datetime64[ns]')
+    })
+    for i, col in enumerate(selected, start=1):
+        df[col] = np.array([row[i] for row in rows], dtype=np.float64)
+
+    # Colonne demandée mais non stockée : NaN, comme le store fichiers
+    for col in columns:
+        if col not in df.columns:
+            df[col] = np.nan
+
+    return df
+
+
+def _bump_version(conn, asset):
+    """Incrémente le compteur d'écritures d'un actif (dans la transaction en cours)"""
+    conn.execute(
+        """
+        INSERT INTO asset_versions (asset, version) VALUES (?, 1)
+        ON CONFLICT (asset) DO UPDATE SET version = version + 1
+        """,
+        (asset,)
+    )
+
+
+def oldest_timestamp(asset):
+    """Plus ancien timestamp brut d'un actif (ns), ou None"""
+    row = get_connection().execute(
+        "SELECT MIN(timestamp) FROM ticks WHERE asset = ?", (asset,)
+    ).fetchone()
+    return row[0]
+
+
+def delete_range(asset, start_ns, end_ns):
+    """Supprime les ticks d'un actif entre start_ns et end_ns (inclus)"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute(
+            "DELETE FROM ticks WHERE asset = ? AND timestamp BETWEEN ? AND ?",
+            (asset, int(start_ns), int(end_ns))
+        )
+        _bump_version(conn, asset)
+    return cursor.rowcount
+
+
+def delete_bars_before(asset, resolution, before_ns):
+    """Supprime les barres d'une résolution qui commencent avant before_ns"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute(
+            "DELETE FROM bars WHERE asset = ? AND resolution = ? AND bucket < ?",
+            (asset, resolution, int(before_ns))
+        )
+    return cursor.rowcount
+
+
+def asset_version(asset):
+    """Compteur d'écritures d'un actif (0 s'il n'a jamais été écrit)"""
+    row = get_connection().execute(
+        "SELECT version FROM asset_versions WHERE asset = ?", (asset,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def replace_bars(asset, updates):
+    """
+    Remplace des plages de barres, toutes résolutions dans une transaction
+    updates: {résolution: (lo, hi, débuts des barres, {colonne: valeurs})}
+    """
+    conn = get_connection()
+
+    with conn:
+        for resolution, (lo, hi, ts, values) in updates.items():
+            conn.execute(
+                "DELETE FROM bars WHERE asset = ? AND resolution = ? AND bucket BETWEEN ? AND ?",
+                (asset, resolution, int(lo), int(hi))
+            )
+            conn.executemany(
+                """
+                INSERT INTO bars (asset, resolution, bucket, open, high, low, close, count, sum)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                zip(
+                    [asset] * len(ts), [resolution] * len(ts), ts.tolist(),
+                    values['open'].tolist(), values['high'].tolist(), values['low'].tolist(),
+                    values['close'].tolist(), values['count'].astype(np.int64).tolist(),
+                    values['sum'].tolist()
+                )
+            )
+
+
+def rollups_built(asset):
+    """True si les barres de l'actif ont été construites (voir mark_rollups_built)"""
+    row = get_connection().execute(
+        "SELECT 1 FROM rollups_built WHERE asset = ?", (asset,)
+    ).fetchone()
+    return row is not None
+
+
+def mark_rollups_built(asset):
+    """Enregistre que les barres de l'actif sont construites"""
+    conn = get_connection()
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO rollups_built (asset) VALUES (?)", (asset,))
+
+
+def migration_done():
+    """True si la migration vers SQLite est allée jusqu'au bout (voir mark_migration_done)"""
+    row = get_connection().execute(
+        "SELECT 1 FROM store_meta WHERE key = 'migrated'"
+    ).fetchone()
+    return row is not None
+
+
+def mark_migration_done():
+    """Enregistre la fin de la migration, une fois le dernier actif copié"""
+    conn = get_connection()
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('migrated', '1')")
+
+
+def oldest_bar(asset, resolution):
+    """Début de la plus ancienne barre d'une résolution (ns), ou None"""
+    row = get_connection().execute(
+        "SELECT MIN(bucket) FROM bars WHERE asset = ? AND resolution = ?", (asset, resolution)
+    ).fetchone()
+    return row[0]
+
+
+def load_bars(asset, resolution, start=None, end=None):
+    """
+    Barres d'un actif entre start et end (début de barre inclus)
+    Retourne (débuts des barres int64, {colonne: valeurs})
+    """
+    query = """
+        SELECT bucket, open, high, low, close, count, sum FROM bars
+        WHERE asset = ? AND resolution = ?
+    """
+    params = [asset, resolution]
+
+    if start is not None:
+        query += " AND bucket >= ?"
+        params.append(_to_ns(start))
+    if end is not None:
+        query += " AND bucket <= ?"
+        params.append(_to_ns(end))
+
+    rows = get_connection().execute(query + " ORDER BY bucket", params).fetchall()
+
+    ts = np.array([row[0] for row in rows], dtype=np.int64)
+    values = {
+        col: np.array([row[i] for row in rows], dtype=np.float64)
+        for i, col in enumerate(['open', 'high', 'low', 'close', 'count', 'sum'], start=1)
+    }
+    return ts, values
+
+
+def list_assets():
+    """Actifs présents dans la base"""
+    rows = get_connection().execute(
+        # Parcours de l'index : un saut par actif plutôt qu'un scan complet
+        """
+        WITH RECURSIVE assets(asset) AS (
+            SELECT MIN(asset) FROM ticks
+            UNION ALL
+            SELECT (SELECT MIN(asset) FROM ticks WHERE asset > assets.asset)
+            FROM assets WHERE assets.asset IS NOT NULL
+        )
+        SELECT asset FROM assets WHERE asset IS NOT NULL
+        """
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def summary():
+    """{actif: (nombre de lignes, premier timestamp, dernier timestamp)}"""
+    rows = get_connection().execute(
+        "SELECT asset, COUNT(*), MIN(timestamp), MAX(timestamp) FROM ticks GROUP BY asset"
+    ).fetchall()
+    return {
+        asset: (count, pd.Timestamp(first), pd.Timestamp(last))
+        for asset, count, first, last in rows
+    }
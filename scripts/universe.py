@@ -0,0 +1,202 @@
+"""
+Univers de cryptos suivies
+
+L'univers (liste de coin ids CoinGecko) est lu depuis data/universe.json
+et peut contenir des centaines ou des milliers d'ids. Les symboles sont
+résolus à partir d'un cache local de /coins/list (data/coins_list.json),
+rafraîchi au plus une fois par semaine.
+
+Le symbole est la clé de stockage (data/store/<SYMBOLE>, colonnes
+<SYMBOLE>_price, data/live/<SYMBOLE>.json) : une fois résolu, il est
+enregistré dans data/universe.json et n'est plus jamais recalculé (une
+nouvelle cotation qui partage le symbole ne renomme pas l'actif).
+
+Format de data/universe.json :
+    {"coins": ["bitcoin", "ethereum", "solana", ...], "symbols": {"pepe": "PEPE", ...}}
+"""
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from atomic_io import atomic_write_text, file_lock
+from http_client import coingecko_get
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+UNIVERSE_FILE = Path(os.environ.get('CRYPTOVISION_UNIVERSE', DATA_DIR / 'universe.json'))
+UNIVERSE_LOCK = UNIVERSE_FILE.with_name(UNIVERSE_FILE.name + '.lock')
+COINS_LIST_CACHE = DATA_DIR / 'coins_list.json'
+COINS_LIST_MAX_AGE = 7 * 24 * 3600  # 1 semaine
+
+# Nombre d'ids max par requête /simple/price
+SIMPLE_PRICE_CHUNK = int(os.environ.get('COINGECKO_SIMPLE_PRICE_CHUNK', 250))
+
+# Univers utilisé tant que data/universe.json n'existe pas
+DEFAULT_UNIVERSE = ['bitcoin', 'ethereum', 'solana']
+
+# Symboles imposés (prioritaires sur la liste CoinGecko)
+AVAILABLE_CRYPTOS = {
+    'bitcoin': 'BTC',
+    'ethereum': 'ETH',
+    'solana': 'SOL',
+    'cardano': 'ADA',
+    'binancecoin': 'BNB',
+    'ripple': 'XRP',
+    'polkadot': 'DOT',
+    'avalanche-2': 'AVAX'
+}
+
+# Symboles imposés : jamais attribués à un autre coin
+RESERVED_SYMBOLS = frozenset(AVAILABLE_CRYPTOS.values())
+
+_coins_by_id = None
+_symbol_counts = None
+_symbols = {}
+
+
+def load_coins_list(refresh=False):
+    """
+    Retourne {coin_id: {'id', 'symbol', 'name'}} depuis le cache local
+    Le cache est rechargé depuis /coins/list s'il a plus d'une semaine
+    """
+    global _coins_by_id, _symbol_counts
+
+    if _coins_by_id is not None and not refresh:
+        return _coins_by_id
+
+    stale = (
+        not COINS_LIST_CACHE.exists()
+        or time.time() - COINS_LIST_CACHE.stat().st_mtime > COINS_LIST_MAX_AGE
+    )
+
+    if refresh or stale:
+        try:
+            response = coingecko_get('/coins/list', endpoint='default')
+            if response.status_code == 200:
+                atomic_write_text(COINS_LIST_CACHE, response.text)
+            else:
+                print(f"⚠️ /coins/list indisponible (Status {response.status_code}), cache conservé")
+        except Exception as e:
+            print(f"⚠️ /coins/list indisponible ({e}), cache conservé")
+
+    coins = []
+    if COINS_LIST_CACHE.exists():
+        coins = json.loads(COINS_LIST_CACHE.read_text(encoding='utf-8'))
+
+    _coins_by_id = {coin['id']: coin for coin in coins}
+    # Nombre de coins par symbole, pour repérer les symboles partagés
+    _symbol_counts = Counter(coin['symbol'].upper() for coin in coins)
+    return _coins_by_id
+
+
+def _read_config():
+    """Contenu de data/universe.json ({} s'il n'existe pas)"""
+    if UNIVERSE_FILE.exists():
+        return json.loads(UNIVERSE_FILE.read_text(encoding='utf-8'))
+    return {}
+
+
+def _write_config(config):
+    """Réécrit data/universe.json ('coins' puis 'symbols')"""
+    ordered = {key: config[key] for key in ('coins', 'symbols') if key in config}
+    atomic_write_text(UNIVERSE_FILE, json.dumps(ordered, indent=2))
+
+
+def load_universe():
+    """
+    Retourne la liste des coin ids suivis
+    data/universe.json s'il existe, sinon l'univers par défaut
+    """
+    config = _read_config()
+    if 'coins' in config:
+        # Sans doublons, en gardant l'ordre
+        return list(dict.fromkeys(config['coins']))
+
+    return list(DEFAULT_UNIVERSE)
+
+
+def save_universe(crypto_ids):
+    """Enregistre l'univers dans data/universe.json (les symboles déjà attribués sont conservés)"""
+    with file_lock(UNIVERSE_LOCK):
+        config = _read_config()
+        config['coins'] = list(crypto_ids)
+        _write_config(config)
+
+
+def _resolve_symbol(crypto_id, taken):
+    """
+    Symbole d'un coin encore jamais vu, d'après /coins/list
+    taken: symboles déjà attribués à d'autres coins
+    """
+    coin = load_coins_list().get(crypto_id)
+    symbol = coin['symbol'].upper() if coin else crypto_id.upper()
+
+    # Plusieurs coins partagent parfois un symbole : on garde l'id pour les distinguer
+    if coin and (_symbol_counts[symbol] > 1 or symbol in taken):
+        symbol = crypto_id.upper()
+    return symbol
+
+
+def _saved_symbols(crypto_id):
+    """
+    Symboles enregistrés dans data/universe.json, en attribuant (une seule
+    fois) ceux de crypto_id et des coins de l'univers qui n'en ont pas encore
+    """
+    saved = _read_config().get('symbols', {})
+    if crypto_id not in saved:
+        with file_lock(UNIVERSE_LOCK):
+            # Relu sous verrou : un autre processus a pu attribuer entre-temps
+            config = _read_config()
+            saved = config.setdefault('symbols', {})
+            taken = set(RESERVED_SYMBOLS) | set(saved.values())
+
+            for coin_id in dict.fromkeys(load_universe() + [crypto_id]):
+                if coin_id in saved or coin_id in AVAILABLE_CRYPTOS:
+                    continue
+                saved[coin_id] = _resolve_symbol(coin_id, taken)
+                taken.add(saved[coin_id])
+
+            _write_config(config)
+
+    return saved
+
+
+def get_symbol(crypto_id):
+    """
+    Symbole utilisé comme clé de stockage (colonnes <SYMBOLE>_price, data/store/<SYMBOLE>)
+    Priorité : AVAILABLE_CRYPTOS, puis le symbole enregistré dans
+    data/universe.json, sinon attribué depuis /coins/list (ou l'id en
+    majuscules) et enregistré. Un symbole partagé par plusieurs coins de
+    /coins/list, ou déjà attribué, est remplacé par l'id.
+    """
+    symbol = _symbols.get(crypto_id)
+    if symbol is not None:
+        return symbol
+
+    if crypto_id in AVAILABLE_CRYPTOS:
+        _symbols[crypto_id] = AVAILABLE_CRYPTOS[crypto_id]
+    else:
+        _symbols.update(_saved_symbols(crypto_id))
+
+    return _symbols[crypto_id]
+
+
+def chunked(crypto_ids, size=None):
+    """Découpe la liste d'ids en paquets pour /simple/price"""
+    size = size or SIMPLE_PRICE_CHUNK
+    return [crypto_ids[i:i + size] for i in range(0, len(crypto_ids), size)]
+
+
+if __name__ == "__main__":
+    print("🌐 Univers de cryptos")
+    coins = load_coins_list(refresh='--refresh' in sys.argv)
+    universe = load_universe()
+    print(f"   Coins connus (cache /coins/list) : {len(coins)}")
+    print(f"   Cryptos suivies : {len(universe)}")
+    print(f"   Requêtes /simple/price par tick : {len(chunked(universe))}")
+    for crypto_id in universe[:20]:
+        print(f"   {crypto_id:<25} {get_symbol(crypto_id)}")
+    if len(universe) > 20:
+        print(f"   ... et {len(universe) - 20} autres")
@@ -0,0 +1,196 @@
+"""
+Walk-forward de la stratégie MA Crossover
+
+Plutôt qu'un seul backtest sur tout l'historique (qui sur-ajuste les
+fenêtres), l'historique est découpé en fenêtres successives :
+    - entraînement : la grille de fenêtres MA est évaluée, la meilleure
+      combinaison (selon une métrique) est retenue ;
+    - test : cette combinaison est jouée sur la période suivante, jamais vue.
+Les courbes de test, mises bout à bout (le capital final d'une période est
+le capital initial de la suivante), donnent la performance hors échantillon.
+
+Fenêtres glissantes (entraînement de taille fixe) ou ancrées (entraînement
+depuis le début de l'historique). Les moyennes mobiles de toute la grille sont
+calculées une seule fois sur l'historique complet (elles ne dépendent que du
+passé) puis découpées par fenêtre. En glissant, les fenêtres d'entraînement
+sont optimisées en parallèle dans des threads (NumPy libère le GIL), qui
+partagent ces indicateurs sans copie. En ancré, chaque entraînement est un
+préfixe du précédent : une seule passe donne les scores de toutes les fenêtres.
+
+Usage :
+    python scripts/walk_forward.py [ACTIF] [--resolution 1h] [--train 720] [--test 168]
+                                   [--anchored] [--metric sharpe_ratio]
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from strategies import (
+    SWEEP_LONG_WINDOWS,
+    SWEEP_SHORT_WINDOWS,
+    calculate_metrics,
+    equity_from_positions,
+    evaluate_grid,
+    position_from_signals,
+    price_growth,
+    rolling_means
+)
+
+# Métriques utilisables pour choisir les fenêtres (la plus grande gagne)
+OPTIMIZATION_METRICS = ['sharpe_ratio', 'total_return', 'max_drawdown']
+
+# Tailles par défaut en barres : 30 jours d'entraînement, 7 jours de test en 1h
+DEFAULT_TRAIN_SIZE = 30 * 24
+DEFAULT_TEST_SIZE = 7 * 24
+
+
+def walk_forward_windows(n, train_size, test_size, anchored=False):
+    """
+    Découpe n points en fenêtres (début entraînement, fin entraînement, fin test)
+    Fins exclues ; le test commence à la fin de l'entraînement
+    """
+    if train_size < 2 or test_size < 1:
+        raise ValueError("train_size doit être >= 2 et test_size >= 1")
+
+    windows = []
+    train_end = train_size
+    while train_end < n:
+        train_start = 0 if anchored else train_end - train_size
+        windows.append((train_start, train_end, min(train_end + test_size, n)))
+        train_end += test_size
+
+    return windows
+
+
+def walk_forward(prices, train_size=DEFAULT_TRAIN_SIZE, test_size=DEFAULT_TEST_SIZE, anchored=False,
+                 short_windows=SWEEP_SHORT_WINDOWS, long_windows=SWEEP_LONG_WINDOWS,
+                 metric='sharpe_ratio', initial_capital=10000, workers=None):
+    """
+    Walk-forward MA Crossover sur une série de prix
+    prices: Series (indexée par timestamp de préférence), tailles en barres
+    Retourne {
+        'windows': DataFrame une ligne par fenêtre (bornes, fenêtres retenues,
+                   score d'entraînement, rendement de test),
+        'equity': Series de la courbe hors échantillon recollée,
+        'metrics': calculate_metrics de cette courbe
+    }
+    """
+    if metric not in OPTIMIZATION_METRICS:
+        raise ValueError(f"Métrique inconnue : {metric} (disponibles : {', '.join(OPTIMIZATION_METRICS)})")
+
+    short_windows, long_windows = list(short_windows), list(long_windows)
+    price_values = prices.to_numpy(dtype=np.float64)
+
+    windows = walk_forward_windows(len(price_values), train_size, test_size, anchored)
+    if not windows:
+        raise ValueError(
+            f"Historique trop court : {len(price_values)} points pour {train_size} d'entraînement"
+        )
+
+    # Indicateurs calculés une fois, partagés par toutes les fenêtres
+    short_ma = rolling_means(price_values, short_windows)
+    long_ma = rolling_means(price_values, long_windows)
+    growth = price_growth(price_values)
+
+    def best(grid):
+        """Meilleure combinaison (i courte, j longue, score), ou None"""
+        if np.isnan(grid).all():
+            return None
+        i, j = np.unravel_index(np.nanargmax(grid), grid.shape)
+        return i, j, grid[i, j]
+
+    def optimize(window):
+        """Meilleure combinaison sur une fenêtre d'entraînement glissante"""
+        train_start, train_end, _ = window
+        return best(evaluate_grid(
+            short_ma[:, train_start:train_end], long_ma[:, train_start:train_end],
+            growth[train_start:train_end], short_windows, long_windows, initial_capital
+        )[metric])
+
+    if anchored:
+        # Entraînements [0, fin) : préfixes d'une même passe sur tout l'historique
+        ends = [train_end for _, train_end, _ in windows]
+        scores = evaluate_grid(
+            short_ma[:, :ends[-1]], long_ma[:, :ends[-1]], growth[:ends[-1]],
+            short_windows, long_windows, initial_capital, ends=ends
+        )[metric]
+        choices = [best(scores[:, :, k]) for k in range(len(windows))]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            choices = list(executor.map(optimize, windows))
+
+    # Périodes de test recollées dans l'ordre, le capital passant de l'une à l'autre
+    capital = initial_capital
+    curves, rows = [], []
+
+    for (train_start, train_end, test_end), choice in zip(windows, choices):
+        if choice is None:
+            # Aucune combinaison évaluable : on reste hors marché
+            equity = np.full(test_end - train_end, capital)
+            short_window = long_window = score = None
+        else:
+            i, j, score = choice
+            short, long_ = short_ma[i, train_end:test_end], long_ma[j, train_end:test_end]
+            position = position_from_signals(short > long_, short < long_)
+            valid = ~(np.isnan(short) | np.isnan(long_))
+            equity = equity_from_positions(price_values[train_end:test_end], position, valid, capital)
+            short_window, long_window = short_windows[i], long_windows[j]
+
+        rows.append({
+            'train_start': prices.index[train_start],
+            'train_end': prices.index[train_end - 1],
+            'test_start': prices.index[train_end],
+            'test_end': prices.index[test_end - 1],
+            'short_window': short_window,
+            'long_window': long_window,
+            f'train_{metric}': score,
+            'test_return': (equity[-1] / capital - 1) * 100
+        })
+        curves.append(equity)
+        capital = equity[-1]
+
+    first_test = windows[0][1]
+    equity = pd.Series(np.concatenate(curves), index=prices.index[first_test:windows[-1][2]])
+
+    return {
+        'windows': pd.DataFrame(rows),
+        'equity': equity,
+        'metrics': calculate_metrics(equity, initial_capital)
+    }
+
+
+if __name__ == "__main__":
+    from price_store import load_bars
+    from strategies import print_metrics
+
+    args = sys.argv[1:]
+
+    def option(flag, default=None):
+        if flag in args:
+            i = args.index(flag)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    resolution = option('--resolution', '1h')
+    train_size = int(option('--train', DEFAULT_TRAIN_SIZE))
+    test_size = int(option('--test', DEFAULT_TEST_SIZE))
+    metric = option('--metric', 'sharpe_ratio')
+    anchored = '--anchored' in args
+    args = [arg for arg in args if arg != '--anchored']
+    asset = args[0] if args else 'BTC'
+
+    bars = load_bars(asset, resolution)
+    prices = pd.Series(bars['close'].to_numpy(), index=bars['timestamp'])
+
+    print(f"🔁 Walk-forward MA Crossover : {asset} en {resolution}, {len(prices)} barres")
+    print(f"   Entraînement {train_size} barres ({'ancré' if anchored else 'glissant'}), "
+          f"test {test_size} barres, optimisation sur {metric}")
+
+    result = walk_forward(prices, train_size, test_size, anchored, metric=metric)
+
+    print(result['windows'].to_string(index=False))
+    print_metrics(result['metrics'], f"Walk-forward {asset} (hors échantillon)")